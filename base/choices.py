@@ -8,6 +8,19 @@ STATE_CHOICES = (
     (StateStatuses.INACTIVE, "INACTIVE")
 )
 
+
+class JobStatuses:
+    QUEUED = 0
+    RUNNING = 1
+    FINISHED = 2
+
+
+JOB_STATUS_CHOICES = (
+    (JobStatuses.QUEUED, "QUEUED"),
+    (JobStatuses.RUNNING, "RUNNING"),
+    (JobStatuses.FINISHED, "FINISHED")
+)
+
 CONTENT_TYPE = {
     'JPG': 'image/jpeg',
     'jpg': 'image/jpeg',
@@ -0,0 +1,63 @@
+import logging
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker waits at startup for the pool to reach its minimum size
+POOL_OPEN_TIMEOUT = 30
+
+
+def get_connection_pools():
+    """
+    Connection pools of the configured databases, keyed by alias.
+
+    Only databases with ``OPTIONS['pool']`` set have one.
+    """
+    pools = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
+
+
+def open_connection_pools(wait=True, timeout=POOL_OPEN_TIMEOUT):
+    """
+    Open every connection pool and fill it to ``min_size`` before serving traffic.
+
+    Django otherwise opens the pool on the first query, so the first requests of
+    each worker pay for the connection setup. Call once per worker process, after
+    the fork: pools started before forking would share sockets between workers.
+
+    :param wait: Block until the pool holds ``min_size`` connections
+    :param timeout: Seconds to wait before giving up and leaving the pool to the first query
+    """
+    from psycopg_pool import PoolTimeout
+
+    for alias, pool in get_connection_pools().items():
+        try:
+            pool.open(wait=wait, timeout=timeout)
+        except PoolTimeout:
+            logger.warning("Connection pool '%s' did not reach min_size=%s in %ss", alias, pool.min_size, timeout)
+            # A timed out pool is closed for good, drop it so the first query builds a new one
+            connections[alias].close_pool()
+
+
+def get_connection_pool_stats():
+    """
+    Counters of every connection pool of this process, keyed by alias.
+
+    Adds ``requests_wait_ms_avg``, the mean time requests waited for a connection.
+    Times are in milliseconds, counters accumulate since the pool was opened.
+    """
+    stats = {}
+    for alias, pool in get_connection_pools().items():
+        pool_stats = pool.get_stats()
+        requests_num = pool_stats.get('requests_num', 0)
+        pool_stats['requests_wait_ms_avg'] = (
+            pool_stats.get('requests_wait_ms', 0) / requests_num if requests_num else 0
+        )
+        pool_stats['closed'] = pool.closed
+        stats[alias] = pool_stats
+    return stats
@@ -1,4 +1,8 @@
-from rest_framework import status
+import logging
+
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from rest_framework import exceptions, status
 from rest_framework.views import exception_handler
 
 from .exceptions import (
@@ -10,8 +14,25 @@ from .exceptions import (
 )
 from base.response import APIResponse
 
+logger = logging.getLogger(__name__)
+
+# Headers of DRF's response kept on ours, so clients can still authenticate and back off
+FORWARDED_HEADERS = ('WWW-Authenticate', 'Retry-After')
+
+
+def _get_message(detail):
+    if isinstance(detail, dict) and 'detail' in detail:
+        detail = detail['detail']
+    return detail.title() if isinstance(detail, str) else detail
+
 
 def custom_exception_handler(exc, context):
+    # Map Django's exceptions the way DRF's handler does, so they answer 404 and 403 rather than 500
+    if isinstance(exc, Http404):
+        exc = exceptions.NotFound(*exc.args)
+    elif isinstance(exc, PermissionDenied):
+        exc = exceptions.PermissionDenied(*exc.args)
+
     response = exception_handler(exc, context)
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     data = {
@@ -19,7 +40,7 @@ def custom_exception_handler(exc, context):
         'message': 'Unknown Internal Server Error'
     }
     try:
-        if exc is not None:
+        if isinstance(exc, exceptions.APIException):
             # TODO Keeping it true to start with, change later.
             data = {
                 'code': exc.get_codes(),
@@ -36,21 +57,20 @@ def custom_exception_handler(exc, context):
             elif isinstance(exc, TooManyRequestsException):
                 status_code = status.HTTP_429_TOO_MANY_REQUESTS
             else:
-                status_code = exc.status_code if (
-                    exc.status_code) else status.HTTP_400_BAD_REQUEST
-                if status_code is not status.HTTP_403_FORBIDDEN:
-                    data = {
-                        'code': exc.get_codes().get('code'),
-                        'message': exc.detail.get("detail").title()
-                    }
-                else:
-                    data = {
-                        'code': exc.get_codes(),
-                        'message': exc.detail.title()
-                    }
-        if response is not None:
-            response.data['status_code'] = response.status_code
-    except Exception as e:
-        print("exception while raising proper exception", e, exc)
-
-    return APIResponse(data=data, status=status_code)
+                status_code = response.status_code if response is not None else exc.status_code
+                codes = exc.get_codes()
+                data = {
+                    'code': codes.get('code', codes.get('detail')) if isinstance(codes, dict) else codes,
+                    'message': _get_message(exc.detail)
+                }
+        else:
+            logger.error("Unhandled exception in %s", context.get('view'), exc_info=exc)
+    except Exception:
+        logger.exception("Could not build the error response for %r", exc)
+
+    api_response = APIResponse(data=data, status=status_code)
+    if response is not None:
+        for header in FORWARDED_HEADERS:
+            if header in response:
+                api_response[header] = response[header]
+    return api_response
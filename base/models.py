@@ -30,9 +30,10 @@ class DeletionModel(models.Model):
 
 
 class AbstractBaseModel(BaseTimeModel, DeletionModel, BaseUUIDModel):
+    # No default ordering: every query would pay for an ORDER BY created_at.
+    # Order explicitly where it matters (admin lists use BaseModelAdmin.ordering).
     class Meta:
         abstract = True
-        ordering = ("-created_at",)
 
     def __str__(self):
         return str(self.uuid)
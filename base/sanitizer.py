@@ -0,0 +1,73 @@
+import re
+
+# Characters the ReportLab paragraph parser reads as markup, and the quote ending attribute values
+MARKUP_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}
+_MARKUP_UNESCAPES = {escaped: character for character, escaped in MARKUP_ESCAPES.items()}
+
+# One scan escapes markup characters and drops control characters PDF text cannot carry
+_MARKUP_RE = re.compile(r'[&<>"]|[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_ESCAPED_RE = re.compile('|'.join(_MARKUP_UNESCAPES))
+
+_TOP_LEVEL_DOMAINS = (
+    'com', 'org', 'net', 'gov', 'edu', 'mil', 'int', 'uk', 'ca', 'au', 'in', 'de', 'jp', 'fr', 'it', 'es', 'nl',
+    'se', 'no', 'dk', 'br', 'ru', 'cn', 'kr', 'sg', 'hk', 'tw', 'io', 'me', 'info', 'biz', 'coop', 'museum', 'aero',
+    'name',
+)
+
+# Tags, URLs, bare domains and bracket symbols, removed in one scan by sanitize_input
+_INPUT_RE = re.compile(
+    r'</?[A-Za-z][^<>]*>|<!--.*?-->'
+    r'|https?://\S+|www\.\S+'
+    r'|\S+\.(?:' + '|'.join(_TOP_LEVEL_DOMAINS) + r')'
+    r'|[{}\[\]()/:<>]'
+)
+
+
+def _escape_match(match):
+    return MARKUP_ESCAPES.get(match.group(), '')
+
+
+def escape_markup(text):
+    """
+    Make user text safe for the ReportLab paragraph parser.
+
+    Escapes ``&``, ``<``, ``>`` and ``"``, so text can also go into attribute values,
+    and drops control characters. Not idempotent: apply it once, when the text
+    enters the render snapshot.
+    """
+    if not text:
+        return text
+    return _MARKUP_RE.sub(_escape_match, text)
+
+
+def unescape_markup(text):
+    """
+    Original text of a string escaped by escape_markup, for file names, outlines and search.
+    """
+    if not text or '&' not in text:
+        return text
+    return _ESCAPED_RE.sub(lambda match: _MARKUP_UNESCAPES[match.group()], text)
+
+
+def escape_markup_values(value):
+    """
+    Escape every string in a JSON-like structure of dicts and lists, see escape_markup.
+    """
+    if isinstance(value, str):
+        return escape_markup(value)
+    if isinstance(value, dict):
+        return {key: escape_markup_values(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [escape_markup_values(item) for item in value]
+    return value
+
+
+def sanitize_input(text):
+    """
+    Strip tags, URLs, bare domains and bracket symbols from free-text API input.
+
+    :return: The cleaned, stripped text
+    """
+    if not text:
+        return text
+    return _INPUT_RE.sub('', text).strip()
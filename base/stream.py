@@ -0,0 +1,210 @@
+import os
+import re
+import time
+import zipfile
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+ZIP_CONTENT_TYPE = 'application/zip'
+
+# Bytes read per chunk when streaming files
+FILE_BLOCK_SIZE = 64 * 1024
+
+# A single byte range; multiple ranges are answered with the whole file, as RFC 9110 allows
+BYTE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class StreamBuffer:
+    """
+    Write-only file object that hands everything written to it back to a generator.
+
+    ``zipfile`` treats it as an unseekable stream, so entries are written with
+    data descriptors and nothing is ever rewound or kept around.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip_stream(entries, compression=zipfile.ZIP_STORED):
+    """
+    Yield a ZIP archive chunk by chunk.
+
+    :param entries: Iterable of ``(name, content)`` pairs, consumed lazily
+    :param compression: Entry compression, stored by default since PDFs are already compressed
+    """
+    buffer = StreamBuffer()
+    date_time = time.localtime(time.time())[:6]
+    with zipfile.ZipFile(buffer, mode='w', compression=compression, allowZip64=True) as archive:
+        for name, content in entries:
+            entry = zipfile.ZipInfo(name, date_time=date_time)
+            entry.compress_type = compression
+            archive.writestr(entry, content)
+            yield buffer.drain()
+    # Central directory
+    yield buffer.drain()
+
+
+class IncrementalAsyncIterMixin:
+    """
+    Makes a streaming response pull a synchronous iterator one chunk at a time under ASGI.
+
+    Django's default falls back to ``sync_to_async(list)`` for synchronous iterators,
+    which buffers the whole body in memory before the first byte is sent.
+    """
+    # Pull chunks on the shared sync thread; iterators that never touch the database can opt out
+    thread_sensitive = True
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in self.streaming_content:
+                yield part
+            return
+
+        sentinel = object()
+        next_chunk = sync_to_async(next, thread_sensitive=self.thread_sensitive)
+        content = self.streaming_content
+        while True:
+            part = await next_chunk(content, sentinel)
+            if part is sentinel:
+                break
+            yield part
+
+
+class IncrementalStreamingResponse(IncrementalAsyncIterMixin, StreamingHttpResponse):
+    """StreamingHttpResponse streamed chunk by chunk under ASGI, see IncrementalAsyncIterMixin."""
+
+
+class ZipStreamingResponse(IncrementalStreamingResponse):
+    """Stream a ZIP archive built from ``(name, content)`` entries as they are produced."""
+
+    def __init__(self, entries, filename: str = 'archive.zip', compression=zipfile.ZIP_STORED, **kwargs):
+        kwargs.setdefault('content_type', ZIP_CONTENT_TYPE)
+        super().__init__(iter_zip_stream(entries, compression=compression), **kwargs)
+        self['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+
+def parse_byte_range(header, size):
+    """
+    First and last byte of a ``Range`` header, both inclusive.
+
+    :param header: Value of the ``Range`` header
+    :param size: Size of the file in bytes
+    :return: ``(start, end)``, or None when the header is absent or not a single byte range
+    :raises ValueError: When the range cannot be satisfied
+    """
+    match = BYTE_RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range, the last N bytes
+        length = int(last)
+        if not length or not size:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_file_range(file, start, length, block_size=FILE_BLOCK_SIZE):
+    file.seek(start)
+    while length > 0:
+        data = file.read(min(block_size, length))
+        if not data:
+            break
+        length -= len(data)
+        yield data
+
+
+class RangedFileResponse(IncrementalAsyncIterMixin, FileResponse):
+    """
+    FileResponse for a whole file or one byte range of it, streamed in fixed-size blocks.
+
+    Whole files still go through ``wsgi.file_wrapper`` (sendfile) under WSGI. Under
+    ASGI every block is read in a worker thread, so the body is never held in memory.
+    """
+    block_size = FILE_BLOCK_SIZE
+    # Blocks are plain file reads, keep them off the shared sync thread
+    thread_sensitive = False
+
+    def __init__(self, *args, byte_range=None, **kwargs):
+        self.byte_range = byte_range
+        super().__init__(*args, **kwargs)
+        self['Accept-Ranges'] = 'bytes'
+
+    def _set_streaming_content(self, value):
+        super()._set_streaming_content(value)
+        if self.byte_range is None or not hasattr(value, 'read'):
+            return
+        start, end = self.byte_range
+        size = os.fstat(value.fileno()).st_size
+        # A partial body cannot be handed to wsgi.file_wrapper, which sends the whole file
+        self.file_to_stream = None
+        StreamingHttpResponse._set_streaming_content(self, iter_file_range(value, start, end - start + 1))
+        self.status_code = 206
+        self['Content-Range'] = f'bytes {start}-{end}/{size}'
+        self['Content-Length'] = str(end - start + 1)
+
+
+def serve_file(request, path, content_type, filename=None, etag=None, as_attachment=False):
+    """
+    Response serving a file from disk, honouring ``Range`` and ``If-Range``.
+
+    With ``settings.SENDFILE_BACKEND`` set, the body is left to the web server:
+    'nginx' answers with ``X-Accel-Redirect`` below ``settings.SENDFILE_URL``, 'apache'
+    and 'lighttpd' with ``X-Sendfile``. The server then handles ranges itself.
+
+    :param path: File to serve, below ``settings.SENDFILE_ROOT`` when a backend is set
+    :param etag: Strong ETag of the file; ``If-Range`` only resumes a range when it matches
+    """
+    path = Path(path)
+    backend = getattr(settings, 'SENDFILE_BACKEND', None)
+    if backend:
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx':
+            relative_path = path.resolve().relative_to(Path(settings.SENDFILE_ROOT).resolve())
+            response['X-Accel-Redirect'] = f"{settings.SENDFILE_URL.rstrip('/')}/{relative_path.as_posix()}"
+        else:
+            response['X-Sendfile'] = str(path.resolve())
+        if filename:
+            disposition = 'attachment' if as_attachment else 'inline'
+            response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+        return response
+
+    size = path.stat().st_size
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_byte_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    return RangedFileResponse(
+        path.open('rb'),
+        byte_range=byte_range,
+        content_type=content_type,
+        filename=filename,
+        as_attachment=as_attachment
+    )
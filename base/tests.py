@@ -1,3 +1,134 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase, TransactionTestCase
+from rest_framework import exceptions
+
+from base.exception_handler import custom_exception_handler
+from base.exceptions import BaseAPIException
+
+from base.db_pool import get_connection_pool_stats, get_connection_pools, open_connection_pools
+from base.sanitizer import escape_markup, escape_markup_values, sanitize_input, unescape_markup
+from base.single_flight import SingleFlight
+
+POOL_CONFIGURED = connection.vendor == 'postgresql' and bool(connection.settings_dict['OPTIONS'].get('pool'))
+
+
+class ConnectionPoolMetricsViewTest(TestCase):
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.get('/metrics/db-pool/').status_code, 403)
+
+    def test_reports_pool_stats(self):
+        user = get_user_model().objects.create_user('ops', is_staff=True)
+        self.client.force_login(user)
+        response = self.client.get('/metrics/db-pool/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['data']), set(get_connection_pools()))
+
+
+class ExceptionHandlerTest(TestCase):
+
+    def handle(self, exc):
+        response = custom_exception_handler(exc, {})
+        return response.status_code, response.data['error']
+
+    def test_maps_statuses(self):
+        self.assertEqual(self.handle(BaseAPIException("Unknown template.", 'validation_failed')),
+                         (400, {'code': 'validation_failed', 'message': 'Unknown template.'}))
+        self.assertEqual(self.handle(Http404("Resume not found.")), (404, {'code': 'not_found', 'message': 'Resume Not Found.'}))
+        self.assertEqual(self.handle(PermissionDenied())[0], 403)
+        self.assertEqual(self.handle(exceptions.NotAuthenticated()),
+                         (401, {'code': 'not_authenticated', 'message': 'Authentication Credentials Were Not Provided.'}))
+        with self.assertLogs('base.exception_handler', 'ERROR'):
+            self.assertEqual(self.handle(ValueError('boom'))[0], 500)
+
+    def test_keeps_retry_after(self):
+        response = custom_exception_handler(exceptions.Throttled(wait=5), {})
+        self.assertEqual((response.status_code, response['Retry-After']), (429, '5'))
+
+
+class SanitizerTest(TestCase):
+
+    def test_sanitize_input_strips_tags_urls_and_symbols(self):
+        text = ' <b>Lead</b> (R&D) at https://acme.io/jobs, see www.acme.com or acme.io [2021] '
+        self.assertEqual(sanitize_input(text), 'Lead R&D at  see  or  2021')
+
+    def test_escape_markup(self):
+        self.assertEqual(escape_markup('a < b & c > d\x00'), 'a &lt; b &amp; c &gt; d')
+        self.assertEqual(
+            escape_markup_values({'skills': ['C&C++', 3], 'name': '<Jo>'}),
+            {'skills': ['C&amp;C++', 3], 'name': '&lt;Jo&gt;'}
+        )
+        self.assertEqual(escape_markup('https://ada.dev/?q="x"'), 'https://ada.dev/?q=&quot;x&quot;')
+
+    def test_unescape_markup_inverts_escape_markup(self):
+        for text in ('AT&T', '<a href="x">', '&amp; stays &amp;', 'plain', ''):
+            self.assertEqual(unescape_markup(escape_markup(text)), text)
+
+
+class SingleFlightTest(TestCase):
+
+    def run_concurrently(self, flight, fn, callers=8):
+        results = []
+        start = threading.Barrier(callers)
+
+        def call():
+            start.wait()
+            try:
+                results.append(flight.do('key', fn))
+            except ValueError as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.2)
+            return len(calls)
+
+        self.assertEqual(self.run_concurrently(flight, fn), [1] * 8)
+        self.assertEqual(flight.stats, {'calls': 1, 'shared': 7})
+        self.assertEqual(flight.in_flight(), 0)
+        # Nothing is cached once the call returned
+        self.assertEqual(flight.do('key', fn), 2)
+
+    def test_concurrent_calls_share_one_error(self):
+        error = ValueError('render failed')
+
+        def fn():
+            time.sleep(0.2)
+            raise error
+
+        self.assertEqual(self.run_concurrently(SingleFlight(), fn), [error] * 8)
+
+
+@skipUnless(POOL_CONFIGURED, "Needs PostgreSQL with DB_POOL_ENABLED, see docker-compose.yml")
+class ConnectionPoolTest(TransactionTestCase):
+
+    def test_open_fills_pool_before_first_query(self):
+        open_connection_pools()
+        stats = get_connection_pool_stats()['default']
+        self.assertFalse(stats['closed'])
+        self.assertGreaterEqual(stats['pool_size'], stats['pool_min'])
+
+    def test_connections_return_to_pool_after_request(self):
+        self.client.get('/metrics/db-pool/')
+        connection.close()
+        stats = get_connection_pool_stats()['default']
+        self.assertEqual(stats['pool_available'], stats['pool_size'])
+        self.assertIn('requests_wait_ms_avg', stats)
@@ -1,12 +1,13 @@
-import re
-
-from django.utils.html import strip_tags
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 
+from rest_framework.permissions import IsAdminUser
 from rest_framework.views import APIView
 
+from .db_pool import get_connection_pool_stats
 from .exceptions import BaseAPIException
+from .sanitizer import sanitize_input
+from .response import APIResponse
 
 
 class AbstractAPIView(APIView):
@@ -24,22 +25,12 @@ class AbstractAPIView(APIView):
         return True
 
     def get_sanitized_string(self, data_string, is_param_str=False):
-        start_url_pattern = r'(?:http://\S+|https://\S+|www\.\S+)'
-        end_url_pattern = r'\S+(?:\.com|\.org|\.net|\.gov|\.edu|\.mil|\.int|\.uk|\.ca|\.au|\.in|\.de|\.jp|\.fr|\.it|' \
-                          r'\.es|\.nl|\.se|\.no|\.dk|\.br|\.ru|\.cn|\.kr|\.sg|\.hk|\.tw|\.io|\.me|\.info|\.biz|' \
-                          r'\.coop|\.museum|\.aero|\.name)'
-        match_symbol_pattern = r'[\{\}\[\]\(\)://<>]'
         if is_param_str:
             string = self.request.GET.get(data_string)
         else:
             string = self.request.data.get(data_string)
         if string:
-            string = strip_tags(string)
-            string = re.sub(start_url_pattern, '', string)
-            string = re.sub(end_url_pattern, '', string)
-            string = re.sub(match_symbol_pattern, '', string)
-            string = string.strip()
-            return string
+            return sanitize_input(string)
 
     def get_email(self, email):
         if email is not None:
@@ -50,3 +41,11 @@ class AbstractAPIView(APIView):
                     'Enter a valid email address.', 'validation_failed'
                 )
         return email
+
+
+class ConnectionPoolMetricsView(AbstractAPIView):
+    """Connection pool counters of the worker serving the request, including wait times."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return APIResponse(get_connection_pool_stats())
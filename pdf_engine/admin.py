@@ -1,6 +1,14 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import Q
+from django.shortcuts import redirect
+from django.urls import reverse
 
 from base.admin import BaseModelAdmin
+from base.choices import JobStatuses
+from pdf_engine.handlers.render_job_handler import RenderJobHandler
+from pdf_engine.handlers.resume_search_handler import SEARCH_TERM_RE, ResumeSearchHandler
 
 # Register your models here.
 
@@ -14,7 +22,9 @@ from .models import (
     ResumeExperience,
     ResumeEducation,
     ResumeSkill,
-    ResumeTemplate
+    ResumeTemplate,
+    ResumeRenderUsage,
+    RenderJob
 )
 
 
@@ -35,6 +45,26 @@ class ExperienceAdmin(BaseModelAdmin):
     search_fields = ('title', 'company', 'location')
     list_display = ('title', 'company', 'start_date', 'end_date', 'location', 'description', 'achievements')
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Experiences on resumes matching the search index, holding every word of the search themselves.
+
+        The index narrows the rows the text is matched against to the experiences of
+        matching resumes. Experiences on no resume are not found.
+        """
+        search = ResumeSearchHandler()
+        if not search_term or not search.supported:
+            return super().get_search_results(request, queryset, search_term)
+        resumes = search.filter(Resume.objects.all(), search_term)
+        queryset = queryset.filter(uuid__in=ResumeExperience.objects.filter(
+            resume__in=resumes.values('uuid')).values('experience_id'))
+        for term in SEARCH_TERM_RE.findall(search_term):
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(company__icontains=term) | Q(location__icontains=term)
+                | Q(description__icontains=term)
+            )
+        return queryset, False
+
 @admin.register(Education)
 class EducationAdmin(BaseModelAdmin):
     search_fields = ('degree', 'field', 'institution')
@@ -47,10 +77,38 @@ class SkillAdmin(BaseModelAdmin):
     list_display = ('name',)
 
 
+class RenderActionForm(ActionForm):
+    template = forms.CharField(required=False, help_text="Template used by render actions, the default one when empty")
+    two_column_layout = forms.BooleanField(required=False)
+
+
 @admin.register(Resume)
 class ResumeAdmin(BaseModelAdmin):
     search_fields = ('personal_info__name', 'summary__text')
     list_display = ('personal_info', 'summary')
+    action_form = RenderActionForm
+    actions = ('render_selected',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Through the full-text index, see ResumeSearchHandler
+        search = ResumeSearchHandler()
+        if not search_term or not search.supported:
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter(queryset, search_term), False
+
+    @admin.action(description="Re-render selected resumes in the background")
+    def render_selected(self, request, queryset):
+        try:
+            job = RenderJobHandler().create_job(
+                queryset.values_list('uuid', flat=True),
+                request.POST.get('template'),
+                bool(request.POST.get('two_column_layout'))
+            )
+        except ResumeTemplate.DoesNotExist:
+            self.message_user(request, f"Unknown template {request.POST.get('template')!r}.", messages.ERROR)
+            return None
+        self.message_user(request, f"Queued {job.total} resumes for rendering.", messages.SUCCESS)
+        return redirect(reverse('admin:pdf_engine_renderjob_change', args=(job.uuid,)))
 
 
 @admin.register(ResumeExperience)
@@ -75,3 +133,42 @@ class ResumeSkillAdmin(BaseModelAdmin):
 class ResumeTemplateAdmin(BaseModelAdmin):
     search_fields = ('name',)
     list_display = ('name',)
+
+
+@admin.register(ResumeRenderUsage)
+class ResumeRenderUsageAdmin(BaseModelAdmin):
+    search_fields = ('resume__personal_info__name', 'template__name')
+    list_display = ('resume', 'template', 'layout', 'profile', 'downloads', 'last_downloaded_at')
+    list_filter = ('layout', 'profile')
+
+
+@admin.register(RenderJob)
+class RenderJobAdmin(BaseModelAdmin):
+    list_display = ('template_name', 'status', 'total', 'rendered', 'failed', 'throughput_display', 'eta_display',
+                    'created_at')
+    list_filter = ('status',)
+    exclude = ('resume_ids',)
+    readonly_fields = ('uuid', 'template_name', 'two_column_layout', 'status', 'total', 'rendered', 'failed',
+                       'throughput_display', 'eta_display', 'failures', 'started_at', 'finished_at', 'created_at',
+                       'updated_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        job = self.get_object(request, object_id)
+        extra_context = {**(extra_context or {}), 'refresh_progress': job and job.status != JobStatuses.FINISHED}
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    def has_change_permission(self, request, obj=None):
+        # Read-only progress page
+        return False
+
+    @admin.display(description='Resumes per second')
+    def throughput_display(self, obj):
+        return f"{obj.throughput:.2f}"
+
+    @admin.display(description='ETA')
+    def eta_display(self, obj):
+        eta = obj.eta_seconds
+        return '-' if eta is None else f"{eta // 60}m {eta % 60}s"
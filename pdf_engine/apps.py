@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PdfEngineConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pdf_engine"
+
+    def ready(self):
+        from pdf_engine import signals  # noqa: F401
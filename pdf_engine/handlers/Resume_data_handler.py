@@ -1,4 +1,10 @@
+import heapq
+import re
+from collections import Counter
 from datetime import datetime
+
+from pdf_engine.handlers.archive_readers import iter_archive_members, iter_csv_rows, iter_json_array
+from pdf_engine.handlers.resume_snapshot_handler import ResumeSnapshotHandler, defer_snapshot_refresh
 from pdf_engine.models import (
     PersonalInfo,
     Summary,
@@ -12,77 +18,279 @@ from pdf_engine.models import (
 )
 
 
+# Resumes inserted per batch by bulk imports
+IMPORT_BATCH_SIZE = 100
+# Entries kept per section of an imported resume, archives can list far more
+IMPORT_MAX_ENTRIES = 50
+# Most recently created repositories listed as projects of a GitHub import
+GITHUB_MAX_PROJECTS = 10
+
+LINKEDIN_FILES = {'profile.csv', 'email addresses.csv', 'phonenumbers.csv', 'positions.csv', 'education.csv',
+                  'skills.csv'}
+URL_RE = re.compile(r'https?://[^\s,\]]+')
+
+
+def to_month_year(value):
+    """
+    Normalise an export date ('Jan 2020', '2020', '2020-01-31...') to the ingest format '%b %Y'.
+    """
+    value = (value or '').strip()
+    for date_format in ('%b %Y', '%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value[:10] if date_format == '%Y-%m-%d' else value, date_format).strftime('%b %Y')
+        except ValueError:
+            continue
+    return None
+
+
 class ResumeDataHandler:
 
-    def extract_data_from_github(self, data):
-        # Extract data from json
-        pass
+    def extract_data_from_github(self, archive_path, login=None):
+        """
+        Map a GitHub account archive to resume data.
+
+        ``users_*.json`` and ``repositories_*.json`` are decoded element by element.
+        Only the matching user, the latest repositories and a language count are kept,
+        so memory does not grow with the size of the archive.
+
+        :param archive_path: Path of the downloaded archive, tar.gz or zip
+        :param login: Account to import; the first user of the archive by default
+        """
+        user = None
+        projects = []
+        languages = Counter()
+        members = iter_archive_members(
+            archive_path, lambda name: re.match(r'^(users|repositories)_\d+\.json$', name) is not None)
+        for name, file in members:
+            for record in iter_json_array(file):
+                if name.startswith('users_'):
+                    if user is None and (login is None or record.get('login') == login):
+                        user = record
+                    continue
+                if record.get('fork'):
+                    continue
+                for language in (record.get('language'), *(record.get('topics') or ())):
+                    if language:
+                        languages[language] += 1
+                project = (record.get('created_at') or '', record.get('name') or '', record.get('description') or '')
+                if len(projects) < GITHUB_MAX_PROJECTS:
+                    heapq.heappush(projects, project)
+                else:
+                    heapq.heappushpop(projects, project)
+
+        if user is None:
+            raise ValueError(f"No GitHub user {login or ''} in {archive_path}.")
+        emails = user.get('emails') or []
+        primary_email = next((email['address'] for email in emails if email.get('primary')), None)
+        return {
+            'name': user.get('name') or user['login'],
+            'contact_info': {
+                'email': primary_email or (emails[0]['address'] if emails else ''),
+                'phone': '',
+                'linkedin': None,
+                'website': user.get('website') or user.get('blog') or user.get('url'),
+            },
+            'summary': user.get('bio') or '',
+            'experience': [
+                {
+                    'title': 'Maintainer',
+                    'company': name,
+                    'start_date': to_month_year(created_at) or 'Jan 2008',
+                    'end_date': 'Present',
+                    'location': user.get('location'),
+                    'description': description,
+                    'achievements': [],
+                }
+                for created_at, name, description in sorted(projects, reverse=True)
+            ],
+            'education': [],
+            'skills': [language for language, _ in languages.most_common(IMPORT_MAX_ENTRIES)],
+        }
+
+    def extract_data_from_linkedin(self, archive_path):
+        """
+        Map a LinkedIn data export ZIP to resume data.
+
+        The CSV members are decoded row by row straight from the archive and the
+        other members, messages and connections included, are never read.
+
+        :param archive_path: Path of the downloaded export ZIP
+        """
+        profile = {}
+        emails = []
+        phone = ''
+        experience = []
+        education = []
+        skills = []
+        members = iter_archive_members(archive_path, lambda name: name.lower() in LINKEDIN_FILES)
+        for name, file in members:
+            name = name.lower()
+            for row in iter_csv_rows(file):
+                if name == 'profile.csv':
+                    profile = profile or row
+                elif name == 'email addresses.csv':
+                    if row.get('Primary') == 'Yes':
+                        emails.insert(0, row.get('Email Address'))
+                    elif not emails:
+                        emails.append(row.get('Email Address'))
+                elif name == 'phonenumbers.csv':
+                    phone = phone or (row.get('Number') or '')[:15]
+                elif name == 'positions.csv' and len(experience) < IMPORT_MAX_ENTRIES:
+                    start_date = to_month_year(row.get('Started On'))
+                    if not start_date:
+                        continue
+                    experience.append({
+                        'title': row.get('Title') or '',
+                        'company': row.get('Company Name') or '',
+                        'start_date': start_date,
+                        'end_date': to_month_year(row.get('Finished On')) or 'Present',
+                        'location': row.get('Location'),
+                        'description': row.get('Description'),
+                        'achievements': [],
+                    })
+                elif name == 'education.csv' and len(education) < IMPORT_MAX_ENTRIES:
+                    education.append({
+                        'degree': row.get('Degree Name') or '',
+                        'field': row.get('Notes') or '',
+                        'institution': row.get('School Name') or '',
+                        'graduation_date': to_month_year(row.get('End Date')),
+                    })
+                elif name == 'skills.csv' and len(skills) < IMPORT_MAX_ENTRIES and row.get('Name'):
+                    skills.append(row['Name'])
+
+        websites = URL_RE.findall(profile.get('Websites') or '')
+        return {
+            'name': ' '.join(filter(None, (profile.get('First Name'), profile.get('Last Name')))),
+            'contact_info': {
+                'email': emails[0] if emails else '',
+                'phone': phone,
+                'linkedin': None,
+                'website': websites[0] if websites else None,
+            },
+            'summary': profile.get('Summary') or profile.get('Headline') or '',
+            # Positions are exported newest first
+            'experience': experience,
+            'education': education,
+            'skills': list(dict.fromkeys(skills)),
+        }
+
+    def import_archives(self, archive_paths, source, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Import many LinkedIn or GitHub archives, inserting the resumes in batches.
 
-    def extract_data_from_linkedin(self, data):
-        pass
+        :param archive_paths: Iterable of archive paths, consumed lazily
+        :param source: 'linkedin' or 'github'
+        :return: Number of resumes imported
+        """
+        extract = self.extract_data_from_linkedin if source == 'linkedin' else self.extract_data_from_github
+        return self.populate_resumes_from_json((extract(path) for path in archive_paths), batch_size)
 
+    def populate_resumes_from_json(self, resumes_data, batch_size=IMPORT_BATCH_SIZE):
+        """
+        Insert resumes from an iterable of resume data, ``batch_size`` resumes per batch.
+
+        Each batch costs the same handful of bulk inserts as a single resume and
+        commits with its render snapshots.
+
+        :return: Number of resumes inserted
+        """
+        count = 0
+        batch = []
+        for data in resumes_data:
+            batch.append(data)
+            if len(batch) == batch_size:
+                with defer_snapshot_refresh():
+                    count += len(self._populate_resumes(batch))
+                batch = []
+        if batch:
+            with defer_snapshot_refresh():
+                count += len(self._populate_resumes(batch))
+        return count
+
+    def get_or_create_skills(self, skill_names):
+        """
+        Map skill names to Skill rows with one lookup and one batched insert for new names.
+        """
+        skills = {}
+        for skill in Skill.objects.filter(name__in=set(skill_names)).order_by('created_at'):
+            skills.setdefault(skill.name, skill)
+        missing = list(dict.fromkeys(name for name in skill_names if name not in skills))
+        for skill in Skill.objects.bulk_create([Skill(name=name) for name in missing]):
+            skills[skill.name] = skill
+        return skills
 
     def populate_resume_from_json(self, data):
+        # Rows and the render snapshot commit together, the snapshot is built once at the end
+        with defer_snapshot_refresh():
+            return self._populate_resumes([data])[0]
+
+    def _populate_resumes(self, resumes_data):
         # Create PersonalInfo
-        personal_info = PersonalInfo.objects.create(
-            name=data['name'],
-            email=data['contact_info']['email'],
-            phone=data['contact_info']['phone'],
-            linkedin=data['contact_info']['linkedin'],
-            website=data['contact_info']['website']
-        )
+        personal_infos = PersonalInfo.objects.bulk_create([
+            PersonalInfo(
+                name=data['name'],
+                email=data['contact_info']['email'],
+                phone=data['contact_info']['phone'],
+                linkedin=data['contact_info']['linkedin'],
+                website=data['contact_info']['website']
+            )
+            for data in resumes_data
+        ])
 
         # Create Summary
-        summary = Summary.objects.create(
-            text=data['summary']
-        )
+        summaries = Summary.objects.bulk_create([
+            Summary(text=data['summary'])
+            for data in resumes_data
+        ])
 
-        # Create Resume
-        resume = Resume.objects.create(
-            personal_info=personal_info,
-            summary=summary
-        )
+        # Create Resume, bulk inserts send no post_save so the snapshots are queued here
+        resumes = Resume.objects.bulk_create([
+            Resume(personal_info=personal_info, summary=summary)
+            for personal_info, summary in zip(personal_infos, summaries)
+        ])
+        ResumeSnapshotHandler().refresh(resume.uuid for resume in resumes)
 
         # Create Experiences and Map to Resume
-        for position, exp in enumerate(data['experience'], start=1):
-            experience = Experience.objects.create(
-                title=exp['title'],
-                company=exp['company'],
-                start_date=datetime.strptime(exp['start_date'], '%b %Y').date(),
-                end_date=datetime.strptime(exp['end_date'], '%b %Y').date() if exp['end_date'] != 'Present' else None,
-                location=exp['location'],
-                description=exp['description'],
-                achievements=",".join(exp['achievements'])
-            )
-            ResumeExperience.objects.create(
-                resume=resume,
-                experience=experience,
-                position=position
-            )
+        experiences = []
+        experience_links = []
+        educations = []
+        education_links = []
+        for resume, data in zip(resumes, resumes_data):
+            for position, exp in enumerate(data['experience'], start=1):
+                experience = Experience(
+                    title=exp['title'],
+                    company=exp['company'],
+                    start_date=datetime.strptime(exp['start_date'], '%b %Y').date(),
+                    end_date=datetime.strptime(exp['end_date'], '%b %Y').date() if exp['end_date'] != 'Present' else None,
+                    location=exp.get('location'),
+                    description=exp.get('description'),
+                    achievements=",".join(exp['achievements'])
+                )
+                experiences.append(experience)
+                experience_links.append(ResumeExperience(resume=resume, experience=experience, position=position))
 
-        for position, edu in enumerate(data['education'], start=1):
-            education = Education.objects.create(
-                degree=edu['degree'],
-                field=edu['field'],
-                institution=edu['institution'],
-                graduation_date=datetime.strptime(edu['graduation_date'], '%b %Y').date()
-            )
-            ResumeEducation.objects.create(
-                resume=resume,
-                education=education,
-                position=position
-            )
-        # Create Skills and Map to Resume
-        for position, skill_name in enumerate(data['skills'], start=1):
-            skill, _ = Skill.objects.get_or_create(name=skill_name)
-            ResumeSkill.objects.create(
-                resume=resume,
-                skill=skill,
-                position=position
-            )
+            for position, edu in enumerate(data['education'], start=1):
+                graduation_date = edu.get('graduation_date')
+                education = Education(
+                    degree=edu['degree'],
+                    field=edu['field'],
+                    institution=edu['institution'],
+                    graduation_date=datetime.strptime(graduation_date, '%b %Y').date() if graduation_date else None
+                )
+                educations.append(education)
+                education_links.append(ResumeEducation(resume=resume, education=education, position=position))
+
+        Experience.objects.bulk_create(experiences)
+        ResumeExperience.objects.bulk_create(experience_links)
+        Education.objects.bulk_create(educations)
+        ResumeEducation.objects.bulk_create(education_links)
 
-        # Add Additional Info (if required, store as part of resume or another table)
-        if 'additional_info' in data:
-            print(f"Additional Info: {data['additional_info']}")  # Handle as needed
+        # Create Skills and Map to Resume
+        skills = self.get_or_create_skills([name for data in resumes_data for name in data['skills']])
+        ResumeSkill.objects.bulk_create([
+            ResumeSkill(resume=resume, skill=skills[skill_name], position=position)
+            for resume, data in zip(resumes, resumes_data)
+            for position, skill_name in enumerate(data['skills'], start=1)
+        ])
 
-        return resume
+        return resumes
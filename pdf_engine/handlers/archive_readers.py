@@ -0,0 +1,113 @@
+import codecs
+import csv
+import io
+import json
+import posixpath
+import tarfile
+import zipfile
+
+# Bytes read from an archive member at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+_JSON_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_array(file, chunk_size: int = READ_CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array one by one while reading the file in chunks.
+
+    Only the element being decoded and one chunk are held in memory, so arrays of
+    any length stream in constant memory.
+
+    :param file: Binary file object positioned at the array, UTF-8 encoded
+    :param chunk_size: Bytes read per call, doubled while a single element outgrows it
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+    read_size = chunk_size
+
+    while True:
+        separators = _JSON_WHITESPACE + ',' if started else _JSON_WHITESPACE
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+
+        if position < len(buffer):
+            char = buffer[position]
+            if not started:
+                if char != '[':
+                    raise ValueError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if char == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Incomplete element; once it spans a whole read, read bigger chunks
+                # so it is not decoded again for every chunk
+                if len(buffer) - position >= read_size:
+                    read_size *= 2
+            else:
+                # A value ending with the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    yield element
+                    position = end
+                    read_size = chunk_size
+                    continue
+        elif eof:
+            if started:
+                raise ValueError("Truncated JSON array")
+            return
+
+        chunk = file.read(read_size)
+        eof = not chunk
+        buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+        position = 0
+
+
+def iter_csv_rows(file):
+    """
+    Yield the rows of a CSV file as dicts, decoding the file as it is read.
+
+    :param file: Binary file object, UTF-8 with or without a byte order mark
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(text)
+
+
+def iter_archive_members(path, names):
+    """
+    Yield ``(name, file)`` for archive members whose file name is one of ``names``.
+
+    ZIP archives are read through their central directory. Tar archives, compressed
+    or not, are read as a stream in archive order, so nothing is extracted to disk
+    and only the current member is open.
+
+    :param path: Path of a ``.zip`` or tar archive
+    :param names: Predicate on the member's base name
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = posixpath.basename(info.filename)
+                if not info.is_dir() and names(name):
+                    with archive.open(info) as file:
+                        yield name, file
+        return
+
+    with tarfile.open(path, mode='r|*') as archive:
+        for member in archive:
+            name = posixpath.basename(member.name)
+            if member.isfile() and names(name):
+                file = archive.extractfile(member)
+                try:
+                    yield name, file
+                finally:
+                    file.close()
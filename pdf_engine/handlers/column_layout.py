@@ -0,0 +1,315 @@
+from itertools import combinations
+
+from reportlab.lib.units import inch
+from reportlab.platypus import FrameBreak, PageBreak
+from reportlab.platypus.doctemplate import ActionFlowable
+
+from pdf_engine.handlers.flowables import place_in_frame, stack_gaps, stack_height
+
+# Named column layouts, picked per render:
+#   columns: relative column widths, left to right
+#   sidebar: index of the column holding SIDEBAR_SECTIONS, None balances every section over the columns
+COLUMN_LAYOUTS = {
+    'two-column': {'columns': (1, 1), 'sidebar': None},
+    'three-column': {'columns': (1, 1, 1), 'sidebar': None},
+    'sidebar-left': {'columns': (1, 2), 'sidebar': 0},
+    'sidebar-right': {'columns': (2, 1), 'sidebar': 1},
+}
+# Layout used when column_layout is True
+DEFAULT_COLUMN_LAYOUT = 'two-column'
+# Name of the single-column layout in render keys and download counts
+SINGLE_COLUMN_LAYOUT = 'single'
+
+# Sections a sidebar layout places in its sidebar column
+SIDEBAR_SECTIONS = ('personal_info', 'education', 'skills')
+
+COLUMN_GUTTER = 0.5 * inch
+
+# Precision, in points, of the column height search on the last page
+BALANCE_TOLERANCE = 4
+
+
+def get_layout_name(column_layout) -> str:
+    """
+    Name of a column layout option: a layout name, True for the two-column layout, or falsy for a single column.
+    """
+    if not column_layout:
+        return SINGLE_COLUMN_LAYOUT
+    return DEFAULT_COLUMN_LAYOUT if column_layout is True else column_layout
+
+
+def get_column_widths(layout: str, width: float, gutter: float = COLUMN_GUTTER):
+    """
+    Frame widths of a column layout filling ``width``, gutters excluded.
+    """
+    ratios = COLUMN_LAYOUTS[layout]['columns']
+    usable = width - gutter * (len(ratios) - 1)
+    return [usable * ratio / sum(ratios) for ratio in ratios]
+
+
+class ColumnLayout:
+    """
+    Assigns the sections of a document to the frames of a column page template, before the build.
+
+    Every flowable is wrapped once at its column width. Those sizes drive a
+    simulation of the frames that places, spaces and splits flowables exactly as
+    the build will, so the arranged list with its FrameBreaks is built in one
+    pass without trial builds:
+
+    - Sections pinned to a column (the sidebar, or by ``add_section_to_column``)
+      flow down that column and onto its frame on the following pages.
+    - The other sections fill the remaining columns page by page. On the last
+      page they are balanced: whole sections are assigned to columns keeping the
+      tallest column as short as possible, and when sections do not divide into
+      columns that fit, the shortest column height the content flows into is used.
+    """
+
+    def __init__(self, layout: str, frames):
+        """
+        :param layout: Name of the column layout, see COLUMN_LAYOUTS
+        :param frames: Frames of one page, one per column, left to right
+        """
+        self.layout = layout
+        self.frames = frames
+        self.sidebar = COLUMN_LAYOUTS[layout]['sidebar']
+
+    def get_section_column(self, key: str = None, column: int = None):
+        """
+        Column a section is pinned to, or None when it is balanced with the others.
+        """
+        if column is not None:
+            return column
+        if self.sidebar is not None and key in SIDEBAR_SECTIONS:
+            return self.sidebar
+        return None
+
+    def get_section_frame(self, key: str = None, column: int = None):
+        """
+        Frame a section is laid out in.
+        """
+        pinned = self.get_section_column(key, column)
+        if pinned is None:
+            pinned = next(index for index in range(len(self.frames)) if index != self.sidebar)
+        return self.frames[pinned]
+
+    def get_section_width(self, key: str = None, column: int = None) -> float:
+        """
+        Width of the frame a section is laid out in.
+        """
+        return self.get_section_frame(key, column)._width
+
+    def arrange(self, elements, sections):
+        """
+        Arrange the elements over the columns, see the class docstring.
+
+        Page breaks and other actions end a block; each block is arranged on its own.
+
+        :param elements: Flowables in reading order
+        :param sections: ``(start_index, key, column)`` of each section, in order
+        :return: A new flowable list with the FrameBreaks placing it
+        """
+        starts = {start: (key, column) for start, key, column in sections}
+        arranged = []
+        block = []
+        current = (None, None)
+        for index, element in enumerate(elements):
+            if index in starts:
+                current = starts[index]
+                block.append((current, []))
+            if element is None:
+                continue
+            if isinstance(element, (ActionFlowable, PageBreak)):
+                arranged.extend(self._arrange_block(block))
+                arranged.append(element)
+                block = []
+                continue
+            if not block:
+                block.append((current, []))
+            block[-1][1].append(element)
+        arranged.extend(self._arrange_block(block))
+        return arranged
+
+    def _arrange_block(self, block):
+        pinned = {}
+        balanced = []
+        for (key, column), flowables in block:
+            if not flowables:
+                continue
+            column = self.get_section_column(key, column)
+            if column is None:
+                balanced.append(flowables)
+            else:
+                pinned.setdefault(column, []).extend(flowables)
+
+        # The chunk of each column placed on each page
+        pages = {column: self._fill_pages(flowables, column) for column, flowables in pinned.items()}
+        if balanced:
+            columns = [index for index in range(len(self.frames)) if index not in pinned]
+            if columns:
+                pages.update(zip(columns, self._balance(balanced, columns)))
+            else:
+                # Every column is pinned: the other sections follow the last one
+                last = len(self.frames) - 1
+                flowables = [flowable for chunk in pages[last] for flowable in chunk]
+                pages[last] = self._fill_pages(flowables + [flowable for section in balanced for flowable in section],
+                                               last)
+        if not pages:
+            return []
+
+        page_count = max(len(chunks) for chunks in pages.values())
+        arranged = []
+        for page in range(page_count):
+            for column in range(len(self.frames)):
+                chunks = pages.get(column, [])
+                if page < len(chunks):
+                    arranged.extend(chunks[page])
+                if page < page_count - 1 or any(page < len(pages.get(later, []))
+                                                for later in range(column + 1, len(self.frames))):
+                    arranged.append(FrameBreak)
+        return arranged
+
+    def _measure(self, flowables, column, sizes):
+        """
+        Sizes of flowables wrapped in a column, each wrapped only once.
+
+        :param sizes: Cache by id; it keeps the flowables too, so their ids are not reused
+        """
+        frame = self.frames[column]
+        for flowable in flowables:
+            if id(flowable) not in sizes:
+                sizes[id(flowable)] = flowable, flowable.wrap(frame._getAvailableWidth(), frame._aH)
+        return [sizes[id(flowable)][1] for flowable in flowables]
+
+    def _fill_column(self, flowables, column, sizes, height=None):
+        """
+        Place flowables in an empty frame of a column, see place_in_frame.
+
+        :param height: Frame height to place in instead of the column's
+        """
+        frame = self.frames[column]
+        return place_in_frame(flowables, self._measure(flowables, column, sizes), frame._getAvailableWidth(),
+                              frame._aH if height is None else height)
+
+    def _fill_pages(self, flowables, column):
+        """
+        Chunks of flowables flowing down one column from page to page.
+        """
+        sizes = {}
+        chunks = []
+        while flowables:
+            placed, flowables = self._fill_column(flowables, column, sizes)
+            if not placed:
+                # Too large for an empty frame; left to the build to report
+                placed, flowables = flowables, []
+            chunks.append(placed)
+        return chunks
+
+    def _balance(self, sections, columns):
+        """
+        Fill full pages, then balance what is left over the columns of the last page.
+
+        :param sections: Flowables of each section, in reading order
+        :param columns: Indexes of the columns the sections share
+        :return: Per column, the chunk placed on each page
+        """
+        sizes = {}
+        section_starts = {id(section[0]) for section in sections}
+        pages = [[] for _ in columns]
+        while True:
+            last_page = self._balance_sections(sections, columns, sizes)
+            if last_page is None:
+                last_page = self._balance_flow(sections, columns, sizes)
+            if last_page is not None:
+                break
+
+            # More than a page is left: fill this page and balance the rest
+            flowables = [flowable for section in sections for flowable in section]
+            last_page, rest = [], flowables
+            for column in columns:
+                placed, rest = self._fill_column(rest, column, sizes)
+                last_page.append(placed)
+            if len(rest) == len(flowables) and rest[0] is flowables[0]:
+                # Too large for an empty frame; left to the build to report
+                last_page[0] = rest
+                break
+            for chunks, chunk in zip(pages, last_page):
+                chunks.append(chunk)
+            sections = []
+            for flowable in rest:
+                if not sections or id(flowable) in section_starts:
+                    sections.append([])
+                sections[-1].append(flowable)
+
+        for chunks, chunk in zip(pages, last_page):
+            chunks.append(chunk)
+        return pages
+
+    def _balance_sections(self, sections, columns, sizes):
+        """
+        Assign whole sections to the columns, keeping the tallest column as short as possible.
+
+        :return: The flowables of each column, or None when no assignment fits the frames
+        """
+        frame_height = self.frames[columns[0]]._aH
+        count = len(sections)
+        flowables = [flowable for section in sections for flowable in section]
+        gaps = stack_gaps(flowables)
+        # Stacked height down to the end of each section, and the gap above each section
+        bottoms, tops = [], []
+        bottom = index = 0
+        for section, size in zip(sections, self._section_sizes(sections, columns[0], sizes)):
+            tops.append(gaps[index])
+            bottom += sum(gaps[index:index + len(section)]) + size
+            bottoms.append(bottom)
+            index += len(section)
+
+        best = None
+        for cuts in combinations(range(1, count), min(len(columns), count) - 1):
+            bounds = list(zip((0,) + cuts, cuts + (count,)))
+            tallest = max(bottoms[end - 1] - (bottoms[start - 1] + tops[start] if start else 0)
+                          for start, end in bounds)
+            if tallest <= frame_height and (best is None or tallest < best[0]):
+                best = tallest, bounds
+        if best is None:
+            return None
+
+        assigned = [[flowable for section in sections[start:end] for flowable in section] for start, end in best[1]]
+        assigned += [[] for _ in range(len(columns) - len(assigned))]
+        # Confirm against the frames; the sums leave out the frame's tolerance
+        for column, flowables in zip(columns, assigned):
+            if self._fill_column(flowables, column, sizes)[1]:
+                return None
+        return assigned
+
+    def _section_sizes(self, sections, column, sizes):
+        # Summed flowable heights of each section
+        return [sum(height for _, height in self._measure(section, column, sizes)) for section in sections]
+
+    def _balance_flow(self, sections, columns, sizes):
+        """
+        Find the shortest column height the content flows into, splitting sections between columns.
+
+        :return: The flowables of each column, or None when the content needs another page
+        """
+        flowables = [flowable for section in sections for flowable in section]
+
+        def flow(height=None):
+            chunks, rest = [], flowables
+            for column in columns:
+                placed, rest = self._fill_column(rest, column, sizes, height)
+                chunks.append(placed)
+            return None if rest else chunks
+
+        best = flow()
+        if best is None:
+            return None
+        low = stack_height(flowables, self._measure(flowables, columns[0], sizes)) / len(columns)
+        high = self.frames[columns[0]]._aH
+        while high - low > BALANCE_TOLERANCE:
+            middle = (low + high) / 2
+            chunks = flow(middle)
+            if chunks is None:
+                low = middle
+            else:
+                high, best = middle, chunks
+        return best
@@ -0,0 +1,582 @@
+import re
+from collections import Counter
+from functools import lru_cache, partial
+
+from reportlab import rl_config
+from reportlab.lib.colors import Color, toColor
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_RIGHT
+from reportlab.pdfbase.pdfmetrics import getAscentDescent, stringWidth
+from reportlab.platypus import Flowable, Paragraph, Spacer
+from reportlab.platypus.paragraph import (
+    _FUZZ,
+    _centerDrawParaLine,
+    _justifyDrawParaLine,
+    _leftDrawParaLine,
+    _processed_frags,
+    _rightDrawParaLine,
+    _shy,
+    paraFontSizeHeightOffset,
+    split,
+    strip,
+)
+
+from base.sanitizer import escape_markup, unescape_markup
+from pdf_engine.handlers.text_metrics import measure_words, wrap_words
+
+
+def use_form(canvas, name: str, painter):
+    """
+    Draw a shared form XObject, defining it on first use.
+
+    The form is stored once in the document and every later call only emits a
+    reference to it, so repeated decorations cost a few bytes per page.
+
+    :param canvas: Canvas being drawn on
+    :param name: Document-wide form name
+    :param painter: Callable receiving the canvas, used to draw the form once
+    """
+    if not canvas.hasForm(name):
+        canvas.beginForm(name)
+        painter(canvas)
+        canvas.endForm()
+    canvas.doForm(name)
+
+
+class OutlineEntry(Flowable):
+    """
+    Zero-size flowable that bookmarks the position it lands on and adds it to the PDF outline.
+    """
+    _ZEROSIZE = 1
+
+    def __init__(self, title: str, key: str, level: int = 0, closed: bool = None, listed: bool = True):
+        """
+        :param listed: Add the bookmark and outline entry; unlisted entries only mark a position for ContentsTable
+        """
+        super().__init__()
+        self.title = title
+        self.key = key
+        self.level = level
+        self.closed = closed
+        self.listed = listed
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        if not self.listed:
+            return
+        canvas = self.canv
+        canvas.bookmarkHorizontal(self.key, 0, 0)
+        canvas.addOutlineEntry(self.title, self.key, level=self.level, closed=self.closed)
+
+
+class ContentsTable(Flowable):
+    """
+    Table of contents of outline entries with their page numbers, laid out in the same build.
+
+    The rows are known before the build, so the table has its final size from the
+    first wrap. Page numbers are not: each one is a form the document template
+    draws once the build has placed the entry, see EngineDocTemplate.draw_deferred_form.
+    """
+
+    def __init__(self, entries: list, style, indent: float = 12):
+        """
+        :param entries: ``(title, key, level)`` of each OutlineEntry, in order; may still grow until the build
+        :param style: Paragraph style of the rows
+        :param indent: Left indent per outline level
+        """
+        super().__init__()
+        self.entries = entries
+        self.style = style
+        self.indent = indent
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        self.height = len(self.entries) * self.style.leading
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        rows = int((availHeight + _FUZZ) // self.style.leading)
+        if rows <= 0 or rows >= len(self.entries):
+            return []
+        return [ContentsTable(self.entries[:rows], self.style, self.indent),
+                ContentsTable(self.entries[rows:], self.style, self.indent)]
+
+    def draw(self):
+        canvas = self.canv
+        doc = canvas._doctemplate
+        style = self.style
+        canvas.setFont(style.fontName, style.fontSize)
+        canvas.setFillColor(style.textColor)
+        baseline = self.height - style.fontSize
+        for title, key, level in self.entries:
+            canvas.drawString(level * self.indent, baseline, title)
+            canvas.saveState()
+            canvas.translate(self.width, baseline)
+            doc.draw_deferred_form(canvas, f'contents_{key}', partial(_draw_page_reference, key, style))
+            canvas.restoreState()
+            baseline -= style.leading
+
+
+def _draw_page_reference(key, style, canvas, doc):
+    # Right-aligned page number of an outline entry, see ContentsTable
+    canvas.setFont(style.fontName, style.fontSize)
+    canvas.setFillColor(style.textColor)
+    canvas.drawRightString(0, 0, str(doc.outline_pages.get(key, '')))
+
+
+class SharedFlowable(Flowable):
+    """
+    Immutable flowable that any number of documents can lay out at the same time.
+
+    Frames attach their canvas and themselves to a flowable while placing it; those
+    attachments are dropped, so concurrent builds never see each other's canvas.
+    Subclasses set everything in ``__init__`` and draw in ``paint``.
+    """
+    # Attributes frames and doc templates set while laying a flowable out
+    _TRANSIENT = frozenset(('canv', '_frame', '_postponed'))
+    _frozen = False
+
+    def freeze(self):
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if name in self._TRANSIENT:
+            return
+        if self._frozen:
+            raise AttributeError(f"{type(self).__name__} is shared and cannot be changed")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if name not in self._TRANSIENT:
+            raise AttributeError(f"{type(self).__name__} is shared and cannot be changed")
+
+    def wrapOn(self, canv, aW, aH):
+        return self.wrap(aW, aH)
+
+    def _drawOn(self, canv):
+        self.paint(canv)
+
+    def paint(self, canvas):
+        raise NotImplementedError
+
+
+class HorizontalRule(SharedFlowable):
+    """
+    Horizontal line drawn with canvas primitives, with the space below it.
+
+    The space is part of the rule's height rather than a space-after, so it does not
+    overlap the space-before of the next flowable. A rule without a color only takes
+    up its space.
+    """
+
+    def __init__(self, width: float, thickness: float, color=None, space_after: float = 0):
+        super().__init__()
+        self.width = width
+        self.height = thickness + space_after
+        self.thickness = thickness
+        self.color = color
+        self.freeze()
+
+    def __repr__(self):
+        return f"HorizontalRule({self.width}x{self.thickness})"
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        # Like a line followed by a spacer: the line stays, the space moves on
+        space = self.height - self.thickness
+        if not space or not self.thickness or availHeight < self.thickness:
+            return []
+        color = self.color and self.color.rgba()
+        return [_horizontal_rule(self.width, self.thickness, color, 0), _horizontal_rule(self.width, 0, None, space)]
+
+    def paint(self, canvas):
+        if self.color is None:
+            return
+        # The line's axis sits on the bottom edge of its own band, as a Drawing places it
+        line_y = self.height - self.thickness
+        canvas.setStrokeColor(self.color)
+        canvas.setLineWidth(self.thickness)
+        canvas.line(0, line_y, self.width, line_y)
+
+
+class SectionHeader(SharedFlowable):
+    """
+    Single-line section title drawn with canvas primitives.
+
+    Placed and spaced like a one-line Paragraph in the same style. Titles are not
+    wrapped; check ``fits`` and lay out a title wider than its column as a
+    MeasuredParagraph instead.
+    """
+    _H_ALIGN = {TA_CENTER: 'CENTER', TA_RIGHT: 'RIGHT'}
+
+    def __init__(self, title: str, font_name: str, font_size: float, leading: float, text_color,
+                 alignment=0, left_indent: float = 0, right_indent: float = 0,
+                 space_before: float = 0, space_after: float = 0):
+        super().__init__()
+        self.title = title
+        self.font_name = font_name
+        self.font_size = font_size
+        self.text_color = text_color
+        self.left_indent = left_indent
+        self.baseline = leading - (font_size if paraFontSizeHeightOffset else getAscentDescent(font_name, font_size)[0])
+        self.width = left_indent + stringWidth(title, font_name, font_size) + right_indent
+        self.height = leading
+        self.hAlign = self._H_ALIGN.get(alignment, 'LEFT')
+        self.spaceBefore = space_before
+        self.spaceAfter = space_after
+        self.freeze()
+
+    def __repr__(self):
+        return f"SectionHeader({self.title!r})"
+
+    def fits(self, availWidth) -> bool:
+        return self.width <= availWidth + _FUZZ
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def paint(self, canvas):
+        canvas.setFillColor(self.text_color)
+        canvas.setFont(self.font_name, self.font_size)
+        canvas.drawString(self.left_indent, self.baseline, self.title)
+
+
+@lru_cache(maxsize=256)
+def _horizontal_rule(width, thickness, color, space_after):
+    return HorizontalRule(width, thickness, color and Color(*color), space_after)
+
+
+@lru_cache(maxsize=1024)
+def _section_header(title, font_name, font_size, leading, text_color, *layout):
+    return SectionHeader(title, font_name, font_size, leading, Color(*text_color), *layout)
+
+
+def get_horizontal_rule(width: float, thickness: float = 1, color='#000000', space_after: float = 0):
+    """
+    Shared rule for one set of dimensions and color; None as the color keeps only the space.
+    """
+    return _horizontal_rule(width, thickness, color and toColor(color).rgba(), space_after)
+
+
+def get_section_header(title: str, style):
+    """
+    Shared header for a title in the current state of a paragraph style
+    """
+    return _section_header(unescape_markup(title), style.fontName, style.fontSize, style.leading, toColor(style.textColor).rgba(),
+                           style.alignment, style.leftIndent, style.rightIndent, style.spaceBefore,
+                           style.spaceAfter)
+
+
+class MeasuredParagraph(Paragraph):
+    """
+    Paragraph that breaks single-style text using cached glyph-width measurements.
+
+    Text with inline markup, bullets, hyphenation or words wider than the line
+    goes through the regular ``Paragraph.breakLines``.
+    """
+
+    def wrap(self, availWidth, availHeight):
+        # The lines only depend on the width, and column layout wraps before the build does.
+        # Paragraph.split drops the lines when it refuses to split.
+        if availWidth == getattr(self, '_wrapped_width', None) and hasattr(self, 'blPara'):
+            return self.width, self.height
+        size = super().wrap(availWidth, availHeight)
+        if availWidth >= _FUZZ:
+            self._wrapped_width = availWidth
+        return size
+
+    def breakLines(self, width):
+        lines = self._break_measured_lines(width)
+        return lines if lines is not None else super().breakLines(width)
+
+    def _break_measured_lines(self, width):
+        style = self.style
+        frags = self.frags
+        if (len(frags) != 1 or self.bulletText or style.endDots or style.hyphenationLang
+                or style.uriWasteReduce or style.embeddedHyphenation or _processed_frags(frags)):
+            return None
+        frag = frags[0]
+        if not hasattr(frag, 'text') or hasattr(frag, 'cbDefn') or hasattr(frag, 'backColor') or _shy in frag.text:
+            return None
+
+        max_widths = list(width) if isinstance(width, (tuple, list)) else [width]
+        font_name, font_size = frag.fontName, frag.fontSize
+        ascent, descent = getAscentDescent(font_name, font_size)
+        words = split(strip(frag.text))
+        if not words:
+            return frag.clone(kind=0, lines=[], ascent=ascent, descent=descent, fontSize=font_size)
+
+        word_widths = measure_words(words, font_name, font_size)
+        if style.splitLongWords and max(word_widths) > min(max_widths):
+            return None
+        space_width = measure_words([' '], font_name, font_size)[0]
+        lines, widest = wrap_words(words, word_widths, space_width, max_widths, style.spaceShrinkage * space_width)
+
+        self.height = 0
+        self._width_max = widest
+        self._splitLongWordCount = self._hyphenations = 0
+        return frag.clone(kind=0, lines=lines, ascent=ascent, descent=descent, fontSize=font_size)
+
+
+# Markup the paragraph parser would interpret: any tag, or an entity other than the
+# escapes written by base.sanitizer.escape_markup
+_MARKUP_RE = re.compile(r'<|&(?!(?:amp|lt|gt|quot);)')
+
+_DRAW_LINE = {TA_CENTER: _centerDrawParaLine, TA_RIGHT: _rightDrawParaLine, TA_JUSTIFY: _justifyDrawParaLine}
+
+
+def is_plain_text(text: str, style) -> bool:
+    """
+    Whether a PlainText lays out and draws ``text`` exactly like a Paragraph would.
+
+    True for text without markup in a style without decorations, text transforms,
+    hyphenation or non-default wrapping.
+    """
+    return bool(
+        isinstance(text, str) and not _MARKUP_RE.search(text) and _shy not in text
+        and not (style.backColor or style.textTransform or style.endDots or style.hyphenationLang
+                 or style.embeddedHyphenation or style.uriWasteReduce or style.wordWrap
+                 or (style.borderWidth and style.borderColor)
+                 or getattr(style, 'autoLeading', '') not in ('', 'off'))
+    )
+
+
+class PlainText(Flowable):
+    """
+    Single-style text without markup, wrapped over cached word widths and drawn directly.
+
+    Lays out, splits and draws like a Paragraph in the same style, skipping the
+    markup parser and fragment objects. Only build it for text accepted by
+    ``is_plain_text``; text with a word wider than the line is handed to a
+    MeasuredParagraph, which splits long words.
+    """
+
+    def __init__(self, text: str, style, words=None, first_line_indent=None):
+        super().__init__()
+        self.text = text
+        self.style = style
+        self.words = words if words is not None else split(strip(unescape_markup(text)))
+        self.first_line_indent = style.firstLineIndent if first_line_indent is None else first_line_indent
+        self.lines = None
+        self.justify_last = False
+        self.height = 0
+        self._paragraph = None
+
+    def __repr__(self):
+        return f"PlainText({' '.join(self.words)[:40]!r})"
+
+    def wrap(self, availWidth, availHeight):
+        if self._paragraph is not None:
+            return self._paragraph.wrap(availWidth, availHeight)
+        if availWidth < _FUZZ:
+            return 0, 0x7fffffff
+        if self.lines is not None and availWidth == self.width:
+            return self.width, self.height
+
+        style = self.style
+        self.width = availWidth
+        later_width = availWidth - style.leftIndent - style.rightIndent
+        max_widths = [later_width - self.first_line_indent, later_width]
+        font_name, font_size = style.fontName, style.fontSize
+        if self.words:
+            word_widths = measure_words(self.words, font_name, font_size)
+            if style.splitLongWords and max(word_widths) > min(max_widths):
+                self._paragraph = self._get_fallback_paragraph()
+                return self._paragraph.wrap(availWidth, availHeight)
+            space_width = measure_words([' '], font_name, font_size)[0]
+            self.lines, _ = wrap_words(self.words, word_widths, space_width, max_widths,
+                                       style.spaceShrinkage * space_width)
+        else:
+            self.lines = []
+        self.height = len(self.lines) * style.leading
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        if self._paragraph is not None:
+            return self._paragraph.split(availWidth, availHeight)
+        if not self.words or availWidth < _FUZZ or availHeight < _FUZZ:
+            return []
+        if self.lines is None or availWidth != self.width:
+            self.wrap(availWidth, availHeight)
+            if self._paragraph is not None:
+                return self._paragraph.split(availWidth, availHeight)
+
+        style = self.style
+        fits = int(availHeight / float(style.leading))
+        if (not style.allowOrphans and fits <= 1) or fits == 0:
+            return []
+        count = len(self.lines)
+        if count <= fits:
+            return [self]
+        if not style.allowWidows and count == fits + 1:
+            if (style.allowOrphans and count == 3) or count > 3:
+                fits -= 1
+            else:
+                return []
+
+        head_words = [word for _, line in self.lines[:fits] for word in line]
+        tail_words = self.words[len(head_words):]
+        head = PlainText(escape_markup(' '.join(head_words)), style, words=head_words,
+                         first_line_indent=self.first_line_indent)
+        head.lines = self.lines[:fits]
+        head.width = availWidth
+        head.height = fits * style.leading
+        # Justified text stays justified up to the split, as in a split Paragraph
+        head.justify_last = True
+        tail = PlainText(escape_markup(' '.join(tail_words)), style, words=tail_words, first_line_indent=0)
+        return [head, tail]
+
+    def _get_fallback_paragraph(self):
+        """
+        Paragraph of this flowable's own words, which after a split are only part of the original text.
+        """
+        style = self.style
+        if self.first_line_indent != style.firstLineIndent:
+            style = style.clone(style.name, firstLineIndent=self.first_line_indent)
+        return MeasuredParagraph(escape_markup(' '.join(self.words)), style)
+
+    def draw(self):
+        if self._paragraph is not None:
+            self._paragraph.canv = self.canv
+            try:
+                return self._paragraph.draw()
+            finally:
+                del self._paragraph.canv
+        if not self.lines:
+            return
+
+        canvas = self.canv
+        style = self.style
+        font_name, font_size = style.fontName, style.fontSize
+        if paraFontSizeHeightOffset:
+            cur_y = self.height - font_size
+        else:
+            cur_y = self.height - getAscentDescent(font_name, font_size)[0]
+        draw_line = _DRAW_LINE.get(style.alignment, _leftDrawParaLine)
+
+        canvas.saveState()
+        canvas.setFillColor(style.textColor)
+        text_object = canvas.beginText(style.leftIndent, cur_y)
+        text_object.preformatted = False
+        text_object.direction = style.wordWrap
+        text_object.setFont(font_name, font_size, style.leading)
+        last_index = len(self.lines) - 1
+        offset = self.first_line_indent
+        for index, (extra_space, words) in enumerate(self.lines):
+            last_line = not self.justify_last and index == last_index
+            if last_line and style.justifyLastLine and len(words) > style.justifyLastLine:
+                last_line = False
+            draw_line(text_object, offset, extra_space, words, last_line)
+            offset = 0
+        canvas.drawText(text_object)
+        canvas.restoreState()
+
+
+def _fits(flowable, height, available):
+    # Frame.add accepts a flowable that overshoots the frame bottom by up to _FUZZ,
+    # and zero-size flowables even in a full frame
+    if available <= 0 and not getattr(flowable, '_ZEROSIZE', False):
+        return False
+    return height <= available + _FUZZ
+
+
+def stack_gaps(flowables):
+    """
+    Space a frame leaves above each of the flowables stacked in it, 0 for the first.
+    """
+    gaps = [0]
+    for previous, flowable in zip(flowables, flowables[1:]):
+        space_before = flowable.getSpaceBefore()
+        if rl_config.overlapAttachedSpace:
+            space_before = max(space_before - previous.getSpaceAfter(), 0)
+        gaps.append(previous.getSpaceAfter() + space_before)
+    return gaps
+
+
+def stack_height(flowables, sizes):
+    """
+    Height flowables take stacked from the top of a frame, spaced as Frame.add spaces them.
+
+    :param sizes: ``(width, height)`` of each flowable
+    """
+    return sum(stack_gaps(flowables)) + sum(height for _, height in sizes)
+
+
+def place_in_frame(flowables, sizes, width, height):
+    """
+    Place flowables top-down in an empty frame the way Frame.add does.
+
+    The flowable reaching the bottom is split; its head ends the placed list
+    and its tail starts the rest.
+
+    :param flowables: Flowables in reading order
+    :param sizes: ``(width, height)`` of each flowable, wrapped at ``width``
+    :param width: Available width of the frame
+    :param height: Available height of the frame
+    :return: The flowables that fit and the rest
+    """
+    remaining = height
+    for index, (flowable, (_, flowable_height)) in enumerate(zip(flowables, sizes)):
+        space_before = 0
+        if index:
+            space_before = flowable.getSpaceBefore()
+            if rl_config.overlapAttachedSpace:
+                space_before = max(space_before - flowables[index - 1].getSpaceAfter(), 0)
+        available = remaining - space_before
+        if _fits(flowable, flowable_height, available):
+            remaining = available - flowable_height - flowable.getSpaceAfter()
+            continue
+        parts = flowable.split(width, available) if available > 0 else []
+        return list(flowables[:index]) + parts[:1], parts[1:] + list(flowables[index + (1 if parts else 0):])
+    return list(flowables), []
+
+
+class MergedSpacer(Spacer):
+    """
+    Consecutive Spacers as one, splitting between them like the separate spacers would.
+    """
+
+    def __init__(self, width, heights):
+        super().__init__(width, sum(heights))
+        self.heights = heights
+
+    def split(self, availWidth, availHeight):
+        used = 0
+        for index, height in enumerate(self.heights):
+            if not _fits(self, used + height, availHeight):
+                break
+            used += height
+        else:
+            return [self]
+        if not index:
+            return []
+        rest = self.heights[index:]
+        return [Spacer(self.width, used), MergedSpacer(self.width, rest) if len(rest) > 1 else Spacer(self.width, rest[0])]
+
+
+def optimize_flowables(elements):
+    """
+    Tidy a flowable list before it is built, without changing the layout.
+
+    Drops ``None`` entries and merges consecutive Spacers into a MergedSpacer.
+
+    :param elements: Flowables as collected by PDFTemplateEngine
+    :return: The optimized list and a Counter of the flowables removed: ``none``
+             entries and ``spacers`` merged into the one before
+    """
+    removed = Counter()
+    flowables = []
+    for element in elements:
+        if element is None:
+            removed['none'] += 1
+        elif type(element) is Spacer and flowables and type(flowables[-1]) in (Spacer, MergedSpacer):
+            previous = flowables.pop()
+            heights = getattr(previous, 'heights', [previous.height])
+            flowables.append(MergedSpacer(max(previous.width, element.width), heights + [element.height]))
+            removed['spacers'] += 1
+        else:
+            flowables.append(element)
+    return flowables, removed
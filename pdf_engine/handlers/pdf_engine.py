@@ -1,5 +1,8 @@
 import io
 import json
+import math
+from collections import defaultdict
+from functools import partial
 from reportlab.lib.colors import HexColor
 from typing import List, Dict
 from reportlab.lib.pagesizes import letter, A4
@@ -16,48 +19,201 @@ from reportlab.platypus import (
     PageBreak,
     Frame,
     FrameBreak,
-    PageTemplate
+    PageTemplate,
+    NextPageTemplate
 )
-from reportlab.graphics.shapes import Drawing, Line
+from reportlab.platypus.doctemplate import ActionFlowable
 from PIL import Image as PILImage
 from reportlab.lib.units import inch
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 
+from reportlab.pdfbase.pdfmetrics import standardFonts
+
+from pdf_engine.handlers.column_layout import (
+    COLUMN_GUTTER,
+    COLUMN_LAYOUTS,
+    DEFAULT_COLUMN_LAYOUT,
+    ColumnLayout,
+    get_column_widths,
+)
+from pdf_engine.handlers.flowables import (
+    ContentsTable,
+    MeasuredParagraph,
+    OutlineEntry,
+    PlainText,
+    get_horizontal_rule,
+    get_section_header,
+    is_plain_text,
+    optimize_flowables,
+    use_form,
+)
+from pdf_engine.handlers.render_memory import track_render_memory
+from pdf_engine.handlers.text_metrics import measure_words, prime_word_widths
+
+# Named output settings, picked per render:
+#   page_compression: zlib-compress page content streams (0 or 1)
+#   image_dpi: resolution images are downsampled to at their placed size, None keeps the source
+#   image_quality: JPEG quality of downsampled images
+#   embed_fonts: keep registered TrueType fonts (embedded as subsets); otherwise use the
+#                matching standard PDF font, which viewers provide and nothing is embedded
+#   skip_decorations: decorations left out, 'rules' (horizontal and footer lines) and 'outline'
+RENDER_PROFILES = {
+    # Cheapest to produce: live previews
+    'draft': {
+        'page_compression': 0,
+        'image_dpi': 72,
+        'image_quality': 60,
+        'embed_fonts': False,
+        'skip_decorations': ('rules', 'outline'),
+    },
+    # Smallest file: downloads and email
+    'web': {
+        'page_compression': 1,
+        'image_dpi': 110,
+        'image_quality': 75,
+        'embed_fonts': False,
+        'skip_decorations': (),
+    },
+    # Full fidelity: print exports
+    'print': {
+        'page_compression': 1,
+        'image_dpi': None,
+        'image_quality': 95,
+        'embed_fonts': True,
+        'skip_decorations': (),
+    },
+}
+DEFAULT_RENDER_PROFILE = 'print'
+
+
+# Page label drawn by add_page_numbers; {page} is the page number, {total} the page count
+DEFAULT_PAGE_LABEL = 'Page {page} of {total}'
+
+
+class EngineDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate that keeps custom page templates on continuation pages and fills deferred forms.
+
+    SimpleDocTemplate switches to its 'Later' template after every page, which
+    would drop column and booklet templates once a section runs past one page.
+
+    Page totals and contents page numbers are only known once every page is laid
+    out, which normally takes multiBuild and a layout pass per iteration. Here
+    pages reference a form for each such value instead, and the forms are drawn
+    after the last page, before the canvas is saved, so one pass is enough.
+    """
+    # Label drawn at the bottom right of every page, see DEFAULT_PAGE_LABEL; None draws no page numbers
+    page_label = None
+
+    def beforeDocument(self):
+        # Painters of the forms referenced but not drawn yet, by form name
+        self.deferred_forms = {}
+        # Page number each OutlineEntry key landed on
+        self.outline_pages = {}
+
+    def handle_pageBegin(self):
+        self._handle_pageBegin()
+        if self.pageTemplate.id == 'First':
+            self._handle_nextPageTemplate('Later')
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, OutlineEntry):
+            self.outline_pages[flowable.key] = self.page
+
+    def afterPage(self):
+        if self.page_label:
+            canvas = self.canv
+            canvas.saveState()
+            canvas.translate(self.pagesize[0] - self.rightMargin, self.bottomMargin / 2)
+            self.draw_deferred_form(canvas, f'page_label_{self.page}', partial(_draw_page_label, self.page))
+            canvas.restoreState()
+
+    def draw_deferred_form(self, canvas, name: str, painter):
+        """
+        Reference a form at the current origin now and draw it once the build knows the page count.
+
+        :param canvas: Canvas being drawn on
+        :param name: Document-wide form name; a name already deferred keeps its first painter
+        :param painter: Callable receiving the canvas and this template, drawing the form
+                        around its origin; ``page`` is the page count by then
+        """
+        canvas.doForm(name)
+        self.deferred_forms.setdefault(name, painter)
+
+    def _endBuild(self):
+        # End the last page without saving, so the forms can still be added
+        save = getattr(self, '_doSave', 1)
+        self._doSave = 0
+        try:
+            super()._endBuild()
+        finally:
+            self._doSave = save
+
+        width, height = self.pagesize
+        for name, painter in self.deferred_forms.items():
+            self.canv.beginForm(name, -width, -height, width, height)
+            painter(self.canv, self)
+            self.canv.endForm()
+        self.deferred_forms = {}
+        if save:
+            self.canv.save()
+
+
+def _draw_page_label(page, canvas, doc):
+    # Right-aligned page label of one page, see EngineDocTemplate.page_label
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.gray)
+    canvas.drawRightString(0, 0, doc.page_label.format(page=page, total=doc.page))
+
 
 class PDFTemplateEngine:
     def __init__(self,
                  filename: str = 'output.pdf',
                  pagesize=letter,
                  margins: tuple = (0.5 *inch, 0.5 *inch, 0.5 *inch, 0.5 *inch),
-                 column_layout: bool = False):
+                 column_layout=False,
+                 profile: str = DEFAULT_RENDER_PROFILE):
         """
         Initialize PDF template engine with advanced configuration
 
         :param filename: Output PDF filename
         :param pagesize: PDF page size (default: letter)
         :param margins: Page margins (left, top, right, bottom)
+        :param column_layout: Name of a column layout, see COLUMN_LAYOUTS; True for the two-column layout
+        :param profile: Name of the render profile, see RENDER_PROFILES
         """
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile '{profile}'.")
+        if column_layout is True:
+            column_layout = DEFAULT_COLUMN_LAYOUT
+        if column_layout and column_layout not in COLUMN_LAYOUTS:
+            raise ValueError(f"Unknown column layout '{column_layout}'.")
         self.filename = filename
         self.pagesize = pagesize
         self.margins = margins
+        self.profile = profile
+        self.profile_settings = RENDER_PROFILES[profile]
 
         # Prepare document template
-        self.doc = SimpleDocTemplate(
+        self.doc = EngineDocTemplate(
             filename,
             pagesize=pagesize,
             leftMargin=margins[0],
             topMargin=margins[1],
             rightMargin=margins[2],
-            bottomMargin=margins[3]
+            bottomMargin=margins[3],
+            pageCompression=self.profile_settings['page_compression']
         )
         self.column_layout = column_layout
 
-        # Existing initialization code...
-
+        # Sections assigned to columns at build time, see start_section
+        self.layout = None
+        self.sections = []
         if column_layout:
             self._setup_two_column_template()
+            self.layout = ColumnLayout(column_layout, self._content_frames())
 
         # Styles
         self.styles = getSampleStyleSheet()
@@ -65,12 +221,36 @@ class PDFTemplateEngine:
 
         # Content elements to be added to PDF
         self.elements = []
+        self.flowable_report = None
+        # Peak and retained memory of generate, when RENDER_MEMORY_TRACKING is on
+        self.memory_report = None
+
+        # Titles of the booklet sections laid out in this document
+        self.booklet_sections = []
+
+        # (title, key, level) of every outline entry, listed by add_table_of_contents
+        self.contents_entries = []
+
+        # Factor applied to font sizes and vertical spacing, see scale_styles
+        self.scale = 1.0
 
         self._create_custom_styles()
 
     def _setup_two_column_template(self):
         """
-        Set up a two-column page layout
+        Set up the page template of the column layout
+        """
+        column_template = PageTemplate(
+            id='ColumnTemplate',
+            frames=self._content_frames()
+        )
+
+        # Replace default template with the column template
+        self.doc.pageTemplates = [column_template]
+
+    def _content_frames(self):
+        """
+        Create the content frames for one page of the configured layout
         """
         # Calculate column width and gutter
         page_width = self.pagesize[0]
@@ -79,39 +259,44 @@ class PDFTemplateEngine:
         # Define margins
         left_margin, top_margin, right_margin, bottom_margin = self.margins
 
-        # Calculate column dimensions
-        column_width = (page_width - left_margin - right_margin - 0.5 * inch) / 2
-        gutter_width = 0.5 * inch
-
-        # Create frames for two columns
-        left_frame = Frame(
-            left_margin,
-            bottom_margin,
-            column_width,
-            page_height - top_margin - bottom_margin,
-            id='left_column'
-        )
-
-        right_frame = Frame(
-            left_margin + column_width + gutter_width,
-            bottom_margin,
-            column_width,
-            page_height - top_margin - bottom_margin,
-            id='right_column'
-        )
-
-        # Create page template with two columns
-        two_column_template = PageTemplate(
-            id='TwoColumnTemplate',
-            frames=[left_frame, right_frame]
-        )
+        if not self.column_layout:
+            return [Frame(
+                left_margin,
+                bottom_margin,
+                page_width - left_margin - right_margin,
+                page_height - top_margin - bottom_margin,
+                id='normal'
+            )]
+
+        # One frame per column, separated by gutters
+        frames = []
+        x = left_margin
+        for index, column_width in enumerate(
+                get_column_widths(self.column_layout, page_width - left_margin - right_margin)):
+            frames.append(Frame(
+                x,
+                bottom_margin,
+                column_width,
+                page_height - top_margin - bottom_margin,
+                id=f'column_{index}'
+            ))
+            x += column_width + COLUMN_GUTTER
+        return frames
+
+    def start_section(self, key: str = None, column: int = None):
+        """
+        Start a section; with a column layout each section is assigned to a column at build time.
 
-        # Replace default template with two-column template
-        self.doc.pageTemplates = [two_column_template]
+        :param key: Section name; a sidebar layout puts SIDEBAR_SECTIONS in its sidebar
+        :param column: Column to pin the section to, otherwise the layout decides
+        """
+        self.sections.append((len(self.elements), key, column))
 
     def switch_column(self):
         """
-        Add a frame break to switch to the next column
+        Add a frame break to switch to the next column.
+
+        Elements placed with frame breaks are built as they are, without column balancing.
         """
         if self.column_layout:
             self.elements.append(FrameBreak())
@@ -121,17 +306,25 @@ class PDFTemplateEngine:
         Add a section to a specific column
 
         :param section_elements: List of elements to add
-        :param column: 0 for left, 1 for right column
+        :param column: Index of the column, 0 for the left one
         """
         if not self.column_layout:
             raise ValueError("Column layout is not enabled")
 
-        # Add section elements
+        self.start_section(column=column)
         self.elements.extend(section_elements)
 
-        # If not in the last column, add frame break
-        if column == 0:
-            self.switch_column()
+    def arrange_columns(self):
+        """
+        Assign the sections to the columns of the layout, see ColumnLayout.
+        """
+        self.elements = self._arranged_elements()
+        self.sections = []
+
+    def _arranged_elements(self):
+        if not self.layout or any(isinstance(element, type(FrameBreak)) for element in self.elements):
+            return self.elements
+        return self.layout.arrange(self.elements, self.sections)
 
     def _create_custom_styles(self):
         """
@@ -304,9 +497,21 @@ class PDFTemplateEngine:
         )
         self.custom_styles['link'] = link_style
 
-    def load_styles_from_config(self, json_style):
+        # Table of contents rows
+        contents_style = ParagraphStyle(
+            'ContentsStyle',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            leading=16
+        )
+        self.custom_styles['contents'] = contents_style
+
+    def load_styles_from_config(self, json_style, scale: float = 1.0):
         """
         Load styles from a JSON configuration file.
+
+        :param json_style: Style configuration
+        :param scale: Factor applied to font sizes and spacing once the styles are loaded
         """
         config = json_style
 
@@ -337,7 +542,83 @@ class PDFTemplateEngine:
         self.custom_styles['subtitle'].fontName = font_styles.get("subtitle", "Helvetica")
         self.custom_styles['subtitle'].fontSize = font_sizes.get("subtitle", 12)
 
-    from reportlab.platypus import PageBreak
+        if not self.profile_settings['embed_fonts']:
+            self._use_standard_fonts()
+
+        if scale != 1.0:
+            self.scale_styles(scale)
+
+    def scale_styles(self, scale: float):
+        """
+        Scale font sizes, leading and paragraph spacing of every style.
+
+        Spacing added through add_text and add_horizontal_line is scaled as well.
+
+        :param scale: Factor relative to the current styles
+        """
+        for style in [self.styles['Normal'], *self.custom_styles.values()]:
+            style.fontSize *= scale
+            style.leading *= scale
+            style.spaceBefore *= scale
+            style.spaceAfter *= scale
+        self.scale *= scale
+
+    def estimate_page_count(self) -> int:
+        """
+        Count the pages the current elements fill, without building the document.
+        """
+        return math.ceil(self.measure_page_fill())
+
+    def measure_page_fill(self) -> float:
+        """
+        Measure how many pages the current elements fill, as a fraction.
+
+        Flowables are wrapped and split against the content frames exactly like
+        during the build, but nothing is drawn or serialized.
+        """
+        frames = self._content_frames()
+        frames_per_page = len(frames)
+        height = frames[0]._aH
+        frame_count = 1
+        remaining, at_top = height, True
+
+        pending, _ = optimize_flowables(self._arranged_elements())
+        pending.reverse()
+        while pending:
+            flowable = pending.pop()
+            if isinstance(flowable, PageBreak) or getattr(flowable, 'action', None) == ('frameEnd',):
+                if isinstance(flowable, PageBreak):
+                    frame_count = math.ceil(frame_count / frames_per_page) * frames_per_page
+                frame_count += 1
+                remaining, at_top = height, True
+                continue
+            if getattr(flowable, '_ZEROSIZE', False) or isinstance(flowable, ActionFlowable):
+                continue
+
+            # Columns of a sidebar layout differ in width
+            width = frames[(frame_count - 1) % frames_per_page]._getAvailableWidth()
+            space_before = 0 if at_top else flowable.getSpaceBefore()
+            available = remaining - space_before
+            _, flowable_height = flowable.wrap(width, max(available, 0))
+            if flowable_height <= available:
+                remaining = available - flowable_height - flowable.getSpaceAfter()
+                at_top = False
+                continue
+
+            parts = flowable.split(width, available) if available > 0 else []
+            if len(parts) > 1:
+                pending.extend(reversed(parts))
+            elif at_top:
+                # Oversized flowables are placed on an empty frame rather than looping
+                remaining = available - flowable_height - flowable.getSpaceAfter()
+                at_top = False
+            else:
+                pending.append(flowable)
+                frame_count += 1
+                remaining, at_top = height, True
+
+        used = min(height - remaining, height) / height
+        return (frame_count - 1 + used) / frames_per_page
 
     def add_text(self,
                  text: str,
@@ -346,6 +627,9 @@ class PDFTemplateEngine:
         """
         Add formatted text paragraph with space management.
 
+        Text without markup is laid out as PlainText, which skips the paragraph
+        markup parser; anything else becomes a MeasuredParagraph.
+
         :param text: Text content
         :param style: Text style (built-in or custom)
         :param space_after: Space after text
@@ -355,12 +639,15 @@ class PDFTemplateEngine:
                 self.custom_styles.get(style) or
                 self.styles.get(style, self.styles['Normal'])
         )
-        para = Paragraph(text, text_style)
+        if is_plain_text(text, text_style):
+            para = PlainText(text, text_style)
+        else:
+            para = MeasuredParagraph(text, text_style)
         self.elements.append(para)
 
         # Add optional spacing
         if space_after:
-            spacer = Spacer(0, space_after)
+            spacer = Spacer(0, space_after * self.scale)
             self.elements.append(spacer)
 
     def add_image(self,
@@ -395,11 +682,45 @@ class PDFTemplateEngine:
             final_width, final_height = original_width, original_height
 
         # Create ReportLab image with alignment
-        img = Image(image_path, width=final_width, height=final_height)
+        source = self._downsample_image(img, final_width, final_height) or image_path
+        img = Image(source, width=final_width, height=final_height)
         img.hAlign = horizontal_alignment
 
         self.elements.append(img)
 
+    def _downsample_image(self, img, width: float, height: float):
+        """
+        Resample an image to the profile's resolution at its placed size
+
+        :param img: Opened PIL image
+        :param width: Placed width in points
+        :param height: Placed height in points
+        :return: JPEG or PNG file object, None when the source is already small enough
+        """
+        dpi = self.profile_settings['image_dpi']
+        if not dpi:
+            return None
+        target_size = (max(1, round(width / 72 * dpi)), max(1, round(height / 72 * dpi)))
+        if target_size[0] >= img.size[0] and target_size[1] >= img.size[1]:
+            return None
+
+        resized = img.resize(target_size, PILImage.LANCZOS)
+        output = io.BytesIO()
+        if resized.mode in ('RGBA', 'LA', 'P'):
+            # Keep transparency lossless
+            resized.save(output, format='PNG', optimize=True)
+        else:
+            resized.convert('RGB').save(output, format='JPEG', quality=self.profile_settings['image_quality'],
+                                        optimize=True)
+        output.seek(0)
+        return output
+
+    def skips_decoration(self, decoration: str) -> bool:
+        """
+        Whether the render profile leaves out a decoration ('rules' or 'outline')
+        """
+        return decoration in self.profile_settings['skip_decorations']
+
     def create_hyperlink(self, url: str, text: str = None):
         text = text or url
         return f'<link href="{url}">{text}</link>'
@@ -415,9 +736,6 @@ class PDFTemplateEngine:
         :param col_widths: Optional column widths
         :param style_config: Custom table styling
         """
-        # Create table
-        table = Table(data, colWidths=col_widths)
-
         # Default style if not provided
         default_style = [
             ('BACKGROUND', (0 ,0), (-1 ,0), colors.grey),
@@ -432,10 +750,155 @@ class PDFTemplateEngine:
 
         # Apply custom or default style
         table_style = TableStyle(style_config or default_style)
+        table = Table(data, colWidths=col_widths)
         table.setStyle(table_style)
 
+        if col_widths is None:
+            measured_widths = self._measure_column_widths(table, table_style)
+            if measured_widths:
+                table = Table(data, colWidths=measured_widths)
+                table.setStyle(table_style)
+
         self.elements.append(table)
 
+    def add_outline_entry(self, title: str, key: str = None, level: int = 0):
+        """
+        Bookmark the current position and list it in the PDF outline
+
+        :param title: Text shown in the viewer's outline
+        :param key: Unique bookmark name; derived from the outline size if omitted
+        :param level: Outline nesting level
+        """
+        key = key or f'outline_{len(self.elements)}'
+        self.contents_entries.append((title, key, level))
+        # Profiles without an outline still mark the position, so contents keep their page numbers
+        self.elements.append(OutlineEntry(title, key, level=level, listed=not self.skips_decoration('outline')))
+
+    def add_table_of_contents(self, title: str = 'Contents', style: str = 'contents'):
+        """
+        Add a table of contents listing every outline entry of the document with its page number.
+
+        Entries added after the table are listed too. The page numbers are drawn
+        as deferred forms, so the document is still laid out in a single pass.
+
+        :param title: Section title above the table
+        :param style: Custom style name of the rows
+        """
+        self.add_section_header(title)
+        self.elements.append(ContentsTable(self.contents_entries, self.custom_styles[style]))
+
+    def add_page_numbers(self, label: str = DEFAULT_PAGE_LABEL):
+        """
+        Draw a page label such as "Page 2 of 5" at the bottom right of every page, in the same single pass.
+
+        :param label: Format with ``{page}`` and ``{total}`` fields
+        """
+        self.doc.page_label = label
+
+    def add_booklet_section(self, title: str, on_page=None):
+        """
+        Start a booklet section on a fresh page with its own page template and outline entry.
+
+        All sections are laid out in one document build, so fonts, images and
+        forms are embedded once and shared by every section.
+
+        :param title: Section title, used for the outline and the page footer
+        :param on_page: Optional page callback; defaults to a footer naming the section
+        """
+        if not self.doc.page_label:
+            self.add_page_numbers()
+        template_id = f'booklet_{len(self.booklet_sections)}'
+        page_template = PageTemplate(
+            id=template_id,
+            frames=self._content_frames(),
+            onPage=on_page or partial(self._draw_booklet_footer, title)
+        )
+        if self.elements:
+            if not self.doc.pageTemplates:
+                # Pages ahead of the first section, such as contents, keep a plain template
+                self.doc.addPageTemplates([PageTemplate(id='FrontMatter', frames=self._content_frames())])
+            self.doc.addPageTemplates([page_template])
+            self.elements.append(NextPageTemplate(template_id))
+            self.add_page_break()
+        else:
+            # The first page starts on the first template
+            self.doc.pageTemplates.insert(0, page_template)
+
+        self.booklet_sections.append(title)
+        self.add_outline_entry(title, key=template_id)
+
+    def _draw_booklet_footer(self, title, canvas, doc):
+        """
+        Draw the booklet footer: a shared rule form plus the section title; the page label follows the page
+        """
+        left_margin, _, _, bottom_margin = self.margins
+        canvas.saveState()
+        if not self.skips_decoration('rules'):
+            use_form(canvas, 'booklet_footer_rule', partial(self._draw_footer_rule, bottom_margin))
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.gray)
+        canvas.drawString(left_margin, bottom_margin / 2, title)
+        canvas.restoreState()
+
+    def _draw_footer_rule(self, bottom_margin, canvas):
+        left_margin, _, right_margin, _ = self.margins
+        canvas.setStrokeColor(colors.lightgrey)
+        canvas.setLineWidth(0.5)
+        canvas.line(left_margin, bottom_margin * 0.75, self.pagesize[0] - right_margin, bottom_margin * 0.75)
+
+    def _measure_column_widths(self, table: Table, table_style: TableStyle):
+        """
+        Compute natural column widths of a plain-text table in one vectorized pass per font
+
+        :return: Column widths, or None when the table holds flowables or spans
+        """
+        if any(command[0] == 'SPAN' for command in table_style.getCommands()):
+            return None
+
+        cells = defaultdict(list)
+        for row_index, row in enumerate(table._cellvalues):
+            for col_index, value in enumerate(row):
+                if not isinstance(value, str):
+                    return None
+                cell_style = table._cellStyles[row_index][col_index]
+                cells[(cell_style.fontname, cell_style.fontsize)].append((col_index, value.split('\n'), cell_style))
+
+        column_widths = [0] * table._ncols
+        for (font_name, font_size), font_cells in cells.items():
+            lines = [line for _, cell_lines, _ in font_cells for line in cell_lines]
+            line_widths = iter(measure_words(lines, font_name, font_size))
+            for col_index, cell_lines, cell_style in font_cells:
+                width = max(next(line_widths) for _ in cell_lines)
+                width += cell_style.leftPadding + cell_style.rightPadding
+                column_widths[col_index] = max(column_widths[col_index], width)
+        return column_widths
+
+    def _prime_text_metrics(self):
+        """
+        Measure every word of the single-style paragraphs up front, one pass per font and size
+        """
+        texts = defaultdict(list)
+        for element in self.elements:
+            if isinstance(element, PlainText):
+                texts[(element.style.fontName, element.style.fontSize)].append(' '.join(element.words))
+            elif isinstance(element, MeasuredParagraph) and len(element.frags) == 1:
+                frag = element.frags[0]
+                if hasattr(frag, 'text'):
+                    texts[(frag.fontName, frag.fontSize)].append(frag.text)
+        prime_word_widths(texts)
+
+    def _use_standard_fonts(self):
+        """
+        Swap registered TrueType fonts in the styles for the matching standard PDF font
+        """
+        for style in [*self.styles.byName.values(), *self.custom_styles.values()]:
+            font_name = getattr(style, 'fontName', None)
+            if font_name and font_name not in standardFonts:
+                bold = 'bold' in font_name.lower()
+                italic = 'italic' in font_name.lower() or 'oblique' in font_name.lower()
+                style.fontName = ('Helvetica', 'Helvetica-Oblique', 'Helvetica-Bold',
+                                  'Helvetica-BoldOblique')[bold * 2 + italic]
+
     def add_page_break(self):
         """
         Add a page break to the document
@@ -452,38 +915,70 @@ class PDFTemplateEngine:
 
         :param line_color: Color of the horizontal line (hex or named color).
         :param line_thickness: Thickness of the horizontal line.
-        :param line_width: Width of the line; defaults to column width.
+        :param line_width: Width of the line; defaults to, and is capped at, the column width.
         :param space_after: Space after the horizontal line.
         """
-        if self.column_layout:
-            # For two-column layout, use column width
-            # Assumes symmetric column layout
-            page_width = self.pagesize[0]
-            left_margin, _, right_margin, _ = self.margins
-            column_width = (page_width - left_margin - right_margin - 0.5 * inch) / 2
-            line_width = line_width or column_width
-        else:
-            # For single column, use full document width
-            line_width = line_width or self.doc.width
+        # Width of the column the current section goes to; wider lines would run past it
+        column_width = self._get_section_frame()._width
+        line_width = min(line_width, column_width) if line_width else column_width
 
-        drawing = Drawing(line_width, line_thickness)
-        line = Line(0, 0, line_width, 0)  # Start at (0,0), end at (line_width,0)
-        line.strokeColor = HexColor(line_color)
-        line.strokeWidth = line_thickness
-        drawing.add(line)
-        self.elements.append(drawing)
+        space_after = (space_after or 0) * self.scale
+        if self.skips_decoration('rules'):
+            # Keep the space the line takes so pagination matches the other profiles
+            line_color = None
+        self.elements.append(get_horizontal_rule(line_width, line_thickness, line_color, space_after))
 
-        # Add optional spacing
-        if space_after:
-            self.elements.append(Spacer(line_width, space_after))
+    def add_section_header(self, title: str, style: str = 'section_header'):
+        """
+        Add a section title as a shared, single-line SectionHeader.
+
+        Titles with markup, in a style PlainText cannot draw, or wider than the column
+        of the current section become a MeasuredParagraph, which wraps them.
+
+        :param title: Section title
+        :param style: Custom style name
+        """
+        text_style = self.custom_styles[style]
+        if is_plain_text(title, text_style):
+            header = get_section_header(title, text_style)
+            if header.fits(self._get_section_frame()._getAvailableWidth()):
+                self.elements.append(header)
+                return
+        self.elements.append(MeasuredParagraph(title, text_style))
+
+    def _get_section_frame(self):
+        """
+        Frame the current section is laid out in; with a column layout, its column's frame.
+        """
+        if self.layout:
+            _, key, column = self.sections[-1] if self.sections else (0, None, None)
+            return self.layout.get_section_frame(key, column)
+        return self._content_frames()[0]
+
+    def optimize_elements(self):
+        """
+        Run optimize_flowables over the elements before the build; the layout does not change.
+
+        :return: Counter of the flowables removed, also kept as ``flowable_report``
+        """
+        self.elements, self.flowable_report = optimize_flowables(self.elements)
+        return self.flowable_report
 
-    def generate(self):
+    def generate(self, invariant: bool = False):
         """
         Generate the final PDF document
 
+        :param invariant: Produce byte-identical output for identical input, with a
+                          fixed creation date and a document ID derived from the content
         :return: Path to the generated PDF
         """
-        # Build PDF
-        self.doc.build(self.elements)
+        with track_render_memory() as self.memory_report:
+            self._prime_text_metrics()
+            self.arrange_columns()
+            self.optimize_elements()
+
+            # Build PDF
+            self.doc.invariant = invariant
+            self.doc.build(self.elements)
 
         return self.filename
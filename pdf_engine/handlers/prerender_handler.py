@@ -0,0 +1,234 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from base.choices import StateStatuses
+from pdf_engine.handlers.column_layout import SINGLE_COLUMN_LAYOUT, get_layout_name
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE
+from pdf_engine.handlers.render_store import RenderStore
+from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.models import Resume, ResumeRenderUsage
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+# Pre-render counters of this process, see get_prerender_stats
+_stats = {
+    'scheduled': 0,
+    'superseded': 0,
+    'rendered': 0,
+    'already_stored': 0,
+    'cancelled': 0,
+    'failed': 0,
+}
+
+
+def _count(**increments):
+    with _stats_lock:
+        for name, value in increments.items():
+            _stats[name] += value
+
+
+class PreRenderHandler:
+    """
+    Renders the variants of a resume most likely to be downloaded next, before the download is requested.
+
+    A variant is a template, column layout and render profile the resume has been
+    downloaded with. ``ResumePDFView`` counts downloads per variant and serves
+    whatever is already in the render store without rendering.
+    """
+
+    def record_download(self, resume, resume_template, two_column_layout=False, profile=DEFAULT_RENDER_PROFILE):
+        """
+        Count a download of a resume variant.
+        """
+        usage = ResumeRenderUsage.objects.filter(
+            resume_id=resume.uuid,
+            template=resume_template,
+            layout=get_layout_name(two_column_layout),
+            profile=profile
+        )
+        if usage.update(downloads=F('downloads') + 1, last_downloaded_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                ResumeRenderUsage.objects.create(
+                    resume_id=resume.uuid,
+                    template=resume_template,
+                    layout=get_layout_name(two_column_layout),
+                    profile=profile,
+                    downloads=1
+                )
+        except IntegrityError:
+            # Created by a concurrent first download
+            usage.update(downloads=F('downloads') + 1, last_downloaded_at=timezone.now())
+
+    def get_top_usages(self, resume_id, limit: int = None):
+        """
+        Most downloaded variants of a resume with an active template, most recent first among equals.
+
+        :param limit: Variants returned, ``settings.RENDER_PRERENDER_VARIANTS`` by default
+        """
+        limit = settings.RENDER_PRERENDER_VARIANTS if limit is None else limit
+        return list(
+            ResumeRenderUsage.objects
+            .filter(resume_id=resume_id, template__state=StateStatuses.ACTIVE)
+            .select_related('template')
+            .order_by('-downloads', '-last_downloaded_at')[:limit]
+        )
+
+    def prerender(self, resume_id, cancelled: threading.Event = None):
+        """
+        Render the most downloaded variants of a resume into the render store.
+
+        Renders go through ``render_to_store``, so a download of the same variant
+        arriving meanwhile waits for the pre-render instead of rendering again.
+
+        :param cancelled: Set when a newer change supersedes this pre-render; checked before each render
+        :return: Render keys stored
+        """
+        handler = ResumeTemplateHandler()
+        store = RenderStore()
+        try:
+            resume = handler.get_resume_for_render(resume_id)
+        except Resume.DoesNotExist:
+            return []
+
+        stored = []
+        for usage in self.get_top_usages(resume_id):
+            if cancelled is not None and cancelled.is_set():
+                break
+            layout = False if usage.layout == SINGLE_COLUMN_LAYOUT else usage.layout
+            key = store.get_key(resume, usage.template, layout, usage.profile)
+            if store.exists(key):
+                _count(already_stored=1)
+                continue
+            handler.render_to_store(resume, usage.template, layout, usage.profile, store)
+            stored.append(key)
+        _count(rendered=len(stored))
+        return stored
+
+
+class PreRenderScheduler:
+    """
+    Debounces pre-renders per resume in this worker process.
+
+    Every change of a resume pushes its pre-render back to ``RENDER_PRERENDER_DELAY``
+    seconds after the latest change, so a burst of edits renders once. A change
+    also cancels the resume's pre-render if one is already running; it stops
+    before its next render and stores nothing more. Renders run on a pool of
+    ``RENDER_PRERENDER_WORKERS`` threads, apart from bulk render jobs.
+
+    Pending pre-renders live in memory and are lost when the process stops; the
+    download then renders as before. A change committed by another worker is
+    pre-rendered there. The render key carries the snapshot version, so a render
+    superseded in another process is never served.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        # Resume id -> monotonic time its pre-render is due
+        self._due = {}
+        # Resume id -> cancel event of its scheduled or running pre-render
+        self._cancel_events = {}
+        self._thread = None
+        self._executor = None
+
+    def schedule_downloaded(self, resume_ids):
+        """
+        Schedule pre-renders of the resumes that have been downloaded; the others have no variants to prepare.
+        """
+        if not settings.RENDER_PRERENDER_ENABLED:
+            return
+        downloaded = set(ResumeRenderUsage.objects.filter(
+            resume_id__in=list(resume_ids)).values_list('resume_id', flat=True))
+        if downloaded:
+            self.schedule(downloaded)
+
+    def schedule(self, resume_ids, delay: float = None):
+        """
+        Pre-render the resumes ``delay`` seconds from now, superseding their earlier pre-renders.
+
+        :param delay: Debounce delay, ``settings.RENDER_PRERENDER_DELAY`` by default
+        """
+        delay = settings.RENDER_PRERENDER_DELAY if delay is None else delay
+        due = time.monotonic() + delay
+        with self._condition:
+            for resume_id in resume_ids:
+                previous = self._cancel_events.get(resume_id)
+                if previous is not None:
+                    previous.set()
+                    _count(superseded=1)
+                self._cancel_events[resume_id] = threading.Event()
+                self._due[resume_id] = due
+                _count(scheduled=1)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dispatch, name='prerender-scheduler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._due)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.RENDER_PRERENDER_WORKERS,
+                thread_name_prefix='prerender'
+            )
+        return self._executor
+
+    def _dispatch(self):
+        """
+        Hand pre-renders to the pool as they fall due, for the life of the process.
+        """
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                ready = [resume_id for resume_id, due in self._due.items() if due <= now]
+                if not ready:
+                    self._condition.wait(min(self._due.values()) - now if self._due else None)
+                    continue
+                for resume_id in ready:
+                    del self._due[resume_id]
+                ready = [(resume_id, self._cancel_events[resume_id]) for resume_id in ready]
+                executor = self._get_executor()
+            for resume_id, cancelled in ready:
+                executor.submit(self._prerender, resume_id, cancelled)
+
+    def _prerender(self, resume_id, cancelled):
+        try:
+            if not cancelled.is_set():
+                PreRenderHandler().prerender(resume_id, cancelled)
+            if cancelled.is_set():
+                _count(cancelled=1)
+        except Exception:
+            logger.exception("Pre-render of resume %s failed", resume_id)
+            _count(failed=1)
+        finally:
+            with self._condition:
+                if self._cancel_events.get(resume_id) is cancelled:
+                    del self._cancel_events[resume_id]
+            # Hand this thread's connection back to the pool
+            connections.close_all()
+
+
+prerender_scheduler = PreRenderScheduler()
+
+
+def get_prerender_stats():
+    """
+    Pre-render counters of this process and the pre-renders waiting for their delay.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['enabled'] = settings.RENDER_PRERENDER_ENABLED
+    stats['pending'] = prerender_scheduler.pending()
+    return stats
@@ -0,0 +1,122 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from base.choices import JobStatuses
+from pdf_engine.handlers.render_store import RenderStore
+from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.models import RenderJob
+
+logger = logging.getLogger(__name__)
+
+# Failures kept on a job for display, the counter keeps counting past it
+RENDER_JOB_MAX_FAILURES = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_render_executor():
+    """
+    Thread pool of this worker process running bulk render chunks, created on first use.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.RENDER_POOL_WORKERS,
+                    thread_name_prefix='render'
+                )
+    return _executor
+
+
+class RenderJobHandler:
+    """
+    Renders many resumes in the background through the normal render path.
+
+    The selection is split into chunks of ``settings.RENDER_JOB_CHUNK_SIZE`` that run
+    on the worker's render pool. Progress is written to the ``RenderJob`` row after
+    every chunk, so any worker can report it. Jobs run in the process that accepted
+    them; a job whose process stops is left unfinished.
+    """
+
+    def create_job(self, resume_ids, template_name=None, two_column_layout=False):
+        """
+        Record a render job and queue it once the surrounding transaction commits.
+
+        :param template_name: Active template to render with, the default template when empty
+        :raises ResumeTemplate.DoesNotExist: When there is no active template with that name
+        """
+        handler = ResumeTemplateHandler()
+        if template_name:
+            resume_template = handler.get_template(template_name)
+        else:
+            resume_template = handler.register_template('Default')
+        resume_ids = [str(resume_id) for resume_id in resume_ids]
+        job = RenderJob.objects.create(
+            template_name=resume_template.name,
+            two_column_layout=two_column_layout,
+            resume_ids=resume_ids,
+            total=len(resume_ids)
+        )
+        transaction.on_commit(lambda: self.submit(job, resume_template))
+        return job
+
+    def submit(self, job, resume_template):
+        executor = get_render_executor()
+        chunk_size = settings.RENDER_JOB_CHUNK_SIZE
+        for start in range(0, len(job.resume_ids), chunk_size):
+            executor.submit(self.render_chunk, job.uuid, job.resume_ids[start:start + chunk_size],
+                            resume_template, job.two_column_layout)
+
+    def render_chunk(self, job_id, resume_ids, resume_template, two_column_layout=False):
+        rendered = 0
+        failures = []
+        # Resumes of the chunk not rendered or reported yet, in order
+        pending = dict.fromkeys(resume_ids)
+        recorded = False
+        try:
+            RenderJob.objects.filter(uuid=job_id, status=JobStatuses.QUEUED).update(
+                status=JobStatuses.RUNNING, started_at=timezone.now())
+
+            handler = ResumeTemplateHandler()
+            store = RenderStore()
+            for resume in handler.get_resumes_for_export(resume_ids):
+                pending.pop(str(resume.uuid), None)
+                try:
+                    handler.render_to_store(resume, resume_template, two_column_layout, store=store)
+                    rendered += 1
+                except Exception as e:
+                    logger.exception("Render of resume %s failed", resume.uuid)
+                    failures.append({'resume': str(resume.uuid), 'error': str(e)})
+            failures.extend({'resume': resume_id, 'error': 'Resume not found or inactive'} for resume_id in pending)
+            pending.clear()
+            self.record_progress(job_id, rendered, failures)
+            recorded = True
+        except Exception as e:
+            logger.exception("Render job %s chunk failed", job_id)
+            if not recorded:
+                # Renders finished before the failure still count; only the rest of the chunk failed
+                self.record_progress(
+                    job_id, rendered, failures + [{'resume': resume_id, 'error': str(e)} for resume_id in pending])
+        finally:
+            # Hand this thread's connection back to the pool
+            connections.close_all()
+
+    def record_progress(self, job_id, rendered, failures):
+        with transaction.atomic():
+            job = RenderJob.objects.select_for_update().get(uuid=job_id)
+            job.rendered += rendered
+            job.failed += len(failures)
+            job.failures = (job.failures + failures)[:RENDER_JOB_MAX_FAILURES]
+            update_fields = ['rendered', 'failed', 'failures', 'updated_at']
+            if job.processed >= job.total:
+                job.status = JobStatuses.FINISHED
+                job.finished_at = timezone.now()
+                update_fields += ['status', 'finished_at']
+            job.save(update_fields=update_fields)
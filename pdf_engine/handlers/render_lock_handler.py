@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from base.single_flight import SingleFlight
+from pdf_engine.handlers.render_store import RenderStore
+from pdf_engine.models import RenderLock
+
+# Renders of this process in flight by render key; concurrent requests for a key share one render
+render_flight = SingleFlight()
+
+_stats_lock = threading.Lock()
+# Render lock counters of this process, see get_render_coalescing_stats
+_stats = {
+    'acquired': 0,
+    'waited': 0,
+    'stored_elsewhere': 0,
+    'taken_over': 0,
+    'timed_out': 0,
+}
+
+
+def _count(**increments):
+    with _stats_lock:
+        for name, value in increments.items():
+            _stats[name] += value
+
+
+class RenderLockHandler:
+    """
+    Render locks across worker processes, rows of ``RenderLock`` keyed by render key.
+
+    The worker that inserts the row renders; the others poll the render store until
+    the PDF appears there and serve it instead of rendering it again. A lock whose
+    holder died is taken over once it expires, and a waiter gives up waiting and
+    renders itself after ``RENDER_LOCK_TIMEOUT`` seconds, so a lost lock costs a
+    duplicate render, never a failed request. Every acquire also removes the
+    expired locks of other keys.
+    """
+
+    def __init__(self, store=None, timeout: float = None, poll_interval: float = None):
+        self.store = store or RenderStore()
+        self.timeout = settings.RENDER_LOCK_TIMEOUT if timeout is None else timeout
+        self.poll_interval = settings.RENDER_LOCK_POLL_INTERVAL if poll_interval is None else poll_interval
+
+    @contextmanager
+    def hold(self, key: str):
+        """
+        Hold the render lock of a key while rendering it.
+
+        Yields True when another worker stored the render while this one waited, so
+        there is nothing left to render, False when the caller should render it now.
+        Inside a transaction the lock row would stay invisible to other workers until
+        commit, so no lock is taken there.
+        """
+        if connection.in_atomic_block:
+            yield False
+            return
+
+        owner = self.acquire(key)
+        if owner is True:
+            yield True
+            return
+        try:
+            yield False
+        finally:
+            if owner:
+                self.release(key, owner)
+
+    def acquire(self, key: str):
+        """
+        Wait for the render lock of a key.
+
+        :return: Owner token of the lock, True if the render was stored meanwhile,
+                 None if the wait timed out and the caller renders without the lock
+        """
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        # Keys change with every snapshot version, so locks left by dead holders are
+        # rarely acquired again; sweep them here rather than let them accumulate
+        RenderLock.objects.filter(expires_at__lt=timezone.now()).delete()
+        while True:
+            try:
+                with transaction.atomic():
+                    RenderLock.objects.create(
+                        key=key, owner=owner, expires_at=timezone.now() + timedelta(seconds=self.timeout))
+                _count(acquired=1, waited=int(waited))
+                return owner
+            except IntegrityError:
+                pass
+            if self.store.exists(key):
+                _count(stored_elsewhere=1, waited=int(waited))
+                return True
+            if RenderLock.objects.filter(key=key, expires_at__lt=timezone.now()).delete()[0]:
+                # The holder died or hung past its lock; try again at once
+                _count(taken_over=1)
+                continue
+            if time.monotonic() >= deadline:
+                _count(timed_out=1, waited=int(waited))
+                return None
+            waited = True
+            time.sleep(self.poll_interval)
+
+    def release(self, key: str, owner: str):
+        RenderLock.objects.filter(key=key, owner=owner).delete()
+
+
+def get_render_coalescing_stats():
+    """
+    Render coalescing counters of this process: render flights led and joined, and render lock outcomes.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['flights'] = render_flight.stats['calls']
+    stats['shared'] = render_flight.stats['shared']
+    stats['in_flight'] = render_flight.in_flight()
+    return stats
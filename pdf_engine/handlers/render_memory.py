@@ -0,0 +1,89 @@
+import logging
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# Totals of the tracked renders of this process, see get_render_memory_stats
+_stats = {
+    'renders': 0,
+    'peak_kib_last': 0.0,
+    'peak_kib_max': 0.0,
+    'retained_kib_last': 0.0,
+}
+
+
+def get_rss_kib(pid=None) -> float:
+    """
+    Resident set size of a process in KiB.
+
+    :param pid: Process to read, this one by default; its peak RSS is returned where
+                the current size cannot be read, other processes then give None
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 1024
+    except OSError:
+        return None if pid else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def track_render_memory(enabled: bool = None):
+    """
+    Measure the Python memory a render allocates, with tracemalloc.
+
+    Yields a dict filled on exit with ``peak_kib``, the most memory the block
+    allocated at once, and ``retained_kib``, what is still allocated when it ends:
+    the output held in memory, objects the caller keeps, entries added to
+    module-level caches, ours or ReportLab's, and leaks.
+
+    The first tracked render starts tracing, which then runs for the life of the
+    process, so ``traced_kib`` in get_render_memory_stats grows with whatever
+    renders leave behind. Tracing slows every allocation down, so turn it on for
+    a canary worker. Peaks are process-wide: renders running at the same time in
+    other threads add to each other's.
+
+    :param enabled: Track this render; defaults to ``settings.RENDER_MEMORY_TRACKING``
+    """
+    if enabled is None:
+        enabled = getattr(settings, 'RENDER_MEMORY_TRACKING', False)
+    if not enabled:
+        yield None
+        return
+
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    usage = {}
+    try:
+        yield usage
+    finally:
+        with _lock:
+            current, peak = tracemalloc.get_traced_memory()
+            usage['peak_kib'] = (peak - before) / 1024
+            usage['retained_kib'] = (current - before) / 1024
+            _stats['renders'] += 1
+            _stats['peak_kib_last'] = usage['peak_kib']
+            _stats['peak_kib_max'] = max(_stats['peak_kib_max'], usage['peak_kib'])
+            _stats['retained_kib_last'] = usage['retained_kib']
+        logger.info("Render memory: peak %.0f KiB, retained %.0f KiB, traced %.0f KiB",
+                    usage['peak_kib'], usage['retained_kib'], current / 1024)
+
+
+def get_render_memory_stats():
+    """
+    Memory counters of the tracked renders of this process, the memory traced since tracking started, and RSS.
+    """
+    with _lock:
+        stats = dict(_stats)
+    stats['tracking'] = getattr(settings, 'RENDER_MEMORY_TRACKING', False)
+    stats['traced_kib'] = tracemalloc.get_traced_memory()[0] / 1024 if tracemalloc.is_tracing() else None
+    stats['rss_kib'] = get_rss_kib()
+    return stats
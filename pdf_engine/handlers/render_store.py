@@ -0,0 +1,67 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import reportlab
+from django.conf import settings
+
+from pdf_engine.handlers.column_layout import get_layout_name
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE
+
+# Version of the layout and drawing code, part of every render key. Bump it with any
+# change that alters rendered output, so stored PDFs and their ETags are replaced
+RENDER_VERSION = 3
+
+
+class RenderStore:
+    """
+    Rendered PDFs on disk under ``settings.RENDER_ROOT``, one file per render key.
+
+    A key changes whenever the rendered bytes could, so stored files never go
+    stale and are never rewritten in place.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.RENDER_ROOT)
+
+    def get_key(self, resume, resume_template, two_column_layout=False, profile=DEFAULT_RENDER_PROFILE):
+        """
+        Render key of a resume: the render code version, its snapshot version, the template revision,
+        the column layout and render profile.
+        """
+        template_revision = int(resume_template.updated_at.timestamp() * 1000000)
+        return (f"{resume.uuid}/r{RENDER_VERSION}-{resume_template.uuid}-{template_revision}"
+                f"-v{resume.snapshot_version}-{get_layout_name(two_column_layout)}-{profile}")
+
+    def get_etag(self, key: str) -> str:
+        """
+        Strong ETag of a render key.
+
+        Renders are invariant, so a key, which holds ``RENDER_VERSION``, and the ReportLab
+        version fix the exact bytes and the tag is known without rendering or reading the file.
+        """
+        digest = hashlib.sha256(f"{reportlab.Version}:{key}".encode()).hexdigest()
+        return f'"{digest[:40]}"'
+
+    def get_path(self, key: str) -> Path:
+        return self.root / f"{key}.pdf"
+
+    def exists(self, key: str) -> bool:
+        return self.get_path(key).is_file()
+
+    def save(self, key: str, data: bytes) -> Path:
+        """
+        Store the PDF bytes of a key, atomically so readers never see a partial file.
+        """
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return path
@@ -2,16 +2,16 @@ from typing import List, Dict
 
 from reportlab.lib import colors
 from reportlab.platypus import Spacer, Table, TableStyle
-from reportlab.platypus import Paragraph
 from reportlab.lib.units import inch
-from pdf_engine.handlers.pdf_engine import PDFTemplateEngine
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE, PDFTemplateEngine
 
 
 class ResumeGenerator:
-    def __init__(self, name, column_layout: bool = False):
+    def __init__(self, name, column_layout: bool = False, profile: str = DEFAULT_RENDER_PROFILE):
         self.resume = PDFTemplateEngine(
             name,
-            column_layout=column_layout
+            column_layout=column_layout,
+            profile=profile
         )
         self.column_layout = column_layout
 
@@ -33,19 +33,12 @@ class ResumeGenerator:
         if not self.column_layout:
             raise ValueError("Two-column layout is not enabled")
 
-        # Add left column content
-        for element in left_content:
-            self.resume.elements.append(element)
-
-        # Switch to right column
-        self.resume.switch_column()
-
-        # Add right column content if provided
+        self.resume.add_section_to_column(left_content, column=0)
         if right_content:
-            for element in right_content:
-                self.resume.elements.append(element)
+            self.resume.add_section_to_column(right_content, column=1)
 
     def add_personal_info(self, name: str, contact_info: Dict[str, str]):
+        self.resume.start_section('personal_info')
         self.resume.add_text(name, style='name', space_after=5.0)
         self.resume.add_horizontal_line()
         for key, value in contact_info.items():
@@ -72,8 +65,8 @@ class ResumeGenerator:
         """
         from reportlab.platypus import Spacer
 
-        self.resume.elements.append(
-            Paragraph("Professional Experience", self.resume.custom_styles['section_header']))
+        self.resume.start_section('experience')
+        self.resume.add_section_header("Professional Experience")
 
         for exp in experiences:
             # Job Title and Company
@@ -87,27 +80,27 @@ class ResumeGenerator:
             # Bullet Points or Description
             if show_bullet_points and 'achievements' in exp:
                 for achievement in exp['achievements']:
-                    self.resume.elements.append(self.resume.add_text(f"• {achievement}"))
+                    self.resume.add_text(f"• {achievement}")
             elif 'description' in exp:
-                self.resume.elements.append(self.resume.add_text(exp['description']))
+                self.resume.add_text(exp['description'])
         if add_line_after:
             self.resume.add_horizontal_line()
 
     def add_education(self, education_details: List[Dict], add_line_after: bool = True):
 
-        self.resume.elements.append(
-            Paragraph("Education", self.resume.custom_styles['section_header']))
+        self.resume.start_section('education')
+        self.resume.add_section_header("Education")
 
         # self.resume.add_text("Education", style='section_header', space_after=0.2 * inch)
 
         for edu in education_details:
             # Degree and Institution
             degree_text = f"{edu['degree']} in {edu['field']}"
-            self.resume.elements.append(self.resume.add_text(degree_text, style='subtitle'))
+            self.resume.add_text(degree_text, style='subtitle')
 
             # Institution and Graduation
             inst_text = f"{edu['institution']} | Graduated: {edu.get('graduation_date', 'Present')}"
-            self.resume.elements.append(self.resume.add_text(inst_text))
+            self.resume.add_text(inst_text)
 
         if add_line_after:
             self.resume.add_horizontal_line()
@@ -115,7 +108,8 @@ class ResumeGenerator:
     def add_skills(self, skills: List[str], columns: int = 3):
         from math import ceil
 
-        self.resume.elements.append(Paragraph("Skills", self.resume.custom_styles['section']))
+        self.resume.start_section('skills')
+        self.resume.add_section_header("Skills", style='section')
 
         # Calculate rows needed
         rows = ceil(len(skills) / columns)
@@ -137,24 +131,24 @@ class ResumeGenerator:
         self.resume.elements.append(skill_table)
 
     def add_skills_bullet(self, skills: List[str], add_line_after: bool = True):
-        self.resume.elements.append(
-            Paragraph("Skills", self.resume.custom_styles['section_header']))
+        self.resume.start_section('skills')
+        self.resume.add_section_header("Skills")
         for skill in skills:
-            self.resume.elements.append(self.add_text(f"• {skill}", space_after=0.1 * inch))
+            self.add_text(f"• {skill}", space_after=0.1 * inch)
 
         if add_line_after:
             self.resume.add_horizontal_line()
 
     def add_summary(self, summary_text: str, add_line_after: bool = True):
-        self.resume.elements.append(
-            Paragraph("Professional Summary", self.resume.custom_styles['section_header']))
+        self.resume.start_section('summary')
+        self.resume.add_section_header("Professional Summary")
         self.resume.add_text(summary_text)
         if add_line_after:
             self.resume.add_horizontal_line()
 
     def add_additional_info(self, additional_info: str, add_line_after: bool = True):
-        self.resume.elements.append(
-            Paragraph("Additional Information", self.resume.custom_styles['section_header']))
+        self.resume.start_section('additional_info')
+        self.resume.add_section_header("Additional Information")
         self.resume.add_text(additional_info)
 
         if add_line_after:
@@ -0,0 +1,182 @@
+import re
+
+from django.db import NotSupportedError, connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from base.choices import StateStatuses
+from base.sanitizer import unescape_markup
+from pdf_engine.models import Resume
+
+# Text search configuration of the PostgreSQL search vector
+SEARCH_CONFIG = 'english'
+# SQLite FTS5 table of the search documents, one row per resume
+SEARCH_TABLE = 'pdf_engine_resume_search'
+# Fields of a search document, most telling first, with their PostgreSQL weight and FTS5 bm25 weight
+SEARCH_FIELDS = {
+    'name': ('A', 10.0),
+    'headline': ('B', 4.0),
+    'summary': ('C', 2.0),
+    'body': ('D', 1.0),
+}
+# Most results one search returns
+MAX_SEARCH_RESULTS = 100
+
+SEARCH_TERM_RE = re.compile(r'\w+')
+
+
+class ResumeSearchHandler:
+    """
+    Full-text search over resumes, indexed from their render snapshots.
+
+    PostgreSQL keeps a weighted ``tsvector`` in ``pdf_engine_resume.search_vector``
+    under a GIN index; SQLite keeps the documents in the FTS5 table ``SEARCH_TABLE``.
+    Both are created by migration 0008 and rewritten with every snapshot refresh.
+    Other databases have no index and searches raise ``NotSupportedError``.
+    """
+
+    def __init__(self, using=None):
+        self.connection = using or connection
+
+    @property
+    def supported(self) -> bool:
+        return self.connection.vendor in ('postgresql', 'sqlite')
+
+    def get_document(self, resume_data):
+        """
+        Search document of a render snapshot: its text by field, unescaped.
+
+        :param resume_data: Render snapshot, in the shape of ResumeSnapshotHandler.resume_to_dict
+        """
+        contact_info = resume_data.get('contact_info') or {}
+        experience = resume_data.get('experience') or []
+        education = resume_data.get('education') or []
+        document = {
+            'name': [resume_data.get('name'), contact_info.get('email')],
+            'headline': [entry.get(field) for entry in experience for field in ('title', 'company')]
+                        + list(resume_data.get('skills') or []),
+            'summary': [resume_data.get('summary')],
+            'body': [entry.get(field) for entry in experience for field in ('description', 'location')]
+                    + [achievement for entry in experience for achievement in entry.get('achievements') or []]
+                    + [entry.get(field) for entry in education for field in ('degree', 'field', 'institution')],
+        }
+        return {field: unescape_markup(' '.join(value for value in values if value)) for field, values in document.items()}
+
+    def index(self, snapshots):
+        """
+        Write the search documents of resumes, replacing their previous ones.
+
+        :param snapshots: ``{resume_id: render snapshot}``
+        """
+        if not snapshots or not self.supported:
+            return
+        documents = [(resume_id, self.get_document(resume_data)) for resume_id, resume_data in snapshots.items()]
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                vector = ' || '.join(
+                    f"setweight(to_tsvector(%s::regconfig, %s), '{weight}')" for weight, _ in SEARCH_FIELDS.values())
+                cursor.executemany(
+                    f"UPDATE pdf_engine_resume SET search_vector = {vector} WHERE uuid = %s",
+                    [
+                        [value for field in SEARCH_FIELDS for value in (SEARCH_CONFIG, document[field])] + [resume_id]
+                        for resume_id, document in documents
+                    ]
+                )
+            else:
+                self._delete_documents(cursor, [resume_id for resume_id, _ in documents])
+                cursor.executemany(
+                    f"INSERT INTO {SEARCH_TABLE} (resume_id, {', '.join(SEARCH_FIELDS)}) "
+                    f"VALUES (%s{', %s' * len(SEARCH_FIELDS)})",
+                    [[self._get_db_id(resume_id)] + [document[field] for field in SEARCH_FIELDS]
+                     for resume_id, document in documents]
+                )
+
+    def remove(self, resume_ids):
+        """
+        Drop the search documents of deleted resumes. PostgreSQL's go with the row.
+        """
+        if resume_ids and self.connection.vendor == 'sqlite':
+            with self.connection.cursor() as cursor:
+                self._delete_documents(cursor, resume_ids)
+
+    def filter(self, queryset, query: str):
+        """
+        Resumes of the queryset matching a search, in the queryset's order.
+        """
+        condition = self._get_match_condition(query)
+        if condition is None:
+            return queryset.none()
+        return queryset.filter(condition)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Active resumes matching a search, best match first.
+
+        Words must all appear in a resume, in any field; a match in the name counts
+        most, then job titles, companies and skills, then the summary, then the rest.
+
+        :return: ``[(resume uuid, rank)]``, a higher rank is a better match
+        """
+        limit = min(limit, MAX_SEARCH_RESULTS)
+        if self.connection.vendor == 'postgresql':
+            sql = (
+                "SELECT uuid, ts_rank_cd(search_vector, search_query) AS search_rank "
+                "FROM pdf_engine_resume, websearch_to_tsquery(%s::regconfig, %s) search_query "
+                "WHERE search_vector @@ search_query AND state = %s "
+                "ORDER BY search_rank DESC, uuid LIMIT %s OFFSET %s"
+            )
+            params = [SEARCH_CONFIG, query, StateStatuses.ACTIVE, limit, offset]
+        elif self.connection.vendor == 'sqlite':
+            match = self._get_fts_query(query)
+            if match is None:
+                return []
+            weights = ', '.join(str(weight) for _, weight in SEARCH_FIELDS.values())
+            # bm25 is lower for better matches; the unindexed resume_id column takes no weight
+            sql = (
+                f"SELECT resume.uuid, -bm25({SEARCH_TABLE}, 0, {weights}) AS search_rank "
+                f"FROM {SEARCH_TABLE} JOIN pdf_engine_resume resume ON resume.uuid = {SEARCH_TABLE}.resume_id "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND resume.state = %s "
+                f"ORDER BY search_rank DESC, resume.uuid LIMIT %s OFFSET %s"
+            )
+            params = [match, StateStatuses.ACTIVE, limit, offset]
+        else:
+            raise NotSupportedError(f"Full-text search is not available on {self.connection.vendor}.")
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [(Resume._meta.pk.to_python(resume_id), rank) for resume_id, rank in cursor.fetchall()]
+
+    def _get_match_condition(self, query):
+        """
+        Condition on the resume uuid, as a subquery so it holds wherever the resume table is aliased.
+        """
+        if self.connection.vendor == 'postgresql':
+            return Q(uuid__in=RawSQL(
+                "SELECT uuid FROM pdf_engine_resume WHERE search_vector @@ websearch_to_tsquery(%s::regconfig, %s)",
+                (SEARCH_CONFIG, query)
+            ))
+        if self.connection.vendor == 'sqlite':
+            match = self._get_fts_query(query)
+            if match is None:
+                return None
+            return Q(uuid__in=RawSQL(f"SELECT resume_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", (match,)))
+        raise NotSupportedError(f"Full-text search is not available on {self.connection.vendor}.")
+
+    def _get_fts_query(self, query):
+        """
+        FTS5 query requiring every word of a search, with the FTS5 operators in it read literally.
+        """
+        terms = SEARCH_TERM_RE.findall(query)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def _delete_documents(self, cursor, resume_ids):
+        db_ids = [self._get_db_id(resume_id) for resume_id in resume_ids]
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE resume_id IN ({', '.join(['%s'] * len(db_ids))})", db_ids)
+
+    def _get_db_id(self, resume_id):
+        """
+        Resume uuid as the database stores it, a 32-character hex string on SQLite.
+        """
+        return Resume._meta.pk.get_db_prep_value(resume_id, self.connection)
@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from base.sanitizer import escape_markup_values
+from pdf_engine.handlers.resume_search_handler import ResumeSearchHandler
+from pdf_engine.models import (
+    Resume,
+    ResumeExperience,
+    ResumeEducation,
+    ResumeSkill
+)
+
+# Resume ids collected while snapshot refreshes are deferred, None when refreshing immediately
+_deferred_resume_ids = ContextVar('deferred_resume_ids', default=None)
+
+# Sent with ``resume_ids`` once rebuilt snapshots are committed
+snapshots_refreshed = Signal()
+
+
+@contextmanager
+def defer_snapshot_refresh():
+    """
+    Collect snapshot refreshes inside the block and rebuild each resume once on exit.
+
+    The block runs in a transaction, so the rows and their snapshots still
+    commit together. Used by bulk ingest, which touches many rows per resume.
+    """
+    if _deferred_resume_ids.get() is not None:
+        # Already deferred by an outer block
+        yield
+        return
+
+    resume_ids = set()
+    token = _deferred_resume_ids.set(resume_ids)
+    try:
+        with transaction.atomic():
+            yield
+            _deferred_resume_ids.reset(token)
+            token = None
+            ResumeSnapshotHandler().refresh(resume_ids)
+    finally:
+        if token is not None:
+            _deferred_resume_ids.reset(token)
+
+
+class ResumeSnapshotHandler:
+
+    def resume_to_dict(self, resume):
+        """
+        Render-ready data of a resume, with all text escaped for the ReportLab paragraph parser.
+        """
+        experiences = resume.resumeexperience_set.select_related('experience').order_by('position')
+        education = resume.resumeeducation_set.select_related('education').order_by('position')
+        skills = resume.resumeskill_set.select_related('skill').order_by('position')
+
+        # Build the dictionary
+        resume_data = {
+            'name': resume.personal_info.name,
+            'contact_info': {
+                'email': resume.personal_info.email,
+                'phone': resume.personal_info.phone,
+                'linkedin': resume.personal_info.linkedin,
+                'website': resume.personal_info.website,
+            },
+            'summary': resume.summary.text,
+            'experience': [
+                {
+                    'title': exp.experience.title,
+                    'company': exp.experience.company,
+                    'start_date': exp.experience.start_date.strftime('%b %Y'),
+                    'end_date': exp.experience.end_date.strftime('%b %Y') if exp.experience.end_date else 'Present',
+                    'location': exp.experience.location,
+                    'description': exp.experience.description,
+                    'achievements': exp.experience.get_achievements_list(),
+                }
+                for exp in experiences
+            ],
+            'education': [
+                {
+                    'degree': edu.education.degree,
+                    'field': edu.education.field,
+                    'institution': edu.education.institution,
+                    'graduation_date': edu.education.graduation_date.strftime(
+                        '%Y') if edu.education.graduation_date else 'Present',
+                }
+                for edu in education
+            ],
+            'skills': [skill.skill.name for skill in skills],
+            'additional_info': "Available for remote opportunities and willing to relocate. "
+                               "Passionate about mentoring and open-source contributions."
+                               "Available for remote opportunities and willing to relocate. "
+                               "Passionate about mentoring and open-source contributions.",
+
+        }
+
+        return escape_markup_values(resume_data)
+
+    def refresh(self, resume_ids):
+        """
+        Rebuild the render snapshot and search document of the given resumes and bump their snapshot version.
+
+        Runs in the caller's transaction (or its own), locking each resume row so
+        concurrent writers rebuild one after the other. ``snapshots_refreshed`` is
+        sent once the transaction commits.
+        """
+        resume_ids = set(resume_ids)
+        deferred = _deferred_resume_ids.get()
+        if deferred is not None:
+            deferred.update(resume_ids)
+            return
+        if not resume_ids:
+            return
+
+        with transaction.atomic():
+            resumes = (
+                Resume.objects
+                .select_for_update(of=('self',))
+                .select_related('personal_info', 'summary')
+                .filter(uuid__in=resume_ids)
+                .order_by('uuid')
+            )
+            snapshots = {}
+            for resume in resumes:
+                snapshots[resume.uuid] = self.resume_to_dict(resume)
+                Resume.objects.filter(uuid=resume.uuid).update(
+                    render_snapshot=snapshots[resume.uuid],
+                    snapshot_version=F('snapshot_version') + 1
+                )
+            ResumeSearchHandler().index(snapshots)
+            transaction.on_commit(lambda: snapshots_refreshed.send(sender=self.__class__, resume_ids=resume_ids))
+
+    def get_render_data(self, resume):
+        """
+        Render-ready data of a resume, building the snapshot first if it was never stored.
+        """
+        if resume.render_snapshot is None:
+            self.refresh([resume.uuid])
+            resume.refresh_from_db(fields=['render_snapshot', 'snapshot_version'])
+        return resume.render_snapshot
+
+    def refresh_for_personal_info(self, personal_info_id):
+        self.refresh(Resume.objects.filter(personal_info_id=personal_info_id).values_list('uuid', flat=True))
+
+    def refresh_for_summary(self, summary_id):
+        self.refresh(Resume.objects.filter(summary_id=summary_id).values_list('uuid', flat=True))
+
+    def refresh_for_experience(self, experience_id):
+        self.refresh(ResumeExperience.objects.filter(
+            experience_id=experience_id).values_list('resume_id', flat=True))
+
+    def refresh_for_education(self, education_id):
+        self.refresh(ResumeEducation.objects.filter(
+            education_id=education_id).values_list('resume_id', flat=True))
+
+    def refresh_for_skill(self, skill_id):
+        self.refresh(ResumeSkill.objects.filter(skill_id=skill_id).values_list('resume_id', flat=True))
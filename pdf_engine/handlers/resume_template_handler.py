@@ -1,51 +1,154 @@
+import io
+import logging
+import math
+
+from django.utils.text import slugify
+
+from base.choices import StateStatuses
+from base.sanitizer import unescape_markup
 from pdf_engine.handlers.resume_generator import ResumeGenerator
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE
+from pdf_engine.handlers.render_lock_handler import RenderLockHandler, render_flight
+from pdf_engine.handlers.render_store import RenderStore
+from pdf_engine.handlers.resume_snapshot_handler import ResumeSnapshotHandler
+from pdf_engine.handlers.template_registry import template_registry
 from pdf_engine.models import Resume, ResumeTemplate
 
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 200
+
+# Smallest font and spacing scale fit mode may shrink a resume to
+FIT_MIN_SCALE = 0.6
+# Layout probes after the unscaled one
+FIT_SEARCH_STEPS = 4
+# Stop probing once a fitting layout fills the target pages to within this fraction
+FIT_FILL_TOLERANCE = 0.02
+
 
 class ResumeTemplateHandler:
 
     def register_template(self, name: str):
-        default_template, _ = ResumeTemplate.objects.get_or_create(
-            name=name,
-            defaults={
-                'style_json': {
-                    "Elegant Gold Theme": {
-                        "title_color": "#FFD700",
-                        "section_color": "#DAA520",
-                        "font_sizes": {
-                            "title": 24,
-                            "section_header": 18,
-                            "normal": 12,
-                            "subtitle": 14
-                        },
-                        "font_styles": {
-                            "title": "Times-Bold",
-                            "section_header": "Times-BoldItalic",
-                            "normal": "Times-Roman",
-                            "subtitle": "Times-Italic"
-                        }
-                    }
-                }
-
-            }
-        )
-        return default_template
+        """
+        Template with the given name, served from the in-process template registry.
+        """
+        return template_registry.get_or_create(name)
 
-    def apply_template(self, template: str, filename: str, json_style: str, two_column_layout=False, **kwargs):
+    def get_template(self, name: str):
+        """
+        Active template with the given name, unlike register_template never created.
+
+        :raises ResumeTemplate.DoesNotExist: When there is no such template
+        """
+        template = template_registry.get(name)
+        if template is None:
+            raise ResumeTemplate.DoesNotExist(f"No active template named {name!r}.")
+        return template
+
+    def apply_template(self, template: str, filename: str, json_style: str, two_column_layout=False,
+                       fit_pages: int = None, profile: str = DEFAULT_RENDER_PROFILE, invariant=False, **kwargs):
         """
         Applies a registered template to generate a resume.
+
+        With ``fit_pages`` the largest font and spacing scale that keeps the resume
+        within that many pages is searched first, then the document is built once.
+        ``two_column_layout`` names a column layout, see ``COLUMN_LAYOUTS``, or is
+        True for the two-column one. ``profile`` names the render profile, see
+        ``RENDER_PROFILES``. With ``invariant`` identical input gives byte-identical output.
         """
         if not template:
             raise ValueError(f"Template is not registered.")
-        resume = ResumeGenerator(filename, column_layout=two_column_layout)
-        self.modern_template(resume, json_style, **kwargs)
-        resume.generate()
-        print(f"Resume generated successfully as '{filename}'")
+        scale = self.find_fit_scale(
+            json_style, fit_pages, two_column_layout, profile=profile, **kwargs) if fit_pages else 1.0
+        resume = ResumeGenerator(filename, column_layout=two_column_layout, profile=profile)
+        self.modern_template(resume, json_style, scale=scale, **kwargs)
+        resume.generate(invariant=invariant)
+        if isinstance(filename, str):
+            logger.info("Resume generated successfully as '%s'", filename)
+
+    def apply_booklet(self, template, filename, json_style, resumes_data, two_column_layout=False,
+                      profile: str = DEFAULT_RENDER_PROFILE, contents: bool = False):
+        """
+        Lays out many resumes in a single document build with one outline entry per resume.
 
-    def modern_template(self, resume: ResumeGenerator, json_style: str, **kwargs):
-        resume.load_styles_from_config(json_style)
+        Pages are labelled "Page X of Y" and ``contents`` adds a table of contents
+        up front; both are filled in after the layout, which still takes one pass.
+        """
+        if not template:
+            raise ValueError(f"Template is not registered.")
+        booklet = ResumeGenerator(filename, column_layout=two_column_layout, profile=profile)
+        booklet.load_styles_from_config(json_style)
+        if contents:
+            booklet.add_table_of_contents()
+        for resume_data in resumes_data:
+            # Outline titles and footers are plain text, not paragraph markup
+            booklet.add_booklet_section(unescape_markup(resume_data.get('name', 'John Doe')))
+            self._add_common_sections(booklet, **resume_data)
+        booklet.generate()
+        if isinstance(filename, str):
+            logger.info("Booklet generated successfully as '%s'", filename)
+
+    def modern_template(self, resume: ResumeGenerator, json_style: str, scale: float = 1.0, **kwargs):
+        resume.load_styles_from_config(json_style, scale)
         self._add_common_sections(resume, **kwargs)
 
+    def find_fit_scale(self, json_style, fit_pages: int, two_column_layout=False,
+                       profile: str = DEFAULT_RENDER_PROFILE, **kwargs):
+        """
+        Search the largest style scale whose layout fits in ``fit_pages`` pages.
+
+        Each probe builds a new ResumeGenerator, styles it at the candidate scale,
+        adds every section and lays the whole document out with
+        ``measure_page_fill``, which wraps and splits the flowables without drawing
+        them. Word widths come from the shared measurement cache. The first
+        candidate assumes content height grows with the square of the scale, later
+        ones interpolate between the last two probes, so the search settles in two
+        or three probes.
+
+        :return: The scale, ``FIT_MIN_SCALE`` with a warning logged when even that
+                 does not fit
+        """
+        # Page fill of every probed scale
+        fills = {}
+
+        def page_fill(scale):
+            probe = ResumeGenerator(io.BytesIO(), column_layout=two_column_layout, profile=profile)
+            self.modern_template(probe, json_style, scale=scale, **kwargs)
+            fills[scale] = probe.measure_page_fill()
+            return fills[scale]
+
+        target = fit_pages * 0.995
+        previous = (1.0, page_fill(1.0))
+        if previous[1] <= fit_pages:
+            return 1.0
+
+        low, high = FIT_MIN_SCALE, 1.0
+        candidate = math.sqrt(target / previous[1])
+        for _ in range(FIT_SEARCH_STEPS):
+            if candidate <= low:
+                candidate = low
+            elif candidate >= high:
+                candidate = (low + high) / 2
+            fill = page_fill(candidate)
+            if fill <= fit_pages:
+                low = candidate
+                if fill >= fit_pages * (1 - FIT_FILL_TOLERANCE):
+                    break
+            else:
+                high = candidate
+                if candidate == low:
+                    # Even the smallest scale overflows
+                    break
+            (scale, previous_fill), previous = previous, (candidate, fill)
+            slope = (fill - previous_fill) / (candidate - scale)
+            candidate = candidate + (target - fill) / slope if slope > 0 else (low + high) / 2
+
+        fill = fills[low] if low in fills else page_fill(low)
+        if fill > fit_pages:
+            logger.warning("Resume fills %.2f pages at the minimum scale %s, more than the %s requested",
+                           fill, FIT_MIN_SCALE, fit_pages)
+        return low
+
     def _add_common_sections(self, resume: ResumeGenerator, **kwargs):
         """
         Adds common sections to the resume (shared across templates).
@@ -71,62 +174,127 @@ class ResumeTemplateHandler:
             resume.add_additional_info(kwargs['additional_info'])
 
     def resume_to_dict(self, resume):
-        experiences = resume.resumeexperience_set.select_related('experience').order_by('position')
-        education = resume.resumeeducation_set.select_related('education').order_by('position')
-        skills = resume.resumeskill_set.select_related('skill').order_by('position')
-
-        # Build the dictionary
-        resume_data = {
-            'name': resume.personal_info.name,
-            'contact_info': {
-                'email': resume.personal_info.email,
-                'phone': resume.personal_info.phone,
-                'linkedin': resume.personal_info.linkedin,
-                'website': resume.personal_info.website,
-            },
-            'summary': resume.summary.text,
-            'experience': [
-                {
-                    'title': exp.experience.title,
-                    'company': exp.experience.company,
-                    'start_date': exp.experience.start_date.strftime('%b %Y'),
-                    'end_date': exp.experience.end_date.strftime('%b %Y') if exp.experience.end_date else 'Present',
-                    'location': exp.experience.location,
-                    'description': exp.experience.description,
-                    'achievements': exp.experience.get_achievements_list(),
-                }
-                for exp in experiences
-            ],
-            'education': [
-                {
-                    'degree': edu.education.degree,
-                    'field': edu.education.field,
-                    'institution': edu.education.institution,
-                    'graduation_date': edu.education.graduation_date.strftime(
-                        '%Y') if edu.education.graduation_date else 'Present',
-                }
-                for edu in education
-            ],
-            'skills': [skill.skill.name for skill in skills],
-            'additional_info': "Available for remote opportunities and willing to relocate. "
-                               "Passionate about mentoring and open-source contributions."
-                               "Available for remote opportunities and willing to relocate. "
-                               "Passionate about mentoring and open-source contributions.",
+        return ResumeSnapshotHandler().resume_to_dict(resume)
 
-        }
+    def get_render_data(self, resume):
+        """
+        Render-ready data of a resume, read from its stored snapshot.
+        """
+        return ResumeSnapshotHandler().get_render_data(resume)
 
-        return resume_data
+    def render_resume(self, resume, resume_template, two_column_layout=False, fit_pages=None,
+                      profile=DEFAULT_RENDER_PROFILE):
+        """
+        Render a resume in memory and return the PDF bytes.
+
+        Output is invariant: the same snapshot, template and options give the same bytes.
+        """
+        output = io.BytesIO()
+        self.apply_template(
+            resume_template,
+            output,
+            resume_template.style_json,
+            two_column_layout,
+            fit_pages=fit_pages,
+            profile=profile,
+            invariant=True,
+            **self.get_render_data(resume)
+        )
+        return output.getvalue()
+
+    def get_resume_for_render(self, resume_id):
+        """
+        Active resume with only the fields rendering reads, its snapshot built if it never was.
+        """
+        resume = Resume.objects.filter(state=StateStatuses.ACTIVE).only(
+            'uuid', 'render_snapshot', 'snapshot_version').get(uuid=resume_id)
+        self.get_render_data(resume)
+        return resume
+
+    def render_to_store(self, resume, resume_template, two_column_layout=False, profile=DEFAULT_RENDER_PROFILE,
+                        store=None):
+        """
+        Render a resume into the render store unless that exact render is already there.
+
+        Concurrent calls for the same render key run one render between them: in this
+        process they wait on the call already rendering it, across worker processes on
+        the render lock of the key, see RenderLockHandler.
+
+        :return: Render key of the stored PDF
+        """
+        store = store or RenderStore()
+        key = store.get_key(resume, resume_template, two_column_layout, profile)
+        if not store.exists(key):
+            render_flight.do(
+                str(store.get_path(key)),
+                lambda: self._render_to_store_once(resume, resume_template, two_column_layout, profile, store, key)
+            )
+        return key
+
+    def _render_to_store_once(self, resume, resume_template, two_column_layout, profile, store, key):
+        # Stored by a flight that ended between the caller's check and this one starting
+        if store.exists(key):
+            return
+        with RenderLockHandler(store).hold(key) as stored_elsewhere:
+            if stored_elsewhere or store.exists(key):
+                return
+            store.save(key, self.render_resume(resume, resume_template, two_column_layout, profile=profile))
+
+    def get_resumes_for_export(self, resume_ids=None):
+        """
+        Iterate active resumes in database-sized chunks instead of loading the whole table.
+        """
+        resumes = Resume.objects.filter(state=StateStatuses.ACTIVE).only('uuid', 'render_snapshot', 'snapshot_version')
+        if resume_ids:
+            resumes = resumes.filter(uuid__in=resume_ids)
+        return resumes.order_by('created_at').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def iter_rendered_resumes(self, resumes, resume_template, two_column_layout=False,
+                              profile=DEFAULT_RENDER_PROFILE):
+        """
+        Lazily render resumes one at a time, yielding ``(filename, pdf_bytes)``.
+
+        Only one rendered document is held in memory at any point, so callers can
+        stream the results without the cost growing with the number of resumes.
+
+        :param resume_template: Template to render with, looked up before iterating since errors
+                                raised mid-stream can no longer reach the client
+        """
+        for resume in resumes:
+            pdf_bytes = self.render_resume(resume, resume_template, two_column_layout, profile=profile)
+            filename = f"{slugify(unescape_markup(resume.render_snapshot['name'])) or 'resume'}_{resume.uuid}.pdf"
+            yield filename, pdf_bytes
+
+    def create_booklet(self, resume_ids, template_name, filename="resume_booklet.pdf", two_column_layout=False,
+                       profile=DEFAULT_RENDER_PROFILE, contents=False):
+        resumes = self.get_resumes_for_export(resume_ids)
+        resume_template = self.get_template(template_name)
+        self.apply_booklet(
+            resume_template,
+            filename,
+            resume_template.style_json,
+            (self.get_render_data(resume) for resume in resumes),
+            two_column_layout,
+            profile=profile,
+            contents=contents
+        )
+        return {
+            "message": "Booklet generated successfully."
+        }
 
-    def create_resume(self, resume_id, template_name, two_column_layout=False):
-        resume = Resume.objects.get(uuid=resume_id)
-        resume_data = self.resume_to_dict(resume)
+    def create_resume(self, resume_id, template_name, two_column_layout=False, fit_pages=None,
+                      profile=DEFAULT_RENDER_PROFILE):
+        resume = Resume.objects.only('uuid', 'render_snapshot', 'snapshot_version').get(uuid=resume_id)
+        resume_data = self.get_render_data(resume)
         pdf_generator = ResumeTemplateHandler()
         resume_template = pdf_generator.register_template(template_name)
         pdf_generator.apply_template(
             resume_template,
-            f"{resume.personal_info.name}_resume.pdf",
+            f"{slugify(unescape_markup(resume_data['name'])) or 'resume'}_resume.pdf",
             resume_template.style_json,
             two_column_layout,
+            fit_pages=fit_pages,
+            profile=profile,
             **resume_data
         )
         return {
@@ -0,0 +1,75 @@
+import random
+
+WORDS = (
+    "built operated scaled migrated designed shipped automated reduced improved led mentored "
+    "service platform pipeline cluster database cache queue latency throughput reliability "
+    "customers payments search billing reporting analytics onboarding checkout inventory "
+    "python django postgres redis kafka kubernetes terraform react typescript aws gcp "
+    "team across regions with zero downtime by forty percent for millions of daily requests"
+).split()
+
+TITLES = ('Software Engineer', 'Senior Engineer', 'Staff Engineer', 'Engineering Manager', 'Data Engineer')
+COMPANIES = ('Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def _sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def build_synthetic_resume(rng: random.Random, experiences: int = 4, education: int = 2, skills: int = 15):
+    """
+    Resume data in the shape of ResumeSnapshotHandler.resume_to_dict, filled with generated text.
+
+    :param rng: Random generator, seed it for repeatable data
+    """
+    name = f"{rng.choice(('Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan'))} {rng.choice(('Lee', 'Patel', 'Garcia', 'Kim'))}"
+    return {
+        'name': name,
+        'contact_info': {
+            'email': f"{name.replace(' ', '.').lower()}@example.com",
+            'phone': f"555-{rng.randint(1000, 9999)}",
+            'linkedin': f"https://www.linkedin.com/in/{name.replace(' ', '').lower()}",
+            'website': f"https://{name.replace(' ', '').lower()}.dev",
+        },
+        'summary': ' '.join(_sentence(rng, 10, 20) for _ in range(3)),
+        'experience': [
+            {
+                'title': rng.choice(TITLES),
+                'company': rng.choice(COMPANIES),
+                'start_date': f"{rng.choice(MONTHS)} {2010 + index}",
+                'end_date': 'Present' if index == 0 else f"{rng.choice(MONTHS)} {2011 + index}",
+                'location': 'Remote',
+                'description': _sentence(rng, 15, 30),
+                'achievements': [_sentence(rng, 6, 14) for _ in range(rng.randint(2, 4))],
+            }
+            for index in range(experiences)
+        ],
+        'education': [
+            {
+                'degree': 'BSc',
+                'field': 'Computer Science',
+                'institution': f"University of {rng.choice(('Oxford', 'Toronto', 'Melbourne', 'Delhi'))}",
+                'graduation_date': str(2005 + index),
+            }
+            for index in range(education)
+        ],
+        'skills': rng.sample(WORDS, k=min(skills, len(WORDS))),
+        'additional_info': _sentence(rng, 20, 40),
+    }
+
+
+def to_import_data(resume_data: dict) -> dict:
+    """
+    Synthetic resume data in the shape ResumeDataHandler.populate_resumes_from_json reads.
+
+    Imports date graduations by month, renders only show the year.
+    """
+    return {
+        **resume_data,
+        'education': [
+            {**education, 'graduation_date': f"Jun {education['graduation_date']}"}
+            for education in resume_data['education']
+        ],
+    }
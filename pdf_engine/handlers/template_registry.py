@@ -0,0 +1,110 @@
+import threading
+import time
+
+from django.db.models import Count, Max
+
+from base.choices import StateStatuses
+from pdf_engine.models import ResumeTemplate
+
+# Seconds between checks of the shared version stamp, bounds how long other workers serve stale templates
+TEMPLATE_STAMP_CHECK_INTERVAL = 5
+
+# Style stored for a template the first time an unknown name is requested
+DEFAULT_TEMPLATE_STYLE = {
+    "Elegant Gold Theme": {
+        "title_color": "#FFD700",
+        "section_color": "#DAA520",
+        "font_sizes": {
+            "title": 24,
+            "section_header": 18,
+            "normal": 12,
+            "subtitle": 14
+        },
+        "font_styles": {
+            "title": "Times-Bold",
+            "section_header": "Times-BoldItalic",
+            "normal": "Times-Roman",
+            "subtitle": "Times-Italic"
+        }
+    }
+}
+
+
+class TemplateRegistry:
+    """
+    In-process cache of the active resume templates, keyed by name.
+
+    All templates are loaded with one query and lookups are served from memory.
+    Saves and deletes in this process drop the cache through signals. Other
+    processes notice the change through a version stamp, the row count and latest
+    ``updated_at`` of the table, compared at most every
+    ``TEMPLATE_STAMP_CHECK_INTERVAL`` seconds.
+
+    Cached templates are shared between threads and must be treated as read-only.
+    """
+
+    def __init__(self, check_interval: float = TEMPLATE_STAMP_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._templates = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_stamp(self):
+        """
+        Version stamp of the template table, changes with every save or delete.
+        """
+        stamp = ResumeTemplate.objects.aggregate(count=Count('uuid'), updated_at=Max('updated_at'))
+        return stamp['count'], stamp['updated_at']
+
+    def load(self):
+        """
+        Read every active template into memory, replacing what was cached.
+        """
+        with self._lock:
+            stamp = self.get_stamp()
+            templates = {}
+            for template in ResumeTemplate.objects.filter(state=StateStatuses.ACTIVE).order_by('created_at'):
+                # Oldest template wins when names repeat
+                templates.setdefault(template.name, template)
+            self._templates = templates
+            self._stamp = stamp
+            self._checked_at = time.monotonic()
+        return templates
+
+    def invalidate(self):
+        """
+        Drop the cached templates, the next lookup reloads them.
+        """
+        self._templates = None
+
+    def _get_templates(self):
+        templates = self._templates
+        if templates is None:
+            return self.load()
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self.get_stamp() != self._stamp:
+                return self.load()
+        return templates
+
+    def get(self, name: str):
+        """
+        Active template with the given name, None when there is none.
+        """
+        return self._get_templates().get(name)
+
+    def get_or_create(self, name: str):
+        """
+        Template with the given name, stored with the default style on first use.
+        """
+        template = self.get(name)
+        if template is None:
+            template, _ = ResumeTemplate.objects.get_or_create(
+                name=name,
+                defaults={'style_json': DEFAULT_TEMPLATE_STYLE}
+            )
+        return template
+
+
+template_registry = TemplateRegistry()
@@ -0,0 +1,162 @@
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from reportlab.pdfbase.pdfmetrics import getFont, stringWidth
+
+# Upper bound on cached word widths before the cache is recycled
+WORD_WIDTH_CACHE_SIZE = 200000
+
+# TrueType tables cover the Basic Multilingual Plane; anything above uses the default width
+TTF_TABLE_SIZE = 0x10000
+
+_tables: Dict[str, 'GlyphWidthTable'] = {}
+_tables_lock = threading.Lock()
+_word_widths: Dict[Tuple[str, str, float], float] = {}
+# Serialises writes and recycling of the word cache; reads go without it
+_word_widths_lock = threading.Lock()
+
+
+class GlyphWidthTable:
+    """
+    Glyph advance widths of one font, in 1/1000 em, indexed by unicode code point.
+
+    Built once per font and shared by every size: a word's width at a given size is
+    the sum of its glyph widths times ``size / 1000``, exactly as ``stringWidth``
+    computes it. Code points the font cannot encode are NaN so callers can fall back
+    to ReportLab, which draws those glyphs from substitution fonts.
+    """
+
+    def __init__(self, font_name: str):
+        self.font_name = font_name
+        font = getFont(font_name)
+        face = getattr(font, 'face', None)
+        if face is not None and hasattr(face, 'charWidths'):
+            self.default_width = face.defaultWidth
+            widths = np.full(TTF_TABLE_SIZE, face.defaultWidth, dtype=np.float64)
+            for code_point, width in face.charWidths.items():
+                if code_point < TTF_TABLE_SIZE:
+                    widths[code_point] = width
+        else:
+            self.default_width = np.nan
+            decoded = [bytes([code]).decode(font.encName, errors='ignore') for code in range(256)]
+            size = max(ord(char) for char in decoded if char) + 1
+            widths = np.full(size, np.nan, dtype=np.float64)
+            for code, char in enumerate(decoded):
+                if char:
+                    widths[ord(char)] = font.widths[code]
+        self.widths = widths
+
+    def measure(self, words: Sequence[str], font_size: float) -> np.ndarray:
+        """
+        Width in points of every word, computed in a single vectorized pass.
+
+        :param words: Non-empty words to measure
+        :param font_size: Font size in points
+        :return: Array of widths, NaN where a glyph is missing from the font
+        """
+        lengths = np.fromiter((len(word) for word in words), dtype=np.intp, count=len(words))
+        codes = np.frombuffer(''.join(words).encode('utf-32-le'), dtype=np.uint32)
+        in_table = codes < self.widths.size
+        glyph_widths = np.where(in_table, self.widths[np.where(in_table, codes, 0)], self.default_width)
+        offsets = np.zeros(len(words), dtype=np.intp)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        return np.add.reduceat(glyph_widths, offsets) * (font_size * 0.001)
+
+
+def get_width_table(font_name: str) -> GlyphWidthTable:
+    table = _tables.get(font_name)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(font_name)
+            if table is None:
+                table = _tables[font_name] = GlyphWidthTable(font_name)
+    return table
+
+
+def measure_words(words: Iterable[str], font_name: str, font_size: float) -> List[float]:
+    """
+    Widths of words in points, served from the shared word cache.
+
+    Words missing from the cache are measured together in one vectorized pass.
+
+    :param words: Words to measure
+    :param font_name: Registered ReportLab font name
+    :param font_size: Font size in points
+    """
+    words = list(words)
+    # Widths of this call are kept locally: another thread may recycle the shared cache meanwhile
+    widths = {'': 0.0}
+    missing = set()
+    for word in words:
+        if word not in widths:
+            width = _word_widths.get((word, font_name, font_size))
+            if width is None:
+                missing.add(word)
+            else:
+                widths[word] = width
+    if missing:
+        missing = list(missing)
+        for word, width in zip(missing, get_width_table(font_name).measure(missing, font_size).tolist()):
+            if width != width:
+                # Glyph outside the font encoding, let ReportLab pick the substitution font
+                width = stringWidth(word, font_name, font_size)
+            widths[word] = width
+        with _word_widths_lock:
+            if len(_word_widths) + len(missing) > WORD_WIDTH_CACHE_SIZE:
+                _word_widths.clear()
+            _word_widths.update(((word, font_name, font_size), widths[word]) for word in missing)
+    return [widths[word] for word in words]
+
+
+def prime_word_widths(texts_by_font: Dict[Tuple[str, float], Iterable[str]]):
+    """
+    Measure the words of many texts up front, one vectorized pass per font and size.
+
+    :param texts_by_font: Texts grouped by ``(font_name, font_size)``
+    """
+    for (font_name, font_size), texts in texts_by_font.items():
+        words = {word for text in texts for word in text.split()}
+        words.add(' ')
+        words.add('-')
+        measure_words(words, font_name, font_size)
+
+
+def wrap_words(words: Sequence[str],
+               widths: Sequence[float],
+               space_width: float,
+               max_widths: Sequence[float],
+               space_shrink: float = 0.0):
+    """
+    Greedy line breaking over precomputed word widths.
+
+    :param words: Words of the text
+    :param widths: Width of each word
+    :param space_width: Width of the inter-word space
+    :param max_widths: Available width per line; the last entry repeats
+    :param space_shrink: Allowed shrink per space, as a width
+    :return: List of ``(unused_width, line_words)`` and the widest line width
+    """
+    lines = []
+    widest = 0
+    line_no = 0
+    last_line = len(max_widths) - 1
+    max_width = max_widths[0]
+    line = []
+    current_width = -space_width
+    for word, word_width in zip(words, widths):
+        new_width = current_width + space_width + word_width
+        if new_width <= max_width + space_shrink * len(line) or not line:
+            line.append(word)
+            current_width = new_width
+        else:
+            widest = max(widest, current_width)
+            lines.append((max_width - current_width, line))
+            line = [word]
+            current_width = word_width
+            line_no += 1
+            max_width = max_widths[min(last_line, line_no)]
+    if line:
+        widest = max(widest, current_width)
+        lines.append((max_width - current_width, line))
+    return lines, widest
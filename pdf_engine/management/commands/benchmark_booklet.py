@@ -0,0 +1,119 @@
+import io
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from reportlab.platypus.tableofcontents import TableOfContents
+
+from base.sanitizer import unescape_markup
+from pdf_engine.handlers.flowables import ContentsTable, OutlineEntry
+from pdf_engine.handlers.pdf_engine import EngineDocTemplate, RENDER_PROFILES
+from pdf_engine.handlers.resume_generator import ResumeGenerator
+from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.handlers.synthetic_data import build_synthetic_resume
+from pdf_engine.handlers.template_registry import DEFAULT_TEMPLATE_STYLE
+
+
+class MultiBuildDocTemplate(EngineDocTemplate):
+    """
+    Reference for the benchmark: contents and page totals the usual ReportLab way, with multiBuild.
+
+    Every pass lays out the whole document; a pass draws the total of the previous
+    one and multiBuild repeats until the contents stop changing.
+    """
+    page_total = 0
+
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, OutlineEntry):
+            self.notify('TOCEntry', (flowable.level, flowable.title, self.page, flowable.key))
+
+    def afterPage(self):
+        canvas = self.canv
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(self.pagesize[0] - self.rightMargin, self.bottomMargin / 2,
+                               self.page_label.format(page=self.page, total=self.page_total))
+        canvas.restoreState()
+
+    def _endBuild(self):
+        super()._endBuild()
+        self.page_total = self.page
+
+
+class Command(BaseCommand):
+    help = ("Compare booklets with contents and \"Page X of Y\" labels laid out in one pass against "
+            "ReportLab's multiBuild, on synthetic resumes without the database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', type=int, default=20, help="Resumes per booklet")
+        parser.add_argument('--experiences', type=int, default=4, help="Experience entries per resume")
+        parser.add_argument('--runs', type=int, default=5, help="Booklets built per method")
+        parser.add_argument('--profile', choices=RENDER_PROFILES, default='print', help="Render profile")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        resumes = [build_synthetic_resume(rng, experiences=options['experiences']) for _ in range(options['resumes'])]
+        handler = ResumeTemplateHandler()
+        profile = options['profile']
+
+        # Warm glyph tables and word caches so the first method is not penalised
+        handler.apply_booklet('benchmark', io.BytesIO(), DEFAULT_TEMPLATE_STYLE, resumes[:1], profile=profile,
+                              contents=True)
+
+        self.stdout.write(f"{'method':<12} {'passes':>6} {'cpu ms/booklet':>15} {'pages':>6} {'KiB':>7}")
+        single_pass = self._measure(options['runs'], lambda output: self._single_pass(
+            handler, output, resumes, profile))
+        self._report('single-pass', *single_pass)
+        multi_build = self._measure(options['runs'], lambda output: self._multi_build(
+            handler, output, resumes, profile))
+        self._report('multiBuild', *multi_build)
+        self.stdout.write(f"speedup {multi_build[1] / single_pass[1]:.2f}x")
+
+    def _measure(self, runs, build):
+        cpu_times = []
+        for _ in range(runs):
+            output = io.BytesIO()
+            started = time.process_time()
+            passes = build(output)
+            cpu_times.append((time.process_time() - started) * 1000)
+        data = output.getvalue()
+        return passes, statistics.mean(cpu_times), data.count(b'/Type /Page\n'), len(data) / 1024
+
+    def _report(self, method, passes, cpu_ms, pages, size):
+        self.stdout.write(f"{method:<12} {passes:>6} {cpu_ms:>15.1f} {pages:>6} {size:>7.1f}")
+
+    def _single_pass(self, handler, output, resumes, profile):
+        handler.apply_booklet('benchmark', output, DEFAULT_TEMPLATE_STYLE, resumes, profile=profile, contents=True)
+        return 1
+
+    def _multi_build(self, handler, output, resumes, profile):
+        """
+        Lay out the booklet apply_booklet builds, with ReportLab's TableOfContents and multiBuild.
+
+        :return: Layout passes multiBuild took
+        """
+        booklet = ResumeGenerator(output, profile=profile)
+        doc = booklet.doc
+        booklet.resume.doc = MultiBuildDocTemplate(
+            output,
+            pagesize=doc.pagesize,
+            leftMargin=doc.leftMargin,
+            topMargin=doc.topMargin,
+            rightMargin=doc.rightMargin,
+            bottomMargin=doc.bottomMargin,
+            pageCompression=doc.pageCompression
+        )
+        booklet.load_styles_from_config(DEFAULT_TEMPLATE_STYLE)
+        booklet.add_table_of_contents()
+        for resume_data in resumes:
+            booklet.add_booklet_section(unescape_markup(resume_data.get('name', 'John Doe')))
+            handler._add_common_sections(booklet, **resume_data)
+
+        booklet._prime_text_metrics()
+        booklet.optimize_elements()
+        contents = TableOfContents()
+        contents.levelStyles[0].fontSize = booklet.custom_styles['contents'].fontSize
+        story = [contents if isinstance(element, ContentsTable) else element for element in booklet.elements]
+        return booklet.doc.multiBuild(story)
@@ -0,0 +1,100 @@
+import io
+import random
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from reportlab.graphics.shapes import Drawing, Line
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer
+from reportlab.pdfgen.canvas import Canvas
+
+from pdf_engine.handlers.flowables import (
+    MeasuredParagraph,
+    PlainText,
+    get_horizontal_rule,
+    get_section_header,
+    is_plain_text,
+)
+from pdf_engine.handlers.pdf_engine import PDFTemplateEngine
+from pdf_engine.handlers.synthetic_data import build_synthetic_resume
+
+
+def sample_texts(resume_data):
+    """
+    The strings of a resume grouped the way ResumeGenerator passes them to add_text
+    """
+    experiences = resume_data['experience']
+    return {
+        'date': [f"{exp['start_date']} - {exp['end_date']} | {exp['location']}" for exp in experiences],
+        'title': [f"{exp['title']} at {exp['company']}" for exp in experiences],
+        'bullet': [f"• {item}" for exp in experiences for item in exp['achievements']]
+                  + [f"• {skill}" for skill in resume_data['skills']],
+        'description': [exp['description'] for exp in experiences],
+        'summary': [resume_data['summary']],
+    }
+
+
+class Command(BaseCommand):
+    help = ("Time building, wrapping and drawing each kind of resume text as a Paragraph and as PlainText, "
+            "and each decoration as platypus objects and as a shared flowable.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', type=int, default=200, help="Synthetic resumes the texts are taken from")
+        parser.add_argument('--width', type=float, default=7.5, help="Frame width in inches")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        samples = {}
+        for _ in range(options['resumes']):
+            for kind, texts in sample_texts(build_synthetic_resume(rng)).items():
+                samples.setdefault(kind, []).extend(texts)
+
+        engine = PDFTemplateEngine(io.BytesIO())
+        style = engine.styles['Normal']
+        header_style = engine.custom_styles['section_header']
+        width = options['width'] * inch
+        canvas = Canvas(io.BytesIO())
+
+        self.stdout.write(f"{'flowable':<12} {'count':>6} {'platypus us':>12} {'engine us':>10} {'speedup':>8}")
+        for kind, texts in samples.items():
+            texts = [text for text in texts if is_plain_text(text, style)]
+            self._compare(kind, texts, partial(MeasuredParagraph, style=style), partial(PlainText, style=style),
+                          width, canvas)
+
+        # ResumeGenerator adds one rule and one header per section
+        titles = ['Professional Summary', 'Professional Experience', 'Education', 'Skills'] * options['resumes']
+        self._compare('rule', titles, partial(self._drawing_rule, width), lambda _: [get_horizontal_rule(width, 1, space_after=14.4)],
+                      width, canvas)
+        self._compare('header', titles, partial(Paragraph, style=header_style),
+                      partial(get_section_header, style=header_style), width, canvas)
+
+    def _compare(self, kind, texts, legacy_factory, engine_factory, width, canvas):
+        timings = []
+        for factory in (legacy_factory, engine_factory):
+            # Warm the shared caches so both sides measure layout, not glyph lookups
+            self._lay_out(factory, texts, width, canvas)
+            started = time.perf_counter()
+            self._lay_out(factory, texts, width, canvas)
+            timings.append((time.perf_counter() - started) / len(texts) * 1000000)
+        self.stdout.write(
+            f"{kind:<12} {len(texts):>6} {timings[0]:>12.1f} {timings[1]:>10.1f} {timings[0] / timings[1]:>7.1f}x"
+        )
+
+    def _drawing_rule(self, width, _):
+        # What add_horizontal_line built before rules were shared
+        drawing = Drawing(width, 1)
+        line = Line(0, 0, width, 0)
+        line.strokeColor = HexColor('#000000')
+        line.strokeWidth = 1
+        drawing.add(line)
+        return [drawing, Spacer(width, 14.4)]
+
+    def _lay_out(self, factory, texts, width, canvas):
+        for text in texts:
+            flowables = factory(text)
+            for flowable in flowables if isinstance(flowables, list) else [flowables]:
+                _, height = flowable.wrap(width, 10 * inch)
+                flowable.drawOn(canvas, 0, 10 * inch - height)
@@ -0,0 +1,51 @@
+import io
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from pdf_engine.handlers.column_layout import COLUMN_LAYOUTS
+from pdf_engine.handlers.pdf_engine import RENDER_PROFILES
+from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.handlers.synthetic_data import build_synthetic_resume
+from pdf_engine.handlers.template_registry import DEFAULT_TEMPLATE_STYLE
+
+
+class Command(BaseCommand):
+    help = "Measure CPU time and file size of every render profile on synthetic resumes, without the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', type=int, default=50, help="Synthetic resumes rendered per profile")
+        parser.add_argument('--experiences', type=int, default=4, help="Experience entries per resume")
+        parser.add_argument('--two-column', action='store_true', help="Use the two-column layout")
+        parser.add_argument('--layout', choices=COLUMN_LAYOUTS, help="Column layout to use")
+        parser.add_argument('--profile', action='append', dest='profiles', choices=RENDER_PROFILES,
+                            help="Profile to measure, repeatable; all by default")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        resumes = [build_synthetic_resume(rng, experiences=options['experiences']) for _ in range(options['resumes'])]
+        handler = ResumeTemplateHandler()
+        layout = options['layout'] or options['two_column']
+
+        # Warm glyph tables and word caches so the first profile is not penalised
+        handler.apply_template('benchmark', io.BytesIO(), DEFAULT_TEMPLATE_STYLE, layout, **resumes[0])
+
+        self.stdout.write(f"{'profile':<8} {'cpu ms/render':>14} {'p95 ms':>8} {'mean KiB':>9} {'max KiB':>8}")
+        for profile in options['profiles'] or RENDER_PROFILES:
+            cpu_times = []
+            sizes = []
+            for resume_data in resumes:
+                output = io.BytesIO()
+                started = time.process_time()
+                handler.apply_template('benchmark', output, DEFAULT_TEMPLATE_STYLE, layout,
+                                       profile=profile, **resume_data)
+                cpu_times.append((time.process_time() - started) * 1000)
+                sizes.append(output.getbuffer().nbytes / 1024)
+            p95 = statistics.quantiles(cpu_times, n=20)[-1] if len(cpu_times) > 1 else cpu_times[0]
+            self.stdout.write(
+                f"{profile:<8} {statistics.mean(cpu_times):>14.1f} {p95:>8.1f} "
+                f"{statistics.mean(sizes):>9.1f} {max(sizes):>8.1f}"
+            )
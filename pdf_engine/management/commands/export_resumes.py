@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.stream import iter_zip_stream
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE, RENDER_PROFILES
+from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.models import ResumeTemplate
+
+
+class Command(BaseCommand):
+    help = "Render resumes and stream them into a ZIP archive without temporary files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP archive to write, '-' for stdout")
+        parser.add_argument('--template', help="Name of an existing resume template, 'Default' if omitted")
+        parser.add_argument('--resume', action='append', dest='resumes', help="Resume uuid, repeatable")
+        parser.add_argument('--two-column', action='store_true', help="Use the two-column layout")
+        parser.add_argument('--profile', choices=RENDER_PROFILES, default=DEFAULT_RENDER_PROFILE,
+                            help="Render profile")
+
+    def handle(self, *args, **options):
+        handler = ResumeTemplateHandler()
+        try:
+            if options['template']:
+                resume_template = handler.get_template(options['template'])
+            else:
+                resume_template = handler.register_template('Default')
+        except ResumeTemplate.DoesNotExist as e:
+            raise CommandError(str(e))
+        resumes = handler.get_resumes_for_export(options['resumes'])
+        entries = handler.iter_rendered_resumes(resumes, resume_template, options['two_column'], options['profile'])
+
+        to_stdout = options['output'] == '-'
+        output = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+        try:
+            for chunk in iter_zip_stream(entries):
+                output.write(chunk)
+        finally:
+            if not to_stdout:
+                output.close()
+        self.stderr.write(f"Exported resumes to {options['output']}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pdf_engine.handlers.Resume_data_handler import IMPORT_BATCH_SIZE, ResumeDataHandler
+
+
+class Command(BaseCommand):
+    help = "Import resumes from downloaded LinkedIn data exports or GitHub account archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archives', nargs='+', help="Paths of the archives to import")
+        parser.add_argument('--source', choices=('linkedin', 'github'), required=True, help="Archive format")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="Resumes inserted per batch")
+
+    def handle(self, *args, **options):
+        count = ResumeDataHandler().import_archives(options['archives'], options['source'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Imported {count} resumes."))
@@ -0,0 +1,290 @@
+import asyncio
+import base64
+import contextlib
+import json
+import os
+import random
+import secrets
+import socket
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from base.choices import StateStatuses
+from pdf_engine.handlers.Resume_data_handler import ResumeDataHandler
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE, RENDER_PROFILES
+from pdf_engine.handlers.render_memory import get_rss_kib
+from pdf_engine.handlers.synthetic_data import build_synthetic_resume, to_import_data
+from pdf_engine.models import Resume
+
+# Request kinds in a mix:
+#   generate: export a resume, rendered on every request, staff only
+#   download: the stored PDF of a resume, rendered on the first request only
+#   ingest: import synthetic resumes, staff only
+OPERATIONS = ('generate', 'download', 'ingest')
+DEFAULT_MIX = 'generate=2,download=7,ingest=1'
+
+# Resumes the generate and download requests pick from
+RESUME_SAMPLE_SIZE = 1000
+# Seconds between RSS samples of the worker processes
+RSS_SAMPLE_INTERVAL = 0.5
+# Seconds before a request without a response counts as an error
+REQUEST_TIMEOUT = 60
+# Seconds to wait for the in-process server to accept connections
+SERVER_START_TIMEOUT = 30
+
+
+def parse_mix(value: str):
+    """
+    Weights of a request mix such as ``generate=2,download=7,ingest=1``.
+    """
+    mix = {}
+    for part in value.split(','):
+        operation, _, weight = part.partition('=')
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise CommandError(f"Unknown operation '{operation}' in the mix, choose from {', '.join(OPERATIONS)}.")
+        try:
+            mix[operation] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Invalid weight '{weight}' for '{operation}'.")
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError("The mix needs an operation with a positive weight.")
+    return mix
+
+
+def summarize_latencies(latencies):
+    """
+    p50, p95, p99, mean and max of latencies in seconds, reported in milliseconds.
+    """
+    if not latencies:
+        return None
+    values = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+    return {
+        'p50': round(percentiles[49], 1),
+        'p95': round(percentiles[94], 1),
+        'p99': round(percentiles[98], 1),
+        'mean': round(statistics.mean(values), 1),
+        'max': round(values[-1], 1),
+    }
+
+
+class Command(BaseCommand):
+    help = ("Drive a mix of generate, download and ingest requests at a target rate against the ASGI app, "
+            "started in-process unless --url is given, and report throughput, latency percentiles, error "
+            "rates and worker RSS as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running server; by default the app runs in-process")
+        parser.add_argument('--pid', type=int, action='append', dest='pids',
+                            help="Worker process of the --url server whose RSS is sampled, repeatable")
+        parser.add_argument('--rate', type=float, default=20, help="Requests started per second")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds requests are started for")
+        parser.add_argument('--concurrency', type=int, default=64, help="Most requests in flight at once")
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Operation weights, default {DEFAULT_MIX}")
+        parser.add_argument('--resumes', type=int, default=50,
+                            help="Synthetic resumes added to the database first; 0 uses the existing ones")
+        parser.add_argument('--ingest-batch', type=int, default=5, help="Resumes per ingest request")
+        parser.add_argument('--profile', choices=RENDER_PROFILES, default=DEFAULT_RENDER_PROFILE,
+                            help="Render profile of generate and download requests")
+        parser.add_argument('--username', help="Staff user for generate and ingest requests with --url")
+        parser.add_argument('--password', help="Password of --username")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data and the mix")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+        if options['url'] and urlsplit(options['url']).scheme != 'http':
+            raise CommandError("Only http:// URLs are supported.")
+        staff_only = mix.get('generate') or mix.get('ingest')
+        if options['url'] and staff_only and not options['username']:
+            raise CommandError(
+                "Generate and ingest requests against --url need --username and --password of a staff user.")
+
+        if options['resumes']:
+            ResumeDataHandler().populate_resumes_from_json(
+                to_import_data(build_synthetic_resume(rng)) for _ in range(options['resumes']))
+        resume_ids = [str(uuid) for uuid in Resume.objects.filter(state=StateStatuses.ACTIVE).order_by(
+            '-created_at').values_list('uuid', flat=True)[:RESUME_SAMPLE_SIZE]]
+        if not resume_ids and (mix.get('generate') or mix.get('download')):
+            raise CommandError("No resumes to request; seed some with --resumes.")
+
+        user = server = None
+        username, password = options['username'], options['password']
+        try:
+            if options['url']:
+                base_url, pids = options['url'].rstrip('/'), options['pids'] or []
+            else:
+                if staff_only:
+                    username, password = f'load-test-{secrets.token_hex(4)}', secrets.token_urlsafe(16)
+                    user = get_user_model().objects.create_user(username, password=password, is_staff=True)
+                server, base_url = self._start_server()
+                pids = [os.getpid()]
+
+            authorization = None
+            if username:
+                credentials = base64.b64encode(f'{username}:{password or ""}'.encode()).decode()
+                authorization = f'Basic {credentials}'
+            report = asyncio.run(self._run(base_url, pids, mix, resume_ids, authorization, rng, options))
+        finally:
+            if server is not None:
+                server.should_exit = True
+                self._server_thread.join()
+            if user is not None:
+                user.delete()
+
+        report['target'] = options['url'] or 'in-process'
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def _start_server(self):
+        """
+        Serve the ASGI app with uvicorn on a free localhost port, in a thread of this process.
+        """
+        import uvicorn
+
+        from pdf_generator.asgi import application
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('127.0.0.1', 0))
+        server = uvicorn.Server(uvicorn.Config(application, lifespan='off', log_level='warning', access_log=False))
+        self._server_thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, name='load-test-server')
+        self._server_thread.start()
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while not server.started:
+            if not self._server_thread.is_alive() or time.monotonic() > deadline:
+                raise CommandError("The in-process server did not start.")
+            time.sleep(0.05)
+        # Named as in ALLOWED_HOSTS
+        return server, f"http://localhost:{sock.getsockname()[1]}"
+
+    async def _run(self, base_url, pids, mix, resume_ids, authorization, rng, options):
+        """
+        Start requests on an open-loop schedule and collect the report.
+
+        Latency is measured from the time a request was due, not from when it got a
+        free slot, so a saturated server shows up as latency instead of a lower rate.
+        """
+        operations, weights = zip(*mix.items())
+        total = int(options['rate'] * options['duration'])
+        slots = asyncio.Semaphore(options['concurrency'])
+        results = []
+        rss = defaultdict(list)
+        done = asyncio.Event()
+
+        async def sample_rss():
+            while not done.is_set():
+                for pid in pids:
+                    value = get_rss_kib(pid)
+                    if value is not None:
+                        rss[pid].append(value)
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(done.wait(), RSS_SAMPLE_INTERVAL)
+
+        async def send(operation, due, request):
+            async with slots:
+                try:
+                    status = await asyncio.wait_for(self._request(base_url, *request), REQUEST_TIMEOUT)
+                    error = f'http_{status}' if status >= 400 else None
+                except (OSError, asyncio.TimeoutError, ValueError) as e:
+                    error = type(e).__name__
+            results.append((operation, error, loop.time() - due))
+
+        loop = asyncio.get_running_loop()
+        sampler = asyncio.create_task(sample_rss())
+        started = loop.time()
+        tasks = []
+        for index in range(total):
+            due = started + index / options['rate']
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            operation = rng.choices(operations, weights)[0]
+            request = self._build_request(operation, resume_ids, authorization, rng, options)
+            tasks.append(asyncio.create_task(send(operation, due, request)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+        done.set()
+        await sampler
+        return self._report(results, elapsed, rss, options)
+
+    def _build_request(self, operation, resume_ids, authorization, rng, options):
+        profile = options['profile']
+        if operation == 'generate':
+            return ('GET', f"/pdf_engine/export/?resume={rng.choice(resume_ids)}&profile={profile}", None,
+                    {'Authorization': authorization})
+        if operation == 'download':
+            return 'GET', f"/pdf_engine/resumes/{rng.choice(resume_ids)}/pdf/?profile={profile}", None, {}
+        resumes = [to_import_data(build_synthetic_resume(rng)) for _ in range(options['ingest_batch'])]
+        headers = {'Content-Type': 'application/json', 'Authorization': authorization}
+        return 'POST', '/pdf_engine/resumes/import/', json.dumps({'resumes': resumes}).encode(), headers
+
+    async def _request(self, base_url, method, path, body, headers):
+        """
+        Send one HTTP/1.1 request on a new connection and read the whole response.
+
+        :return: Response status code
+        """
+        url = urlsplit(base_url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            lines = [f"{method} {path} HTTP/1.1", f"Host: {url.netloc}", "Connection: close"]
+            lines += [f"{name}: {value}" for name, value in headers.items()]
+            if body is not None:
+                lines.append(f"Content-Length: {len(body)}")
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + (body or b''))
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("Connection closed without a response")
+            # Read the body until the server closes the connection
+            while await reader.read(64 * 1024):
+                pass
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+    def _report(self, results, elapsed, rss, options):
+        latencies = defaultdict(list)
+        errors = defaultdict(Counter)
+        for operation, error, latency in results:
+            latencies[operation].append(latency)
+            if error:
+                errors[operation][error] += 1
+
+        error_count = sum(sum(counter.values()) for counter in errors.values())
+        return {
+            'rate': options['rate'],
+            'concurrency': options['concurrency'],
+            'mix': parse_mix(options['mix']),
+            'duration_s': round(elapsed, 2),
+            'requests': len(results),
+            'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+            'error_rate': round(error_count / len(results), 4) if results else None,
+            'latency_ms': summarize_latencies([latency for _, _, latency in results]),
+            'operations': {
+                operation: {
+                    'requests': len(values),
+                    'error_rate': round(sum(errors[operation].values()) / len(values), 4),
+                    'errors': dict(errors[operation]),
+                    'latency_ms': summarize_latencies(values),
+                }
+                for operation, values in sorted(latencies.items())
+            },
+            'rss_kib': {
+                str(pid): {'start': samples[0], 'end': samples[-1], 'max': max(samples)}
+                for pid, samples in rss.items() if samples
+            },
+        }
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from pdf_engine.handlers.resume_snapshot_handler import ResumeSnapshotHandler
+from pdf_engine.models import Resume
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored render snapshot of resumes, e.g. after the snapshot shape changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resume', action='append', dest='resumes', help="Resume uuid, repeatable")
+        parser.add_argument('--missing-only', action='store_true', help="Only resumes without a snapshot")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        resumes = Resume.objects.all()
+        if options['resumes']:
+            resumes = resumes.filter(uuid__in=options['resumes'])
+        if options['missing_only']:
+            resumes = resumes.filter(render_snapshot__isnull=True)
+
+        handler = ResumeSnapshotHandler()
+        batch = []
+        count = 0
+        for resume_id in resumes.values_list('uuid', flat=True).iterator(chunk_size=options['batch_size']):
+            batch.append(resume_id)
+            if len(batch) >= options['batch_size']:
+                handler.refresh(batch)
+                count += len(batch)
+                batch = []
+        handler.refresh(batch)
+        count += len(batch)
+        self.stdout.write(f"Refreshed {count} resume snapshots")
@@ -0,0 +1,90 @@
+import gc
+import io
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pdf_engine.handlers.column_layout import COLUMN_LAYOUTS
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE, RENDER_PROFILES
+from pdf_engine.handlers.render_memory import get_rss_kib
+from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.handlers.synthetic_data import build_synthetic_resume
+from pdf_engine.handlers.template_registry import DEFAULT_TEMPLATE_STYLE
+
+
+class Command(BaseCommand):
+    help = ("Render synthetic resumes in one process and report memory growth per batch, without the database. "
+            "Fails when the memory retained after the warm-up exceeds the budget.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=10000, help="Renders after the warm-up")
+        parser.add_argument('--batch', type=int, default=1000, help="Renders per reported batch")
+        parser.add_argument('--warmup', type=int, default=200,
+                            help="Renders before measuring, so caches reach their working size")
+        parser.add_argument('--budget', type=float, default=4096,
+                            help="KiB of Python memory the renders may retain after the warm-up")
+        parser.add_argument('--top', type=int, default=10, help="Allocation sites listed when over budget")
+        parser.add_argument('--experiences', type=int, default=4, help="Experience entries per resume")
+        parser.add_argument('--layout', choices=COLUMN_LAYOUTS, help="Column layout to use")
+        parser.add_argument('--profile', choices=RENDER_PROFILES, default=DEFAULT_RENDER_PROFILE,
+                            help="Render profile")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic data")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        handler = ResumeTemplateHandler()
+
+        def render():
+            resume_data = build_synthetic_resume(rng, experiences=options['experiences'])
+            handler.apply_template('soak', io.BytesIO(), DEFAULT_TEMPLATE_STYLE, options['layout'] or False,
+                                   profile=options['profile'], **resume_data)
+
+        for _ in range(options['warmup']):
+            render()
+
+        # Only what is allocated from here on is traced, the warm-up is the baseline
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.take_snapshot()
+            gc.collect()
+            base_traced = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            base_rss = get_rss_kib()
+            previous = base_traced
+
+            self.stdout.write(f"{'renders':>8} {'traced KiB':>11} {'growth KiB':>11} {'peak KiB':>9} "
+                              f"{'rss MiB':>8} {'rss growth MiB':>15} {'ms/render':>10}")
+            done = 0
+            while done < options['renders']:
+                count = min(options['batch'], options['renders'] - done)
+                started = time.perf_counter()
+                for _ in range(count):
+                    render()
+                elapsed = time.perf_counter() - started
+                done += count
+
+                gc.collect()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                rss = get_rss_kib()
+                self.stdout.write(
+                    f"{done:>8} {(current - base_traced) / 1024:>11.1f} {(current - previous) / 1024:>11.1f} "
+                    f"{(peak - base_traced) / 1024:>9.1f} {rss / 1024:>8.1f} {(rss - base_rss) / 1024:>15.1f} "
+                    f"{elapsed * 1000 / count:>10.2f}"
+                )
+                previous = current
+
+            retained = (previous - base_traced) / 1024
+            if retained > options['budget']:
+                # Where the retained memory was allocated, to find the cache or the leak
+                for stat in tracemalloc.take_snapshot().compare_to(baseline, 'lineno')[:options['top']]:
+                    self.stderr.write(str(stat))
+                raise CommandError(
+                    f"Renders retained {retained:.1f} KiB after the warm-up, over the budget of "
+                    f"{options['budget']:.0f} KiB."
+                )
+            self.stdout.write(f"Retained {retained:.1f} KiB over {done} renders, within {options['budget']:.0f} KiB.")
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.3 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pdf_engine", "0002_resumetemplate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="resume",
+            name="render_snapshot",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="resume",
+            name="snapshot_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.1.3 on 2026-10-19 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LINK_MODELS = ('ResumeExperience', 'ResumeEducation', 'ResumeSkill')
+
+
+def renumber_duplicate_positions(apps, schema_editor):
+    # Positions were never unique before; renumber the links of resumes with duplicates
+    # in their current order, oldest first among equal positions, so the constraints apply
+    for model_name in LINK_MODELS:
+        model = apps.get_model('pdf_engine', model_name)
+        resume_ids = (
+            model.objects.values('resume')
+            .annotate(links=models.Count('pk'), positions=models.Count('position', distinct=True))
+            .filter(links__gt=models.F('positions'))
+            .values_list('resume', flat=True)
+        )
+        for resume_id in list(resume_ids):
+            links = list(model.objects.filter(resume_id=resume_id).order_by('position', 'created_at', 'pk'))
+            for position, link in enumerate(links):
+                link.position = position
+            model.objects.bulk_update(links, ['position'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pdf_engine", "0003_resume_render_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="education",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="experience",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="personalinfo",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="resume",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="resumeeducation",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="resumeexperience",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="resumeskill",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="resumetemplate",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="skill",
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name="summary",
+            options={},
+        ),
+        migrations.AlterField(
+            model_name="resumeeducation",
+            name="resume",
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="pdf_engine.resume"),
+        ),
+        migrations.AlterField(
+            model_name="resumeexperience",
+            name="resume",
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="pdf_engine.resume"),
+        ),
+        migrations.AlterField(
+            model_name="resumeskill",
+            name="resume",
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="pdf_engine.resume"),
+        ),
+        migrations.AddIndex(
+            model_name="resume",
+            index=models.Index(condition=models.Q(("state", 0)), fields=["created_at"], name="resume_active_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resumeeducation",
+            index=models.Index(condition=models.Q(("state", 0)), fields=["resume", "position"], name="resume_education_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resumeexperience",
+            index=models.Index(condition=models.Q(("state", 0)), fields=["resume", "position"], name="resume_experience_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resumeskill",
+            index=models.Index(condition=models.Q(("state", 0)), fields=["resume", "position"], name="resume_skill_active_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resumetemplate",
+            index=models.Index(condition=models.Q(("state", 0)), fields=["name"], name="template_active_name_idx"),
+        ),
+        migrations.RunPython(renumber_duplicate_positions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="resumeeducation",
+            constraint=models.UniqueConstraint(fields=("resume", "position"), name="unique_resume_education_position"),
+        ),
+        migrations.AddConstraint(
+            model_name="resumeexperience",
+            constraint=models.UniqueConstraint(fields=("resume", "position"), name="unique_resume_experience_position"),
+        ),
+        migrations.AddConstraint(
+            model_name="resumeskill",
+            constraint=models.UniqueConstraint(fields=("resume", "position"), name="unique_resume_skill_position"),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-19 10:13
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0004_resume_link_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('state', models.IntegerField(choices=[(0, 'ACTIVE'), (1, 'INACTIVE')], db_index=True, default=0)),
+                ('template_name', models.CharField(max_length=255)),
+                ('two_column_layout', models.BooleanField(default=False)),
+                ('resume_ids', models.JSONField(default=list)),
+                ('status', models.IntegerField(choices=[(0, 'QUEUED'), (1, 'RUNNING'), (2, 'FINISHED')], default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('rendered', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('failures', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:27
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0006_rebuild_escaped_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeRenderUsage',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('state', models.IntegerField(choices=[(0, 'ACTIVE'), (1, 'INACTIVE')], db_index=True, default=0)),
+                ('layout', models.CharField(max_length=32)),
+                ('profile', models.CharField(max_length=16)),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('last_downloaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resume', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='pdf_engine.resume')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pdf_engine.resumetemplate')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('resume', 'template', 'layout', 'profile'), name='unique_resume_render_usage')],
+            },
+        ),
+    ]
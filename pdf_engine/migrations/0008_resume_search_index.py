@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # The search index is specific to each database; others get none and cannot search
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE pdf_engine_resume ADD COLUMN search_vector tsvector")
+        schema_editor.execute("CREATE INDEX resume_search_vector_idx ON pdf_engine_resume USING gin (search_vector)")
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE pdf_engine_resume_search USING fts5(resume_id UNINDEXED, name, headline, summary, "
+            "body, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE pdf_engine_resume DROP COLUMN search_vector")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE pdf_engine_resume_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0007_resumerenderusage'),
+    ]
+
+    operations = [
+        # Existing resumes are indexed by `manage.py refresh_resume_snapshots`
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0008_resume_search_index'),
+    ]
+
+    operations = [
+        # Created first, so creation-ordered reads always have an index
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(fields=['state', 'created_at', 'uuid'], name='resume_state_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumetemplate',
+            index=models.Index(fields=['state', 'created_at', 'uuid'], name='template_state_created_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='resume',
+            name='resume_active_created_idx',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0009_keyset_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderLock',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('owner', models.CharField(max_length=32)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0010_renderlock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resume',
+            name='render_snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='resume',
+            name='snapshot_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_render_snapshots(apps, schema_editor):
+    # Snapshots now escape double quotes as well; cleared ones are rebuilt on their next render
+    Resume = apps.get_model('pdf_engine', 'Resume')
+    Resume.objects.exclude(render_snapshot=None).update(render_snapshot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdf_engine', '0011_snapshot_fields_not_editable'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_render_snapshots, migrations.RunPython.noop),
+    ]
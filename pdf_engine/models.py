@@ -1,6 +1,11 @@
 from django.db import models
+from django.utils import timezone
+
+from base.choices import JOB_STATUS_CHOICES, JobStatuses, StateStatuses
 from base.models import AbstractBaseModel
 
+ACTIVE_STATE = models.Q(state=StateStatuses.ACTIVE)
+
 
 class PersonalInfo(AbstractBaseModel):
     name = models.CharField(max_length=255)
@@ -41,30 +46,161 @@ class Skill(AbstractBaseModel):
 class Resume(AbstractBaseModel):
     personal_info = models.OneToOneField(PersonalInfo, on_delete=models.CASCADE)
     summary = models.OneToOneField(Summary, on_delete=models.CASCADE)
+    # Render-ready data in the shape of ResumeTemplateHandler.resume_to_dict, rebuilt on every related write.
+    # Only ResumeSnapshotHandler.refresh writes these two, see save
+    render_snapshot = models.JSONField(blank=True, null=True, editable=False)
+    snapshot_version = models.PositiveIntegerField(default=0, editable=False)  # Bumped with every snapshot rebuild
+
+    SNAPSHOT_FIELDS = ('render_snapshot', 'snapshot_version')
+
+    class Meta:
+        indexes = [
+            # Active resumes in creation order, with uuid breaking ties for keyset pagination. Not
+            # partial, so SQLite matches it against a bound state parameter too
+            models.Index(fields=('state', 'created_at', 'uuid'), name='resume_state_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Save an existing resume without its snapshot fields, unless they are named in ``update_fields``.
+
+        The instance may have been loaded before the latest snapshot refresh, and
+        writing its copy back would regress the snapshot, its version, and with them
+        the stored renders and ETags.
+        """
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.SNAPSHOT_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
 
 class ResumeExperience(AbstractBaseModel):
-    resume = models.ForeignKey(Resume, on_delete=models.CASCADE)
+    # Indexed through the (resume, position) constraint below
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, db_index=False)
     experience = models.ForeignKey(Experience, on_delete=models.CASCADE)
     position = models.PositiveIntegerField()  # For ordering
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('resume', 'position'), name='unique_resume_experience_position'),
+        ]
+        indexes = [
+            models.Index(fields=('resume', 'position'), condition=ACTIVE_STATE, name='resume_experience_active_idx'),
+        ]
+
 
 class ResumeEducation(AbstractBaseModel):
-    resume = models.ForeignKey(Resume, on_delete=models.CASCADE)
+    # Indexed through the (resume, position) constraint below
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, db_index=False)
     education = models.ForeignKey(Education, on_delete=models.CASCADE)
     position = models.PositiveIntegerField()  # For ordering
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('resume', 'position'), name='unique_resume_education_position'),
+        ]
+        indexes = [
+            models.Index(fields=('resume', 'position'), condition=ACTIVE_STATE, name='resume_education_active_idx'),
+        ]
+
 
 class ResumeSkill(AbstractBaseModel):
-    resume = models.ForeignKey(Resume, on_delete=models.CASCADE)
+    # Indexed through the (resume, position) constraint below
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, db_index=False)
     skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
     position = models.PositiveIntegerField()  # For ordering
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('resume', 'position'), name='unique_resume_skill_position'),
+        ]
+        indexes = [
+            models.Index(fields=('resume', 'position'), condition=ACTIVE_STATE, name='resume_skill_active_idx'),
+        ]
+
 
 class ResumeTemplate(AbstractBaseModel):
     name = models.CharField(max_length=255)
     default = models.BooleanField(default=False)
     style_json = models.JSONField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=('name',), condition=ACTIVE_STATE, name='template_active_name_idx'),
+            models.Index(fields=('state', 'created_at', 'uuid'), name='template_state_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class ResumeRenderUsage(AbstractBaseModel):
+    """Downloads of a resume per template, column layout and render profile, the renders worth preparing ahead."""
+    # Indexed through the unique constraint below
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, db_index=False)
+    template = models.ForeignKey(ResumeTemplate, on_delete=models.CASCADE)
+    layout = models.CharField(max_length=32)  # Layout name, see get_layout_name
+    profile = models.CharField(max_length=16)
+    downloads = models.PositiveIntegerField(default=0)
+    last_downloaded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('resume', 'template', 'layout', 'profile'),
+                                    name='unique_resume_render_usage'),
+        ]
+
+
+class RenderJob(AbstractBaseModel):
+    """Background re-render of many resumes, submitted from the admin."""
+    template_name = models.CharField(max_length=255)
+    two_column_layout = models.BooleanField(default=False)
+    resume_ids = models.JSONField(default=list)
+    status = models.IntegerField(choices=JOB_STATUS_CHOICES, default=JobStatuses.QUEUED)
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    failures = models.JSONField(default=list)  # The first failures as {'resume', 'error'}
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.template_name} render of {self.total} resumes"
+
+    @property
+    def processed(self):
+        return self.rendered + self.failed
+
+    @property
+    def throughput(self):
+        """Resumes processed per second."""
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self):
+        """Seconds left at the current throughput, None until it is known."""
+        if self.status == JobStatuses.FINISHED:
+            return 0
+        throughput = self.throughput
+        return round((self.total - self.processed) / throughput) if throughput else None
+
+
+class RenderLock(models.Model):
+    """
+    A render in progress in some worker process, held until its PDF is stored.
+
+    Not an AbstractBaseModel: rows live for the length of one render and are only
+    ever looked up by key, so they carry no uuid, timestamps or state indexes.
+    """
+    key = models.CharField(max_length=255, primary_key=True)  # Render key, see RenderStore.get_key
+    owner = models.CharField(max_length=32)  # Token of the holder, only it releases the lock
+    expires_at = models.DateTimeField()  # After this the holder is presumed dead and the lock may be taken over
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from pdf_engine.handlers.prerender_handler import prerender_scheduler
+from pdf_engine.handlers.resume_search_handler import ResumeSearchHandler
+from pdf_engine.handlers.resume_snapshot_handler import ResumeSnapshotHandler, snapshots_refreshed
+from pdf_engine.handlers.template_registry import template_registry
+from pdf_engine.models import (
+    PersonalInfo,
+    Summary,
+    Experience,
+    Education,
+    Skill,
+    Resume,
+    ResumeExperience,
+    ResumeEducation,
+    ResumeSkill,
+    ResumeTemplate
+)
+
+
+@receiver(post_save, sender=Resume)
+def refresh_resume_snapshot(sender, instance, **kwargs):
+    ResumeSnapshotHandler().refresh([instance.uuid])
+
+
+@receiver(post_delete, sender=Resume)
+def remove_resume_search_document(sender, instance, **kwargs):
+    ResumeSearchHandler().remove([instance.uuid])
+
+
+@receiver([post_save, post_delete], sender=ResumeExperience)
+@receiver([post_save, post_delete], sender=ResumeEducation)
+@receiver([post_save, post_delete], sender=ResumeSkill)
+def refresh_linked_resume_snapshot(sender, instance, **kwargs):
+    ResumeSnapshotHandler().refresh([instance.resume_id])
+
+
+@receiver(post_save, sender=PersonalInfo)
+def refresh_personal_info_snapshots(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        # Nothing links to a new row yet
+        return
+    ResumeSnapshotHandler().refresh_for_personal_info(instance.uuid)
+
+
+@receiver(post_save, sender=Summary)
+def refresh_summary_snapshots(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        # Nothing links to a new row yet
+        return
+    ResumeSnapshotHandler().refresh_for_summary(instance.uuid)
+
+
+@receiver([post_save, post_delete], sender=Experience)
+def refresh_experience_snapshots(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        # Nothing links to a new row yet
+        return
+    ResumeSnapshotHandler().refresh_for_experience(instance.uuid)
+
+
+@receiver([post_save, post_delete], sender=Education)
+def refresh_education_snapshots(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        # Nothing links to a new row yet
+        return
+    ResumeSnapshotHandler().refresh_for_education(instance.uuid)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def refresh_skill_snapshots(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        # Nothing links to a new row yet
+        return
+    ResumeSnapshotHandler().refresh_for_skill(instance.uuid)
+
+
+@receiver([post_save, post_delete], sender=ResumeTemplate)
+def invalidate_template_registry(sender, instance, **kwargs):
+    template_registry.invalidate()
+    # Drop it again once committed, a reload inside the transaction may have cached the old rows
+    transaction.on_commit(template_registry.invalidate)
+
+
+@receiver(snapshots_refreshed)
+def prerender_refreshed_resumes(sender, resume_ids, **kwargs):
+    prerender_scheduler.schedule_downloaded(resume_ids)
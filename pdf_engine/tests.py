@@ -1,3 +1,1236 @@
-from django.test import TestCase
+import io
+import json
+import random
+import re
+import tarfile
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.forms import modelform_factory
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.text import slugify
+from django.utils import timezone
+from pypdf import PdfReader
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    BaseDocTemplate,
+    Frame,
+    FrameBreak,
+    PageTemplate,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+)
+from reportlab.graphics.shapes import Drawing, Line
+
+from base.choices import JobStatuses, StateStatuses
+from base.pagination import KeysetPaginator
+from base.sanitizer import escape_markup_values
+
+from pdf_engine.handlers import text_metrics
+from pdf_engine.handlers.Resume_data_handler import ResumeDataHandler
+from pdf_engine.handlers.archive_readers import iter_json_array
+from pdf_engine.handlers.column_layout import ColumnLayout
+from pdf_engine.handlers.flowables import (
+    MeasuredParagraph,
+    PlainText,
+    MergedSpacer,
+    SectionHeader,
+    get_horizontal_rule,
+    get_section_header,
+    is_plain_text,
+    optimize_flowables,
+)
+from pdf_engine.handlers.pdf_engine import PDFTemplateEngine
+from pdf_engine.handlers.prerender_handler import PreRenderHandler, PreRenderScheduler, prerender_scheduler
+from pdf_engine.handlers.render_job_handler import RenderJobHandler
+from pdf_engine.handlers.render_lock_handler import RenderLockHandler
+from pdf_engine.handlers.render_store import RENDER_VERSION, RenderStore
+from pdf_engine.handlers.synthetic_data import build_synthetic_resume, to_import_data
+from pdf_engine.handlers.resume_generator import ResumeGenerator
+from pdf_engine.handlers.resume_search_handler import ResumeSearchHandler
+from pdf_engine.handlers.resume_template_handler import FIT_MIN_SCALE, ResumeTemplateHandler
+from pdf_engine.handlers.template_registry import DEFAULT_TEMPLATE_STYLE, TemplateRegistry, template_registry
+from pdf_engine.handlers.text_metrics import measure_words, wrap_words
+from pdf_engine.models import (
+    RenderJob,
+    RenderLock,
+    Resume,
+    ResumeExperience,
+    ResumeSkill,
+    ResumeEducation,
+    ResumeRenderUsage,
+    ResumeTemplate,
+)
+
+
+def build_resume_data(name='John Doe', experiences=2, education=1, skills=3):
+    return {
+        'name': name,
+        'contact_info': {
+            'email': 'john@example.com',
+            'phone': '555-0100',
+            'linkedin': 'https://www.linkedin.com/in/johndoe',
+            'website': 'https://johndoe.dev',
+        },
+        'summary': 'Backend engineer focused on document pipelines.',
+        'experience': [
+            {
+                'title': f'Engineer {index}',
+                'company': 'Acme',
+                'start_date': 'Jan 2020',
+                'end_date': 'Present' if index == 0 else 'Dec 2021',
+                'location': 'Remote',
+                'description': 'Built and operated services.',
+                'achievements': ['Cut render time in half', 'Mentored two engineers'],
+            }
+            for index in range(experiences)
+        ],
+        'education': [
+            {
+                'degree': 'BSc',
+                'field': 'Computer Science',
+                'institution': f'University {index}',
+                'graduation_date': 'May 2015',
+            }
+            for index in range(education)
+        ],
+        'skills': [f'Skill {index}' for index in range(skills)],
+    }
+
+
+class FitPagesTest(TestCase):
+
+    def render(self, resume_data, fit_pages=None):
+        output = io.BytesIO()
+        ResumeTemplateHandler().apply_template('Default', output, DEFAULT_TEMPLATE_STYLE, fit_pages=fit_pages,
+                                               **resume_data)
+        return len(re.findall(rb'/Type /Page\b', output.getvalue()))
+
+    def test_overlong_resume_is_scaled_to_the_target_pages(self):
+        resume_data = build_resume_data(experiences=6)
+        self.assertEqual(self.render(resume_data), 2)
+        scale = ResumeTemplateHandler().find_fit_scale(DEFAULT_TEMPLATE_STYLE, 1, **resume_data)
+        self.assertTrue(FIT_MIN_SCALE < scale < 1.0)
+        self.assertEqual(self.render(resume_data, fit_pages=1), 1)
+
+        # The measured fill matches the pages a build produces
+        engine = ResumeGenerator(io.BytesIO())
+        ResumeTemplateHandler().modern_template(engine, DEFAULT_TEMPLATE_STYLE, **resume_data)
+        self.assertTrue(1 < engine.measure_page_fill() <= 2)
+
+    def test_scale_never_goes_below_the_minimum(self):
+        resume_data = build_resume_data(experiences=40)
+        with self.assertLogs('pdf_engine.handlers.resume_template_handler', 'WARNING') as log:
+            self.assertEqual(ResumeTemplateHandler().find_fit_scale(DEFAULT_TEMPLATE_STYLE, 1, **resume_data),
+                             FIT_MIN_SCALE)
+        self.assertIn('minimum scale', log.output[0])
+        self.assertGreater(self.render(resume_data, fit_pages=1), 1)
+
+    def test_fitting_resume_keeps_its_scale(self):
+        resume_data = build_resume_data(experiences=2)
+        with patch.object(PDFTemplateEngine, 'measure_page_fill', autospec=True,
+                          side_effect=PDFTemplateEngine.measure_page_fill) as measure_page_fill:
+            self.assertEqual(ResumeTemplateHandler().find_fit_scale(DEFAULT_TEMPLATE_STYLE, 1, **resume_data), 1.0)
+        # One probe at full scale settles it
+        measure_page_fill.assert_called_once()
+
+
+class LinkPositionMigrationTest(TransactionTestCase):
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('pdf_engine', target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('pdf_engine', target)]).apps
+
+    def test_duplicate_positions_are_renumbered_before_the_constraints(self):
+        apps = self.migrate('0003_resume_render_snapshot')
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes('pdf_engine')[0][1])
+        models = {name: apps.get_model('pdf_engine', name) for name in ('PersonalInfo', 'Summary', 'Resume', 'Skill', 'ResumeSkill')}
+
+        def create_resume(positions):
+            resume = models['Resume'].objects.create(
+                personal_info=models['PersonalInfo'].objects.create(name='Ada', email='ada@example.com', phone='1'),
+                summary=models['Summary'].objects.create(text='Engines'))
+            for index, position in enumerate(positions):
+                models['ResumeSkill'].objects.create(
+                    resume=resume, skill=models['Skill'].objects.create(name=f'Skill {index}'), position=position)
+            return resume.uuid
+
+        duplicated, unique = create_resume([1, 0, 1, 3]), create_resume([2, 5])
+        apps = self.migrate('0004_resume_link_indexes')
+        links = apps.get_model('pdf_engine', 'ResumeSkill').objects
+        self.assertEqual(
+            list(links.filter(resume_id=duplicated).order_by('position').values_list('skill__name', 'position')),
+            [('Skill 1', 0), ('Skill 0', 1), ('Skill 2', 2), ('Skill 3', 3)])
+        self.assertEqual(sorted(links.filter(resume_id=unique).values_list('position', flat=True)), [2, 5])
+
+
+class ResumeQueryBudgetTest(TestCase):
+    """Fixed query budgets for the ingest and render data paths."""
+
+    # 3 inserts for PersonalInfo, Summary and Resume, 2 batched inserts per section,
+    # 1 skill lookup, 5 for the snapshot (lock, 3 section reads, update), the search
+    # document (an update on PostgreSQL, a delete and an insert on SQLite) and 4 savepoints
+    INGEST_QUERIES = 20 if connection.vendor == 'postgresql' else 21
+
+    def test_ingest_query_count_does_not_grow_with_resume_size(self):
+        with self.assertNumQueries(self.INGEST_QUERIES):
+            ResumeDataHandler().populate_resume_from_json(build_resume_data())
+        with self.assertNumQueries(self.INGEST_QUERIES):
+            ResumeDataHandler().populate_resume_from_json(
+                build_resume_data(name='Jane Doe', experiences=12, education=3, skills=25))
+
+    def test_ingest_reuses_existing_skills(self):
+        ResumeDataHandler().populate_resume_from_json(build_resume_data(skills=3))
+        resume = ResumeDataHandler().populate_resume_from_json(build_resume_data(name='Jane Doe', skills=4))
+        self.assertEqual(
+            list(resume.resumeskill_set.order_by('position').values_list('skill__name', flat=True)),
+            ['Skill 0', 'Skill 1', 'Skill 2', 'Skill 3']
+        )
+        self.assertEqual(ResumeSkill.objects.values('skill').distinct().count(), 4)
+
+    def test_render_data_reads_one_row(self):
+        resume_id = ResumeDataHandler().populate_resume_from_json(build_resume_data()).uuid
+        with self.assertNumQueries(1):
+            resume = Resume.objects.only('uuid', 'render_snapshot', 'snapshot_version').get(uuid=resume_id)
+            data = ResumeTemplateHandler().get_render_data(resume)
+        self.assertEqual(data['name'], 'John Doe')
+        self.assertEqual([exp['title'] for exp in data['experience']], ['Engineer 0', 'Engineer 1'])
+
+    def test_resume_to_dict_query_count(self):
+        resume_id = ResumeDataHandler().populate_resume_from_json(
+            build_resume_data(experiences=6, skills=10)).uuid
+        resume = Resume.objects.select_related('personal_info', 'summary').get(uuid=resume_id)
+        with self.assertNumQueries(3):
+            ResumeTemplateHandler().resume_to_dict(resume)
+
+    def test_snapshot_follows_related_writes(self):
+        resume = ResumeDataHandler().populate_resume_from_json(build_resume_data())
+        resume.refresh_from_db()
+        version = resume.snapshot_version
+
+        link = resume.resumeexperience_set.get(position=2)
+        link.experience.title = 'Staff Engineer'
+        link.experience.save()
+        resume.refresh_from_db()
+        self.assertEqual(resume.render_snapshot['experience'][1]['title'], 'Staff Engineer')
+        self.assertEqual(resume.snapshot_version, version + 1)
+
+        resume.resumeskill_set.get(position=1).delete()
+        resume.refresh_from_db()
+        self.assertEqual(resume.render_snapshot['skills'], ['Skill 1', 'Skill 2'])
+
+    def test_saving_a_stale_resume_keeps_the_latest_snapshot(self):
+        stale = Resume.objects.get(uuid=ResumeDataHandler().populate_resume_from_json(build_resume_data()).uuid)
+        stale.summary.text = 'Updated summary.'
+        stale.summary.save()
+        current = Resume.objects.get(uuid=stale.uuid)
+        self.assertEqual(current.snapshot_version, stale.snapshot_version + 1)
+
+        stale.state = StateStatuses.INACTIVE
+        stale.save()
+        resume = Resume.objects.get(uuid=stale.uuid)
+        self.assertEqual(resume.state, StateStatuses.INACTIVE)
+        self.assertEqual(resume.render_snapshot, current.render_snapshot)
+        # The save refreshes the snapshot again, past the version it had, never back to a used one
+        self.assertGreater(resume.snapshot_version, current.snapshot_version)
+        self.assertNotIn('render_snapshot', modelform_factory(Resume, fields='__all__')().fields)
+
+
+class ResumeIndexPlanTest(TestCase):
+    """The section loads must be served by the (resume, position) indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            ResumeDataHandler().populate_resume_from_json(build_resume_data(name=f'Resume {index}'))
+        cls.resume = Resume.objects.first()
+
+    def assertIndexOrdered(self, queryset):
+        """The plan reads through an index and needs no separate sort step."""
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be scanned sequentially
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn('index', plan.lower(), plan)
+        self.assertNotIn('temp b-tree', plan.lower(), plan)
+        self.assertNotRegex(plan, r'\bSort\b', plan)
+
+    def test_section_loads_use_resume_position_index(self):
+        for model in (ResumeExperience, ResumeEducation, ResumeSkill):
+            with self.subTest(model=model.__name__):
+                self.assertIndexOrdered(model.objects.filter(resume=self.resume).order_by('position'))
+
+    def test_active_section_loads_are_index_ordered(self):
+        for model in (ResumeExperience, ResumeEducation, ResumeSkill):
+            with self.subTest(model=model.__name__):
+                self.assertIndexOrdered(
+                    model.objects.filter(resume=self.resume, state=StateStatuses.ACTIVE).order_by('position'))
+
+    def test_active_resume_listing_is_index_ordered(self):
+        self.assertIndexOrdered(Resume.objects.filter(state=StateStatuses.ACTIVE).order_by('created_at'))
+
+    def test_keyset_pages_are_index_ordered(self):
+        paginator = KeysetPaginator(Resume.objects.filter(state=StateStatuses.ACTIVE), page_size=1)
+        _, cursor = paginator.get_page()
+        created_at, resume_id = paginator.decode_cursor(cursor)
+        self.assertIndexOrdered(paginator.queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, uuid__lt=resume_id), created_at__lte=created_at))
+
+
+class TemplateRegistryTest(TestCase):
+
+    def setUp(self):
+        self.template = ResumeTemplate.objects.create(name='Modern', style_json={'title_color': '#000000'})
+        template_registry.invalidate()
+
+    def test_lookups_are_served_from_memory(self):
+        template_registry.load()
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                self.assertEqual(ResumeTemplateHandler().register_template('Modern'), self.template)
+
+    def test_saves_and_deletes_invalidate(self):
+        template_registry.load()
+        self.template.style_json = {'title_color': '#FFFFFF'}
+        self.template.save()
+        self.assertEqual(template_registry.get('Modern').style_json, {'title_color': '#FFFFFF'})
+
+        self.template.state = StateStatuses.INACTIVE
+        self.template.save()
+        self.assertIsNone(template_registry.get('Modern'))
+
+    def test_version_stamp_reloads_changes_from_other_processes(self):
+        registry = TemplateRegistry(check_interval=0)
+        registry.load()
+        # A save in another worker sends no signal here
+        ResumeTemplate.objects.filter(name='Modern').update(name='Classic', updated_at=timezone.now())
+        self.assertIsNone(registry.get('Modern'))
+        self.assertEqual(registry.get('Classic'), self.template)
+
+
+class InlineExecutor:
+
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+class RenderJobTest(TestCase):
+
+    def setUp(self):
+        render_root = tempfile.TemporaryDirectory()
+        self.addCleanup(render_root.cleanup)
+        self.enterContext(override_settings(RENDER_ROOT=render_root.name, RENDER_JOB_CHUNK_SIZE=2))
+        self.resume_ids = [
+            ResumeDataHandler().populate_resume_from_json(build_resume_data(name=f'Resume {index}')).uuid
+            for index in range(3)
+        ]
+
+    def test_admin_action_renders_selection_in_chunks(self):
+        self.client.force_login(get_user_model().objects.create_superuser('ops'))
+        # Run the chunks inline, render threads would not see the test transaction
+        with patch('pdf_engine.handlers.render_job_handler.get_render_executor', return_value=InlineExecutor()), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin:pdf_engine_resume_changelist'), {
+                'action': 'render_selected',
+                '_selected_action': [str(resume_id) for resume_id in self.resume_ids],
+                'template': '',
+            })
+        job = RenderJob.objects.get()
+        self.assertRedirects(response, reverse('admin:pdf_engine_renderjob_change', args=(job.uuid,)))
+        self.assertEqual((job.status, job.rendered, job.failed), (JobStatuses.FINISHED, 3, 0))
+        self.assertEqual(len(list(Path(settings.RENDER_ROOT).glob('*/*.pdf'))), 3)
+
+    def test_missing_resumes_are_reported_as_failures(self):
+        missing_id = '00000000-0000-0000-0000-000000000000'
+        job = RenderJob.objects.create(template_name='Default', resume_ids=[missing_id], total=1)
+        RenderJobHandler().render_chunk(job.uuid, job.resume_ids, ResumeTemplateHandler().register_template('Default'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.failed), (JobStatuses.FINISHED, 1))
+        self.assertEqual(job.failures, [{'resume': missing_id, 'error': 'Resume not found or inactive'}])
+
+    def test_admin_action_rejects_unknown_templates(self):
+        self.client.force_login(get_user_model().objects.create_superuser('ops'))
+        response = self.client.post(reverse('admin:pdf_engine_resume_changelist'), {
+            'action': 'render_selected',
+            '_selected_action': [str(resume_id) for resume_id in self.resume_ids],
+            'template': 'Defualt',
+        }, follow=True)
+        self.assertContains(response, "Unknown template")
+        self.assertFalse(RenderJob.objects.exists())
+        self.assertFalse(ResumeTemplate.objects.filter(name='Defualt').exists())
+
+    def test_failed_progress_update_keeps_finished_renders(self):
+        job = RenderJob.objects.create(
+            template_name='Default', resume_ids=[str(resume_id) for resume_id in self.resume_ids[:2]], total=2)
+        handler = RenderJobHandler()
+        updates = iter([DatabaseError('locked')])
+
+        def record_progress(*args):
+            error = next(updates, None)
+            if error:
+                raise error
+            RenderJobHandler.record_progress(handler, *args)
+
+        with patch.object(handler, 'record_progress', side_effect=record_progress), \
+                self.assertLogs('pdf_engine.handlers.render_job_handler', 'ERROR'):
+            handler.render_chunk(job.uuid, job.resume_ids, ResumeTemplateHandler().register_template('Default'))
+        # Both resumes rendered before the first update failed; the retry counts them once, as rendered
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rendered, job.failed), (JobStatuses.FINISHED, 2, 0))
+
+    def test_render_to_store_skips_existing_renders(self):
+        handler = ResumeTemplateHandler()
+        template = handler.register_template('Default')
+        resume = Resume.objects.get(uuid=self.resume_ids[0])
+        key = handler.render_to_store(resume, template)
+        self.assertTrue(RenderStore().get_path(key).read_bytes().startswith(b'%PDF'))
+        with patch.object(ResumeTemplateHandler, 'render_resume') as render_resume:
+            self.assertEqual(handler.render_to_store(resume, template), key)
+        render_resume.assert_not_called()
+
+
+class RenderProfileTest(TestCase):
+
+    def render(self, profile):
+        output = io.BytesIO()
+        ResumeTemplateHandler().apply_template(
+            'Default', output, DEFAULT_TEMPLATE_STYLE, profile=profile, **build_resume_data())
+        return output.getvalue()
+
+    def test_profiles_control_compression_and_decorations(self):
+        draft, web = self.render('draft'), self.render('web')
+        self.assertNotIn(b'/FlateDecode', draft)
+        self.assertIn(b'/FlateDecode', web)
+        self.assertLess(len(web), len(draft))
+
+    def test_unknown_profile_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.render('poster')
+        # Exports hold every user's resume, anonymous clients get nothing
+        self.assertEqual(self.client.get(reverse('export_view')).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        response = self.client.get(reverse('export_view'), {'profile': 'poster'})
+        self.assertEqual(response.status_code, 400)
+
+
+class MarkupEscapingTest(TestCase):
+
+    def test_escaped_text_renders_literally(self):
+        resume_data = build_resume_data(name='Jo <Dev> & Sons')
+        resume_data['summary'] = 'Owned R&D for <canvas> rendering, latency < 5 ms.'
+        output = io.BytesIO()
+        ResumeTemplateHandler().apply_template(
+            'Default', output, DEFAULT_TEMPLATE_STYLE, profile='draft', **escape_markup_values(resume_data))
+        pdf = output.getvalue()
+        self.assertIn(b'(Jo <Dev> & Sons)', pdf)
+        self.assertIn(b'(Owned R&D for <canvas> rendering, latency < 5 ms.)', pdf)
+        self.assertNotIn(b'&amp;', pdf)
+
+    def test_quotes_in_urls_stay_inside_the_link(self):
+        resume_data = build_resume_data()
+        resume_data['contact_info']['website'] = 'https://ada.dev/?q="x" color="red'
+        output = io.BytesIO()
+        ResumeTemplateHandler().apply_template(
+            'Default', output, DEFAULT_TEMPLATE_STYLE, profile='draft', **escape_markup_values(resume_data))
+        self.assertIn(b'/URI (https://ada.dev/?q="x" color="red)', output.getvalue())
+
+    def test_resume_file_names_are_unescaped(self):
+        resume = ResumeDataHandler().populate_resume_from_json(build_resume_data(name='AT&T "Labs"'))
+        with patch.object(ResumeTemplateHandler, 'apply_template') as apply_template:
+            ResumeTemplateHandler().create_resume(resume.uuid, 'Default')
+        self.assertEqual(apply_template.call_args.args[1], 'att-labs_resume.pdf')
+
+
+class TextMetricsTest(TestCase):
+
+    def test_line_breaks_match_paragraph(self):
+        rng = random.Random(0)
+        alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,;:!?-\'"()éüñ'
+        for _ in range(200):
+            style = ParagraphStyle('Random', fontName=rng.choice(['Helvetica', 'Times-Roman', 'Courier-Bold']),
+                                   fontSize=rng.choice([8, 9.5, 10, 11, 14]))
+            words = [''.join(rng.choices(alphabet, k=rng.randint(1, 12))) for _ in range(rng.randint(1, 80))]
+            width = rng.uniform(200, 500)
+
+            expected = Paragraph(' '.join(words), style).breakLines([width]).lines
+            space_width = measure_words([' '], style.fontName, style.fontSize)[0]
+            lines, _ = wrap_words(words, measure_words(words, style.fontName, style.fontSize), space_width,
+                                  [width], style.spaceShrinkage * space_width)
+            self.assertEqual([line for _, line in lines], [line for _, line in expected])
+            for (unused, _), (expected_unused, _) in zip(lines, expected):
+                self.assertAlmostEqual(unused, expected_unused, places=6)
+
+    def test_widths_do_not_depend_on_the_shared_cache(self):
+        # Glyphs outside the font encoding are measured one by one through stringWidth,
+        # where the cache is recycled here as another thread would do it mid-call
+        words = ['中文', '日本語', '한국어']
+        expected = [stringWidth(word, 'Helvetica', 10) for word in words]
+
+        def recycle_cache(*args):
+            text_metrics._word_widths.clear()
+            return stringWidth(*args)
+
+        with patch('pdf_engine.handlers.text_metrics.stringWidth', side_effect=recycle_cache):
+            self.assertEqual(measure_words(words, 'Helvetica', 10), expected)
+
+
+class PlainTextTest(TestCase):
+
+    def setUp(self):
+        self.style = PDFTemplateEngine(io.BytesIO()).styles['Normal']
+
+    def build(self, flowable_class, texts, style):
+        output = io.BytesIO()
+        SimpleDocTemplate(output, invariant=True, pageCompression=0).build(
+            [flowable_class(text, style) for text in texts])
+        return output.getvalue()
+
+    def test_detects_markup_and_decorated_styles(self):
+        self.assertTrue(is_plain_text('Jan 2020 - Present | Remote', self.style))
+        self.assertTrue(is_plain_text('R&amp;D &lt;team&gt;', self.style))
+        self.assertFalse(is_plain_text('<b>Lead</b>', self.style))
+        self.assertFalse(is_plain_text('Caf&eacute;', self.style))
+        self.assertFalse(is_plain_text('Lead', ParagraphStyle('Highlight', parent=self.style, backColor='yellow')))
+        self.assertFalse(is_plain_text('Lead', ParagraphStyle('Upper', parent=self.style, textTransform='uppercase')))
+
+        engine = PDFTemplateEngine(io.BytesIO())
+        engine.add_text('Plain text', space_after=0)
+        engine.add_text('<i>Marked up</i>', space_after=0)
+        self.assertEqual([type(element) for element in engine.elements], [PlainText, MeasuredParagraph])
+
+    def test_draws_like_a_paragraph(self):
+        text = ' '.join(['Built and operated the document rendering service'] * 6)
+        for alignment in (TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY):
+            style = ParagraphStyle('Aligned', parent=self.style, alignment=alignment, leftIndent=12,
+                                   firstLineIndent=18)
+            self.assertEqual(self.build(PlainText, [text], style), self.build(MeasuredParagraph, [text], style))
+
+    def test_splits_across_pages_like_a_paragraph(self):
+        texts = [' '.join(['Cut render time in half across every region'] * 80)] * 3
+        style = ParagraphStyle('Justified', parent=self.style, alignment=TA_JUSTIFY)
+        plain, paragraph = self.build(PlainText, texts, style), self.build(MeasuredParagraph, texts, style)
+        self.assertEqual(re.findall(rb'/Count (\d+)', plain), re.findall(rb'/Count (\d+)', paragraph))
+        self.assertEqual(re.findall(rb'\((.*?)\) Tj', plain), re.findall(rb'\((.*?)\) Tj', paragraph))
+
+    def test_long_words_are_split_by_a_paragraph(self):
+        text = 'x' * 400
+        plain, paragraph = PlainText(text, self.style), MeasuredParagraph(text, self.style)
+        self.assertEqual(plain.wrap(200, 800), paragraph.wrap(200, 800))
+
+    def test_split_text_falls_back_to_its_own_words(self):
+        # The tail of a split moves to a frame too narrow for its long word
+        words = [f'w{index}' for index in range(60)]
+        words[50] = 'x' * 40
+        style = ParagraphStyle('Indented', parent=self.style, firstLineIndent=18)
+        output = io.BytesIO()
+        document = BaseDocTemplate(output, invariant=True, pageCompression=0)
+        document.addPageTemplates(PageTemplate(frames=[
+            Frame(36, 700, 400, 3 * style.leading + 12, id='wide'),
+            Frame(36, 36, 120, 600, id='narrow'),
+        ]))
+        document.build([PlainText(' '.join(words), style)])
+
+        drawn = b' '.join(re.findall(rb'\((.*?)\) Tj', output.getvalue())).decode().split()
+        self.assertEqual(''.join(drawn), ''.join(words))
+
+        # Only the head of a split keeps the first-line indent
+        _, tail = PlainText(' '.join(words), style).split(400, 3 * style.leading)
+        tail.wrap(120, 600)
+        self.assertEqual(tail._paragraph.style.firstLineIndent, 0)
+
+
+class DecorationTest(TestCase):
+
+    def build(self, flowables):
+        output = io.BytesIO()
+        doc = SimpleDocTemplate(output, invariant=True, pageCompression=0)
+        doc.build([Spacer(0, doc.height - 40), *flowables, PlainText('Next section', self.style)])
+        return re.findall(rb'1 0 0 1 [\d.]+ [\d.]+ cm', output.getvalue())
+
+    def setUp(self):
+        self.style = PDFTemplateEngine(io.BytesIO()).custom_styles['section_header']
+
+    def test_decorations_are_shared_across_documents(self):
+        first, second = PDFTemplateEngine(io.BytesIO()), PDFTemplateEngine(io.BytesIO())
+        for engine in (first, second):
+            engine.add_section_header('Skills')
+            engine.add_horizontal_line()
+        self.assertIsInstance(first.elements[0], SectionHeader)
+        self.assertEqual([id(element) for element in first.elements], [id(element) for element in second.elements])
+        with self.assertRaises(AttributeError):
+            first.elements[0].title = 'Education'
+
+    def test_rule_and_header_are_placed_like_drawing_and_paragraph(self):
+        drawing = Drawing(300, 1)
+        drawing.add(Line(0, 0, 300, 0))
+        legacy = self.build([drawing, Spacer(300, 14.4), Paragraph('Skills', self.style)])
+        shared = self.build([get_horizontal_rule(300, 1, space_after=14.4), get_section_header('Skills', self.style)])
+        # Same positions for everything drawn; the old spacers only added origins of their own
+        self.assertLessEqual(set(shared), set(legacy))
+
+    def test_headers_and_rules_wider_than_a_narrow_column(self):
+        output = io.BytesIO()
+        engine = PDFTemplateEngine(output, column_layout='sidebar-left')
+        title = 'Languages and Developer Tooling'
+        engine.start_section('skills')
+        engine.add_section_header('Skills')
+        engine.add_section_header(title)
+        engine.add_horizontal_line(line_width=engine.doc.width)
+        engine.start_section('experience')
+        engine.add_section_header(title)
+        header, wrapped, rule, main_header = engine.elements
+        self.assertEqual([type(header), type(wrapped), type(main_header)], [SectionHeader, MeasuredParagraph, SectionHeader])
+        sidebar = engine.layout.get_section_frame('skills')
+        self.assertGreater(get_section_header(title, engine.custom_styles['section_header']).width,
+                           sidebar._getAvailableWidth())
+        self.assertGreater(wrapped.wrap(sidebar._getAvailableWidth(), sidebar._aH)[1], wrapped.style.leading)
+        self.assertEqual(rule.width, sidebar._width)
+        engine.generate(invariant=True)
+        self.assertTrue(output.getvalue().startswith(b'%PDF'))
+
+
+class OptimizeFlowablesTest(TestCase):
+
+    def setUp(self):
+        self.style = PDFTemplateEngine(io.BytesIO()).styles['Normal']
+
+    def build(self, flowables):
+        output = io.BytesIO()
+        SimpleDocTemplate(output, invariant=True, pageCompression=0).build(flowables)
+        return output.getvalue()
+
+    def test_drops_nulls_and_merges_spacers(self):
+        elements, removed = optimize_flowables([
+            None, Spacer(0, 5), Spacer(0, 7),
+            PlainText('Engineer at Acme', self.style), None, Spacer(0, 5),
+            PlainText('Jan 2020 - Present', self.style), Spacer(0, 5),
+        ])
+        self.assertEqual([type(element) for element in elements], [MergedSpacer, PlainText, Spacer, PlainText, Spacer])
+        self.assertEqual(elements[0].height, 12)
+        self.assertEqual(removed, {'none': 2, 'spacers': 1})
+
+    def test_merged_spacers_split_like_the_separate_spacers(self):
+        def positions(flowables):
+            output = self.build([Spacer(0, 640), *flowables, PlainText('Next section', self.style)])
+            return re.findall(rb'/Count (\d+)', output), re.findall(rb'1 0 0 1 [\d.]+ [\d.]+ cm', output)
+
+        spacers = [Spacer(0, 20), Spacer(0, 20), Spacer(0, 20)]
+        merged_pages, merged = positions(optimize_flowables(spacers)[0])
+        pages, separate = positions(spacers)
+        self.assertEqual(merged_pages, pages)
+        self.assertLessEqual(set(merged), set(separate))
+
+    def test_engine_reports_what_it_removed(self):
+        engine = PDFTemplateEngine(io.BytesIO())
+        engine.add_text('Jan 2020 - Present')
+        engine.add_text('Remote')
+        engine.elements.append(None)
+        engine.generate()
+        self.assertEqual(engine.flowable_report, {'none': 1})
+
+
+class ColumnLayoutTest(TestCase):
+
+    def arrange(self, layout, sections):
+        engine = PDFTemplateEngine(io.BytesIO(), column_layout=layout)
+        for key, flowables in sections:
+            engine.start_section(key)
+            engine.elements.extend(flowables)
+        return engine, engine.layout.arrange(engine.elements, engine.sections)
+
+    def columns(self, arranged):
+        columns = [[]]
+        for element in arranged:
+            if element is FrameBreak:
+                columns.append([])
+            else:
+                columns[-1].append(element)
+        return columns
+
+    def test_sections_are_balanced_over_columns(self):
+        spacers = [Spacer(0, height) for height in (300, 100, 100, 200, 100)]
+        _, arranged = self.arrange('two-column', [(None, [spacer]) for spacer in spacers])
+        self.assertEqual(self.columns(arranged), [spacers[:2], spacers[2:]])
+
+        _, arranged = self.arrange('three-column', [(None, [spacer]) for spacer in spacers])
+        self.assertEqual(self.columns(arranged), [spacers[:1], spacers[1:3], spacers[3:]])
+
+    def test_sections_split_between_columns_when_whole_ones_do_not_fit(self):
+        engine = PDFTemplateEngine(io.BytesIO(), column_layout=True)
+        bullets = [PlainText(f'Lead the migration of service {index} to the new cluster', engine.styles['Normal'])
+                   for index in range(60)]
+        _, arranged = self.arrange(True, [('summary', [Spacer(0, 20)]), ('experience', bullets)])
+        first, second = self.columns(arranged)
+        # The section too tall for a column continues in the next one, and the columns end level
+        self.assertEqual(first[1:] + second, bullets)
+        frame = engine.layout.frames[0]
+        heights = [sum(flowable.wrap(frame._getAvailableWidth(), frame._aH)[1] for flowable in column)
+                   for column in (first, second)]
+        self.assertLess(abs(heights[0] - heights[1]), 2 * engine.styles['Normal'].leading)
+
+    def test_sidebar_sections_are_pinned_and_overflow_to_next_pages(self):
+        main = [Spacer(0, 400) for _ in range(4)]
+        engine, arranged = self.arrange('sidebar-left', [
+            ('personal_info', [Spacer(0, 100)]), ('experience', main), ('skills', [Spacer(0, 50)])])
+        sidebar, *main_pages = self.columns(arranged)
+        self.assertEqual([spacer.height for spacer in sidebar], [100, 50])
+        # The main column runs on over the next pages, the sidebar stays empty there
+        self.assertEqual([[spacer.height for spacer in column] for column in main_pages],
+                         [[400], [], [400], [], [400], [], [400]])
+        self.assertLess(engine.layout.get_section_width('skills'), engine.layout.get_section_width('experience'))
+
+    def test_column_layouts_render_resumes(self):
+        for layout in ('two-column', 'three-column', 'sidebar-right'):
+            output = io.BytesIO()
+            ResumeTemplateHandler().apply_template(
+                'Default', output, DEFAULT_TEMPLATE_STYLE, layout, **build_resume_data(experiences=6))
+            self.assertTrue(output.getvalue().startswith(b'%PDF'))
+
+        self.assertRaises(ValueError, PDFTemplateEngine, io.BytesIO(), column_layout='four-column')
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        response = self.client.get(reverse('export_view'), {'layout': 'four-column'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DeferredFormTest(TestCase):
+
+    def engine(self):
+        # No page compression, so the labels can be read from the bytes
+        return PDFTemplateEngine(io.BytesIO(), profile='draft')
+
+    def add_lines(self, engine, count):
+        for index in range(count):
+            engine.add_text(f'Lead the migration of service {index} to the new cluster')
+
+    def test_page_labels_carry_the_page_count(self):
+        engine = self.engine()
+        engine.add_page_numbers()
+        self.add_lines(engine, 90)
+        engine.generate(invariant=True)
+        pdf = engine.filename.getvalue()
+        self.assertEqual(pdf.count(b'/Type /Page\n'), 3)
+        self.assertEqual(re.findall(rb'\((Page \d of \d)\) Tj', pdf),
+                         [b'Page 1 of 3', b'Page 2 of 3', b'Page 3 of 3'])
+
+    def test_contents_list_the_pages_of_booklet_sections(self):
+        engine = self.engine()
+        engine.add_table_of_contents()
+        for name in ('Alex Kim', 'Sam Lee'):
+            engine.add_booklet_section(name)
+            self.add_lines(engine, 50)
+        engine.generate(invariant=True)
+        pdf = engine.filename.getvalue()
+        # Each section starts a page and runs onto a second one
+        self.assertEqual(engine.doc.outline_pages, {'booklet_0': 2, 'booklet_1': 4})
+        self.assertEqual(re.findall(rb'\((\d)\) Tj', pdf), [b'2', b'4'])
+        self.assertIn(b'(Page 5 of 5) Tj', pdf)
+        # The draft profile has no outline, yet the entries still mark their pages
+        self.assertNotIn(b'/Outlines', pdf)
+
+
+class BookletTest(TestCase):
+
+    def setUp(self):
+        template_registry.invalidate()
+        ResumeTemplateHandler().register_template('Default')
+
+    def test_booklet_has_an_outline_entry_and_footer_per_resume(self):
+        names = ['Ada Lovelace', 'Grace Hopper', 'Alan Turing']
+        resume_ids = [ResumeDataHandler().populate_resume_from_json(build_resume_data(name=name, experiences=4)).uuid
+                      for name in names]
+        output = io.BytesIO()
+        ResumeTemplateHandler().create_booklet(resume_ids, 'Default', filename=output)
+
+        reader = PdfReader(io.BytesIO(output.getvalue()))
+        self.assertEqual([entry.title for entry in reader.outline], names)
+        first_pages = [reader.get_destination_page_number(entry) for entry in reader.outline]
+        self.assertEqual(first_pages[0], 0)
+        self.assertEqual(first_pages, sorted(set(first_pages)))
+        # Every page of a section runs on that resume's page template, its footer naming the resume
+        for name, start, end in zip(names, first_pages, first_pages[1:] + [len(reader.pages)]):
+            for page in reader.pages[start:end]:
+                self.assertIn(name, page.extract_text())
+
+        with self.assertRaises(ResumeTemplate.DoesNotExist):
+            ResumeTemplateHandler().create_booklet(resume_ids, 'Unknown', filename=io.BytesIO())
+
+
+class RenderMemoryTest(TestCase):
+
+    def setUp(self):
+        # Tracing stays on once a tracked render starts it; keep it from slowing the other tests
+        self.addCleanup(tracemalloc.stop)
+
+    def test_tracked_renders_report_peak_and_retained_memory(self):
+        engine = PDFTemplateEngine(io.BytesIO())
+        engine.add_text('Lead the migration of the billing service')
+        with override_settings(RENDER_MEMORY_TRACKING=True), self.assertLogs('pdf_engine.handlers.render_memory') as log:
+            engine.generate()
+        self.assertGreater(engine.memory_report['peak_kib'], 0)
+        self.assertIn('Render memory: peak', log.output[0])
+
+        self.assertEqual(self.client.get(reverse('render_memory_metrics')).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        stats = self.client.get(reverse('render_memory_metrics')).json()['data']
+        self.assertGreaterEqual(stats['renders'], 1)
+        self.assertGreater(stats['traced_kib'], 0)
+
+    def test_soak_fails_over_the_retained_budget(self):
+        output = io.StringIO()
+        call_command('render_soak', renders=4, batch=2, warmup=1, budget=1024, stdout=output)
+        self.assertIn('within 1024 KiB', output.getvalue())
+        # A budget below zero fails any run
+        with self.assertRaises(CommandError):
+            call_command('render_soak', renders=2, batch=2, warmup=1, budget=-1024, top=0, stdout=io.StringIO())
+
+
+class LoadTestTest(TransactionTestCase):
+
+    def setUp(self):
+        render_root = tempfile.TemporaryDirectory()
+        self.addCleanup(render_root.cleanup)
+        self.enterContext(override_settings(RENDER_ROOT=render_root.name))
+        self.report_path = Path(render_root.name) / 'report.json'
+        template_registry.invalidate()
+
+    def test_import_view_is_staff_only(self):
+        url = reverse('resume_import_view')
+        payload = {'resumes': [to_import_data(build_synthetic_resume(random.Random(index))) for index in range(2)]}
+        self.assertEqual(self.client.post(url, payload, content_type='application/json').status_code, 403)
+
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data'], {'imported': 2})
+        self.assertEqual(self.client.post(url, {'resumes': [{}]}, content_type='application/json').status_code, 400)
+        self.assertEqual(Resume.objects.count(), 2)
+
+    def test_in_process_run_reports_latency_and_rss(self):
+        call_command('load_test', rate=8, duration=1, resumes=2, ingest_batch=1, output=str(self.report_path),
+                     mix='generate=1,download=1,ingest=1')
+        report = json.loads(self.report_path.read_text())
+        self.assertEqual(report['requests'], 8)
+        self.assertEqual(report['error_rate'], 0)
+        self.assertLessEqual(report['latency_ms']['p50'], report['latency_ms']['p99'])
+        self.assertTrue(report['rss_kib'])
+        # The temporary staff user of the ingest requests is removed
+        self.assertFalse(get_user_model().objects.exists())
+        with self.assertRaises(CommandError):
+            call_command('load_test', mix='upload=1')
+
+
+class ResumeExportTest(TestCase):
+
+    def setUp(self):
+        template_registry.invalidate()
+
+    def test_export_streams_one_pdf_per_resume(self):
+        resumes = [ResumeDataHandler().populate_resume_from_json(build_resume_data(name=name))
+                   for name in ('Ada Lovelace', 'Grace Hopper', 'Alan Turing')]
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        response = self.client.get(reverse('export_view'), {'resume': [str(resume.uuid) for resume in resumes[:2]]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertIsNone(archive.testzip())
+            names = archive.namelist()
+            self.assertEqual(sorted(names), sorted(f'{slugify(resume.personal_info.name)}_{resume.uuid}.pdf'
+                                                   for resume in resumes[:2]))
+            for name in names:
+                self.assertTrue(archive.read(name).startswith(b'%PDF'))
+
+
+class ResumePDFViewTest(TestCase):
+
+    def setUp(self):
+        # Downloads reference the template row, drop one cached by an earlier test
+        template_registry.invalidate()
+        render_root = tempfile.TemporaryDirectory()
+        self.addCleanup(render_root.cleanup)
+        self.enterContext(override_settings(RENDER_ROOT=render_root.name))
+        self.resume = ResumeDataHandler().populate_resume_from_json(build_resume_data())
+        self.url = reverse('resume_pdf_view', args=(self.resume.uuid,))
+
+    def test_renders_are_byte_identical(self):
+        resume = ResumeTemplateHandler().get_resume_for_render(self.resume.uuid)
+        template = ResumeTemplateHandler().register_template('Default')
+        self.assertEqual(ResumeTemplateHandler().render_resume(resume, template),
+                         ResumeTemplateHandler().render_resume(resume, template))
+
+    def test_matching_etag_skips_render_and_body(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        with patch.object(ResumeTemplateHandler, 'render_resume') as render_resume:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        render_resume.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        self.assertNotEqual(self.client.get(self.url, {'profile': 'draft'})['ETag'], etag)
+        # New layout code replaces stored renders and their tags
+        with patch('pdf_engine.handlers.render_store.RENDER_VERSION', RENDER_VERSION + 1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.resume.summary.text = 'Updated summary.'
+        self.resume.summary.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_range_requests_return_partial_content(self):
+        response = self.client.get(self.url)
+        body = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(body)}')
+        self.assertEqual(b''.join(response.streaming_content), body[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-50', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(body)}-').status_code, 416)
+
+    async def test_range_requests_stream_under_asgi(self):
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=-50'})
+        self.assertEqual(response.status_code, 206)
+        # Consumed the way the ASGI handler sends it
+        self.assertEqual(len(b''.join([part async for part in response])), 50)
+
+    def test_sendfile_backend_hands_file_to_web_server(self):
+        with override_settings(SENDFILE_BACKEND='nginx', SENDFILE_ROOT=settings.RENDER_ROOT):
+            response = self.client.get(self.url)
+        self.assertEqual(response.content, b'')
+        self.assertRegex(response['X-Accel-Redirect'], rf'^/protected/renders/{self.resume.uuid}/.+\.pdf$')
+
+    def test_unknown_templates_are_rejected_not_created(self):
+        ResumeTemplateHandler().register_template('Modern')
+        self.assertEqual(self.client.get(self.url, {'template': 'Modern'}).status_code, 200)
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        for name in ('junk-1', 'junk-2'):
+            self.assertEqual(self.client.get(self.url, {'template': name}).status_code, 400)
+            self.assertEqual(self.client.get(reverse('export_view'), {'template': name}).status_code, 400)
+        self.assertEqual(set(ResumeTemplate.objects.values_list('name', flat=True)), {'Modern'})
+
+
+class PreRenderTest(TestCase):
+
+    def setUp(self):
+        render_root = tempfile.TemporaryDirectory()
+        self.addCleanup(render_root.cleanup)
+        self.enterContext(override_settings(RENDER_ROOT=render_root.name))
+        template_registry.invalidate()
+        self.resume = ResumeDataHandler().populate_resume_from_json(build_resume_data())
+        self.url = reverse('resume_pdf_view', args=(self.resume.uuid,))
+
+    def test_changes_of_downloaded_resumes_schedule_prerenders(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.get(self.url)
+        # Revalidations, partial reads and rejected variants are not downloads
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-99').status_code, 206)
+        self.assertEqual(self.client.get(self.url, {'template': 'junk'}).status_code, 400)
+        self.client.get(self.url, {'profile': 'draft', 'layout': 'sidebar-left'})
+        self.assertEqual(
+            list(ResumeRenderUsage.objects.order_by('-downloads').values_list('layout', 'profile', 'downloads')),
+            [('single', 'print', 2), ('sidebar-left', 'draft', 1)]
+        )
+
+        with patch.object(prerender_scheduler, 'schedule') as schedule, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.resume.summary.text = 'Updated summary.'
+            self.resume.summary.save()
+        schedule.assert_called_once_with({self.resume.uuid})
+
+        # Resumes never downloaded have nothing to pre-render
+        with patch.object(prerender_scheduler, 'schedule') as schedule, \
+                self.captureOnCommitCallbacks(execute=True):
+            ResumeDataHandler().populate_resume_from_json(build_resume_data(name='Jane Doe'))
+        schedule.assert_not_called()
+
+    def test_prerendered_variants_are_served_without_rendering(self):
+        handler = PreRenderHandler()
+        template = ResumeTemplateHandler().register_template('Default')
+        handler.record_download(self.resume, template, profile='draft')
+        for _ in range(2):
+            handler.record_download(self.resume, template, 'two-column')
+        handler.record_download(self.resume, template)
+
+        cancelled = threading.Event()
+        cancelled.set()
+        self.assertEqual(handler.prerender(self.resume.uuid, cancelled), [])
+        with override_settings(RENDER_PRERENDER_VARIANTS=2), \
+                patch.object(ResumeTemplateHandler, 'render_to_store',
+                             autospec=True, side_effect=ResumeTemplateHandler.render_to_store) as render_to_store:
+            keys = handler.prerender(self.resume.uuid)
+        # Pre-renders coalesce with concurrent downloads of the same variant
+        self.assertEqual(render_to_store.call_count, 2)
+        store = RenderStore()
+        self.resume.refresh_from_db()
+        self.assertEqual(keys, [store.get_key(self.resume, template, 'two-column'), store.get_key(self.resume, template)])
+
+        with patch.object(ResumeTemplateHandler, 'render_resume') as render_resume:
+            self.assertEqual(self.client.get(self.url, {'two_column': 'true'}).status_code, 200)
+        render_resume.assert_not_called()
+
+    def test_scheduler_debounces_and_cancels_superseded_prerenders(self):
+        scheduler = PreRenderScheduler()
+        done = threading.Event()
+        with patch.object(PreRenderHandler, 'prerender', side_effect=lambda *args: done.set()) as prerender:
+            scheduler.schedule(['resume'], delay=0.2)
+            first = scheduler._cancel_events['resume']
+            scheduler.schedule(['resume'], delay=0.2)
+            self.assertTrue(first.is_set())
+            self.assertTrue(done.wait(5))
+        prerender.assert_called_once()
+        resume_id, cancelled = prerender.call_args.args
+        self.assertEqual(resume_id, 'resume')
+        self.assertIsNot(cancelled, first)
+        self.assertFalse(cancelled.is_set())
+        self.assertEqual(scheduler.pending(), 0)
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.templates = [ResumeTemplate.objects.create(name=f'Template {index}', style_json={}) for index in range(7)]
+        # Ties on created_at are broken by uuid
+        ResumeTemplate.objects.filter(name__in=['Template 2', 'Template 3', 'Template 4']).update(
+            created_at=self.templates[2].created_at)
+        self.expected = list(ResumeTemplate.objects.order_by('-created_at', '-uuid').values_list('name', flat=True))
+
+    def test_pages_walk_every_row_once_with_one_query_each(self):
+        paginator = KeysetPaginator(ResumeTemplate.objects.values('uuid', 'created_at', 'name'), page_size=2)
+        names, cursor = [], None
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                rows, cursor = paginator.get_page(cursor)
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn('COUNT', queries[0]['sql'].upper())
+            names += [row['name'] for row in rows]
+            if cursor is None:
+                break
+        self.assertEqual(names, self.expected)
+
+    def test_list_endpoints(self):
+        url = reverse('template_list_view')
+        data = self.client.get(url, {'limit': 4}).json()['data']
+        self.assertEqual([row['name'] for row in data['results']], self.expected[:4])
+        self.assertEqual(set(data['results'][0]), {'uuid', 'created_at', 'updated_at', 'name', 'default'})
+        data = self.client.get(url, {'limit': 4, 'cursor': data['next_cursor']}).json()['data']
+        self.assertEqual(([row['name'] for row in data['results']], data['next_cursor']), (self.expected[4:], None))
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': 500}).status_code, 400)
+
+        url = reverse('resume_list_view')
+        ResumeDataHandler().populate_resume_from_json(build_resume_data())
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True))
+        data = self.client.get(url).json()['data']
+        self.assertEqual([(row['name'], row['email']) for row in data['results']], [('John Doe', 'john@example.com')])
+        self.assertIsNone(data['next_cursor'])
+
+
+class ResumeSearchTest(TestCase):
+
+    def setUp(self):
+        grace = build_resume_data(name='Grace Hopper')
+        grace['skills'] = ['COBOL', 'Compilers']
+        self.grace = ResumeDataHandler().populate_resume_from_json(grace)
+        ada = build_resume_data(name='Ada Lovelace')
+        ada['summary'] = 'Analytical engines, inspired by Hopper & Babbage.'
+        self.ada = ResumeDataHandler().populate_resume_from_json(ada)
+        ResumeDataHandler().populate_resume_from_json(build_resume_data(name='Alan Turing'))
+
+    def test_name_matches_rank_first(self):
+        search = ResumeSearchHandler()
+        self.assertEqual([resume_id for resume_id, _ in search.search('hopper')], [self.grace.uuid, self.ada.uuid])
+        self.assertEqual([resume_id for resume_id, _ in search.search('compilers grace')], [self.grace.uuid])
+        # Stemmed, unescaped and with FTS operators read as words
+        self.assertEqual([resume_id for resume_id, _ in search.search('engine babbage & "NEAR (')], [])
+        self.assertEqual([resume_id for resume_id, _ in search.search('engine babbage &')], [self.ada.uuid])
+        self.assertEqual(search.search('*'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        search = ResumeSearchHandler()
+        self.ada.summary.text = 'Poetical science.'
+        self.ada.summary.save()
+        self.assertEqual([resume_id for resume_id, _ in search.search('hopper')], [self.grace.uuid])
+        self.assertEqual(list(search.filter(Resume.objects.all(), 'poetical science')), [self.ada])
+
+        self.grace.delete()
+        self.assertEqual(search.search('hopper'), [])
+
+    def test_search_api_and_admin(self):
+        url = reverse('resume_search_view')
+        self.assertEqual(self.client.get(url, {'q': 'hopper'}).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('ops', is_staff=True, is_superuser=True))
+        data = self.client.get(url, {'q': 'hopper', 'limit': 1}).json()['data']
+        self.assertEqual([result['name'] for result in data['results']], ['Grace Hopper'])
+        self.assertEqual(data['next_offset'], 1)
+        data = self.client.get(url, {'q': 'hopper', 'offset': 1}).json()['data']
+        self.assertEqual(([result['name'] for result in data['results']], data['next_offset']), (['Ada Lovelace'], None))
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'hopper', 'limit': 0}).status_code, 400)
+
+        response = self.client.get(reverse('admin:pdf_engine_resume_changelist'), {'q': 'compilers'})
+        self.assertEqual(list(response.context['cl'].queryset), [self.grace])
+        experience = self.grace.resumeexperience_set.get(position=1).experience
+        experience.company = 'Remington Rand'
+        experience.save()
+        changelist = reverse('admin:pdf_engine_experience_changelist')
+        self.assertEqual(list(self.client.get(changelist, {'q': 'remington'}).context['cl'].queryset), [experience])
+        # The resume matches, but none of its experiences hold the name
+        self.assertEqual(list(self.client.get(changelist, {'q': 'hopper'}).context['cl'].queryset), [])
+
+
+class RenderCoalescingTest(TransactionTestCase):
+
+    def setUp(self):
+        render_root = tempfile.TemporaryDirectory()
+        self.addCleanup(render_root.cleanup)
+        self.store = RenderStore(render_root.name)
+        template_registry.invalidate()
+        self.resume = ResumeDataHandler().populate_resume_from_json(build_resume_data())
+        self.template = ResumeTemplateHandler().register_template('Default')
+        self.key = self.store.get_key(self.resume, self.template)
+
+    def test_concurrent_renders_of_a_key_render_once(self):
+        handler = ResumeTemplateHandler()
+        start = threading.Barrier(8)
+        keys = []
+
+        def download():
+            start.wait()
+            try:
+                keys.append(handler.render_to_store(self.resume, self.template, store=self.store))
+            finally:
+                connection.close()
+
+        def render_resume(*args, **kwargs):
+            time.sleep(0.2)
+            return b'%PDF-1.4'
+
+        with patch.object(ResumeTemplateHandler, 'render_resume', side_effect=render_resume) as render:
+            threads = [threading.Thread(target=download) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        render.assert_called_once()
+        self.assertEqual(keys, [self.key] * 8)
+        self.assertEqual(self.store.get_path(self.key).read_bytes(), b'%PDF-1.4')
+        self.assertFalse(RenderLock.objects.exists())
+
+    def test_waits_for_the_render_of_another_worker(self):
+        RenderLock.objects.create(key=self.key, owner='other', expires_at=timezone.now() + timedelta(minutes=1))
+        threading.Timer(0.2, self.store.save, (self.key, b'%PDF-1.4')).start()
+        with RenderLockHandler(self.store, poll_interval=0.01).hold(self.key) as stored_elsewhere:
+            self.assertTrue(stored_elsewhere)
+        self.assertTrue(RenderLock.objects.filter(owner='other').exists())
+
+        # A lock held past the wait is ignored, one whose holder died is taken over
+        other_key = self.store.get_key(self.resume, self.template, profile='draft')
+        RenderLock.objects.create(key=other_key, owner='other', expires_at=timezone.now() + timedelta(minutes=1))
+        with RenderLockHandler(self.store, timeout=0.1, poll_interval=0.01).hold(other_key) as stored_elsewhere:
+            self.assertFalse(stored_elsewhere)
+        RenderLock.objects.filter(key=other_key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        with RenderLockHandler(self.store, poll_interval=0.01).hold(other_key) as stored_elsewhere:
+            self.assertFalse(stored_elsewhere)
+            self.assertNotEqual(RenderLock.objects.get(key=other_key).owner, 'other')
+        self.assertFalse(RenderLock.objects.filter(key=other_key).exists())
+
+    def test_acquiring_removes_expired_locks_of_other_keys(self):
+        now = timezone.now()
+        RenderLock.objects.create(key='crashed/v1', owner='dead', expires_at=now - timedelta(seconds=1))
+        RenderLock.objects.create(key='crashed/v2', owner='dead', expires_at=now - timedelta(minutes=5))
+        RenderLock.objects.create(key='rendering/v1', owner='alive', expires_at=now + timedelta(minutes=1))
+        with RenderLockHandler(self.store).hold(self.key):
+            self.assertEqual(set(RenderLock.objects.values_list('key', flat=True)), {'rendering/v1', self.key})
+        self.assertEqual(list(RenderLock.objects.values_list('key', flat=True)), ['rendering/v1'])
+
+
+class ArchiveImportTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_json_arrays_decode_across_chunk_boundaries(self):
+        records = [{'name': f'repo {index}', 'description': 'é' * index, 'stars': index} for index in range(50)]
+        raw = json.dumps(records, indent=2).encode()
+        for chunk_size in (1, 7, 64, len(raw)):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_json_array(io.BytesIO(raw), chunk_size=chunk_size)), records)
+
+    def test_linkedin_export(self):
+        path = self.directory / 'linkedin.zip'
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('Profile.csv', '﻿First Name,Last Name,Headline,Summary,Websites\n'
+                                            'Ada,Lovelace,Engineer,,[PORTFOLIO:https://ada.dev]\n')
+            archive.writestr('Email Addresses.csv', 'Email Address,Primary\nold@example.com,No\nada@example.com,Yes\n')
+            archive.writestr('Positions.csv', 'Company Name,Title,Description,Location,Started On,Finished On\n'
+                                              'Acme,Engineer,Built engines,London,Jan 2020,\n')
+            archive.writestr('Education.csv', 'School Name,End Date,Notes,Degree Name\nUCL,2015,Mathematics,BSc\n')
+            archive.writestr('Skills.csv', 'Name\nPython\nPython\nGo\n')
+            archive.writestr('messages.csv', 'FROM,TO,CONTENT\na,b,hello\n')
+
+        self.assertEqual(ResumeDataHandler().import_archives([path], 'linkedin'), 1)
+        data = Resume.objects.get().render_snapshot
+        self.assertEqual((data['name'], data['contact_info']['email'], data['contact_info']['website'], data['summary']),
+                         ('Ada Lovelace', 'ada@example.com', 'https://ada.dev', 'Engineer'))
+        self.assertEqual(data['experience'][0]['end_date'], 'Present')
+        self.assertEqual(data['education'][0]['graduation_date'], '2015')
+        self.assertEqual(data['skills'], ['Python', 'Go'])
+
+    def test_github_archive(self):
+        path = self.directory / 'github.tar.gz'
+        members = {
+            'users_000001.json': [{'login': 'ada', 'name': 'Ada', 'bio': 'Engines',
+                                   'emails': [{'address': 'ada@example.com', 'primary': True}]}],
+            'repositories_000001.json': [
+                {'name': f'repo{index}', 'language': 'Python' if index % 2 else 'Go', 'fork': index == 0,
+                 'topics': None if index == 14 else ['Rust'] if index == 13 else [],
+                 'created_at': f'20{10 + index}-01-01T00:00:00Z'}
+                for index in range(15)
+            ],
+        }
+        with tarfile.open(path, 'w:gz') as archive:
+            for name, records in members.items():
+                raw = json.dumps(records).encode()
+                info = tarfile.TarInfo(name)
+                info.size = len(raw)
+                archive.addfile(info, io.BytesIO(raw))
+
+        data = ResumeDataHandler().extract_data_from_github(path)
+        self.assertEqual((data['name'], data['contact_info']['email'], data['summary']), ('Ada', 'ada@example.com', 'Engines'))
+        self.assertEqual([project['company'] for project in data['experience']][:2], ['repo14', 'repo13'])
+        self.assertEqual(len(data['experience']), 10)
+        self.assertEqual(data['skills'], ['Python', 'Go', 'Rust'])
+        with self.assertRaises(ValueError):
+            ResumeDataHandler().extract_data_from_github(path, login='grace')
@@ -1,8 +1,22 @@
 from django.urls import path
 
 from . import views
-from .views import PDFGeneratorView
+from .views import (
+    PDFGeneratorView,
+    ResumeExportView,
+    ResumeImportView,
+    ResumeListView,
+    ResumePDFView,
+    ResumeSearchView,
+    TemplateListView,
+)
 
 urlpatterns = [
     path("<uuid:template_id>/generate/", PDFGeneratorView.as_view(), name="get_view"),
+    path("export/", ResumeExportView.as_view(), name="export_view"),
+    path("resumes/", ResumeListView.as_view(), name="resume_list_view"),
+    path("templates/", TemplateListView.as_view(), name="template_list_view"),
+    path("resumes/<uuid:resume_id>/pdf/", ResumePDFView.as_view(), name="resume_pdf_view"),
+    path("resumes/import/", ResumeImportView.as_view(), name="resume_import_view"),
+    path("resumes/search/", ResumeSearchView.as_view(), name="resume_search_view"),
 ]
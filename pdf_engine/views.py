@@ -1,8 +1,28 @@
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.text import slugify
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
 
+from base.choices import StateStatuses
+from base.exceptions import BaseAPIException
+from base.pagination import KeysetPaginationMixin
 from base.response import APIResponse
+from base.sanitizer import unescape_markup
+from base.stream import ZipStreamingResponse, serve_file
 from base.views import AbstractAPIView
+from pdf_engine.handlers.Resume_data_handler import ResumeDataHandler
+from pdf_engine.handlers.column_layout import COLUMN_LAYOUTS
+from pdf_engine.handlers.pdf_engine import DEFAULT_RENDER_PROFILE, RENDER_PROFILES
+from pdf_engine.handlers.prerender_handler import PreRenderHandler, get_prerender_stats
+from pdf_engine.handlers.render_lock_handler import get_render_coalescing_stats
+from pdf_engine.handlers.render_memory import get_render_memory_stats
+from pdf_engine.handlers.render_store import RenderStore
+from pdf_engine.handlers.resume_search_handler import MAX_SEARCH_RESULTS, ResumeSearchHandler
 from pdf_engine.handlers.resume_template_handler import ResumeTemplateHandler
+from pdf_engine.models import Resume, ResumeTemplate
 
 
 class PDFGeneratorView(AbstractAPIView):
@@ -11,3 +31,203 @@ class PDFGeneratorView(AbstractAPIView):
         template_id = kwargs.get('template_id')
         data = ResumeTemplateHandler().create_resume(template_id)
         return APIResponse(data=data, status=status.HTTP_200_OK)
+
+
+class RenderProfileMixin:
+
+    def get_render_profile(self):
+        profile = self.request.GET.get('profile') or DEFAULT_RENDER_PROFILE
+        if profile not in RENDER_PROFILES:
+            raise BaseAPIException(
+                f"Unknown render profile, choose one of {', '.join(RENDER_PROFILES)}.", 'validation_failed'
+            )
+        return profile
+
+    def get_column_layout(self):
+        """
+        Column layout named by ``layout``, or the two-column layout when ``two_column`` is set.
+        """
+        layout = self.request.GET.get('layout')
+        if not layout:
+            return self.get_bool_query_value('two_column')
+        if layout not in COLUMN_LAYOUTS:
+            raise BaseAPIException(
+                f"Unknown column layout, choose one of {', '.join(COLUMN_LAYOUTS)}.", 'validation_failed'
+            )
+        return layout
+
+    def get_resume_template(self, handler):
+        """
+        Template named by ``template``, the default one when omitted.
+
+        Only the default template is created on first use; any other name must
+        already exist, so requests cannot add template rows.
+        """
+        name = self.request.GET.get('template')
+        if not name:
+            return handler.register_template('Default')
+        try:
+            return handler.get_template(name)
+        except ResumeTemplate.DoesNotExist:
+            raise BaseAPIException("Unknown template.", 'validation_failed')
+
+
+class ResumeExportView(RenderProfileMixin, AbstractAPIView):
+    """
+    ZIP archive of rendered resumes, all active ones unless ``resume`` uuids are given. Staff only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        handler = ResumeTemplateHandler()
+        resume_template = self.get_resume_template(handler)
+        two_column_layout = self.get_column_layout()
+        profile = self.get_render_profile()
+        resumes = handler.get_resumes_for_export(request.GET.getlist('resume'))
+        return ZipStreamingResponse(
+            handler.iter_rendered_resumes(resumes, resume_template, two_column_layout, profile),
+            filename='resumes.zip'
+        )
+
+
+class ResumePDFView(RenderProfileMixin, AbstractAPIView):
+    """
+    Download a rendered resume, revalidated through a strong ETag.
+
+    The ETag comes from the render key, so a matching ``If-None-Match`` is answered
+    with 304 before anything is rendered or read from disk. The stored file is
+    streamed with ``Range`` support, or handed to the web server, see ``serve_file``.
+    Full downloads are counted per variant, so changes to the resume pre-render them.
+    """
+
+    def get(self, request, *args, **kwargs):
+        handler = ResumeTemplateHandler()
+        resume_template = self.get_resume_template(handler)
+        two_column_layout = self.get_column_layout()
+        profile = self.get_render_profile()
+        try:
+            resume = handler.get_resume_for_render(kwargs.get('resume_id'))
+        except Resume.DoesNotExist:
+            raise Http404("Resume not found.")
+
+        store = RenderStore()
+        key = store.get_key(resume, resume_template, two_column_layout, profile)
+        etag = store.get_etag(key)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            handler.render_to_store(resume, resume_template, two_column_layout, profile, store)
+            response = serve_file(
+                request,
+                store.get_path(key),
+                content_type='application/pdf',
+                filename=f"{slugify(unescape_markup(resume.render_snapshot['name'])) or 'resume'}.pdf",
+                etag=etag
+            )
+            # Revalidations and partial reads are not downloads
+            if response.status_code == status.HTTP_200_OK:
+                PreRenderHandler().record_download(resume, resume_template, two_column_layout, profile)
+        response['ETag'] = etag
+        # Caches may keep the file but must revalidate, a new snapshot changes the tag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class ResumeImportView(AbstractAPIView):
+    """
+    Import resumes posted as ``{"resumes": [...]}``, in the shape populate_resumes_from_json reads. Staff only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        resumes = request.data.get('resumes') if isinstance(request.data, dict) else None
+        if not isinstance(resumes, list) or not resumes:
+            raise BaseAPIException("Send the resumes to import as a non-empty 'resumes' list.", 'validation_failed')
+        try:
+            # All or nothing, whatever batches the import commits in
+            with transaction.atomic():
+                count = ResumeDataHandler().populate_resumes_from_json(resumes)
+        except (KeyError, TypeError, ValueError) as e:
+            raise BaseAPIException(f"Invalid resume data: {e}", 'validation_failed')
+        return APIResponse({'imported': count}, status=status.HTTP_201_CREATED)
+
+
+class ResumeListView(KeysetPaginationMixin, AbstractAPIView):
+    """
+    Active resumes, newest first, a page per ``cursor``, see KeysetPaginator. Staff only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        resumes = Resume.objects.filter(state=StateStatuses.ACTIVE).values(
+            'uuid', 'created_at', 'updated_at', name=F('personal_info__name'), email=F('personal_info__email'))
+        return APIResponse(self.paginate_keyset(resumes))
+
+
+class TemplateListView(KeysetPaginationMixin, AbstractAPIView):
+    """
+    Active resume templates, newest first, a page per ``cursor``, see KeysetPaginator.
+    """
+
+    def get(self, request, *args, **kwargs):
+        templates = ResumeTemplate.objects.filter(state=StateStatuses.ACTIVE).values(
+            'uuid', 'created_at', 'updated_at', 'name', 'default')
+        return APIResponse(self.paginate_keyset(templates))
+
+
+class ResumeSearchView(AbstractAPIView):
+    """
+    Ranked full-text search over resumes, ``?q=`` with ``limit`` and ``offset``. Staff only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        query = (request.GET.get('q') or '').strip()
+        if not query:
+            raise BaseAPIException("Pass the search as 'q'.", 'validation_failed')
+        try:
+            limit = int(request.GET.get('limit') or 20)
+            offset = int(request.GET.get('offset') or 0)
+        except ValueError:
+            raise BaseAPIException("'limit' and 'offset' must be integers.", 'validation_failed')
+        if not 0 < limit <= MAX_SEARCH_RESULTS or offset < 0:
+            raise BaseAPIException(
+                f"'limit' must be between 1 and {MAX_SEARCH_RESULTS} and 'offset' at least 0.", 'validation_failed')
+
+        matches = ResumeSearchHandler().search(query, limit, offset)
+        people = {
+            resume_id: (name, email)
+            for resume_id, name, email in Resume.objects.filter(uuid__in=[resume_id for resume_id, _ in matches])
+            .values_list('uuid', 'personal_info__name', 'personal_info__email')
+        }
+        results = [
+            {'uuid': resume_id, 'name': people[resume_id][0], 'email': people[resume_id][1], 'rank': round(rank, 4)}
+            for resume_id, rank in matches if resume_id in people
+        ]
+        return APIResponse({
+            'results': results,
+            'next_offset': offset + limit if len(matches) == limit else None,
+        })
+
+
+class RenderMemoryMetricsView(AbstractAPIView):
+    """Render memory counters of the worker serving the request, see RENDER_MEMORY_TRACKING."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return APIResponse(get_render_memory_stats())
+
+
+class PreRenderMetricsView(AbstractAPIView):
+    """Pre-render counters of the worker serving the request, see RENDER_PRERENDER_ENABLED."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return APIResponse(get_prerender_stats())
+
+
+class RenderCoalescingMetricsView(AbstractAPIView):
+    """Render coalescing counters of the worker serving the request, see RenderLockHandler."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return APIResponse(get_render_coalescing_stats())
@@ -14,3 +14,32 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pdf_generator.settings")
 
 application = get_asgi_application()
+
+# Fill the database connection pool and load the resume templates while the worker
+# boots, not on its first requests
+import logging  # noqa: E402
+import threading  # noqa: E402
+
+from django.db import DatabaseError, connections  # noqa: E402
+
+from base.db_pool import open_connection_pools  # noqa: E402
+from pdf_engine.handlers.template_registry import template_registry  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    open_connection_pools()
+    try:
+        template_registry.load()
+    except DatabaseError:
+        # Templates then load on their first lookup
+        logger.exception("Template registry not loaded at startup")
+    finally:
+        connections.close_all()
+
+
+# Servers such as uvicorn import this module inside their event loop, where the ORM refuses to run
+warm_up_thread = threading.Thread(target=warm_up, name='warm-up')
+warm_up_thread.start()
+warm_up_thread.join()
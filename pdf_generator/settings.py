@@ -86,6 +86,32 @@ DATABASES = {
     )
 }
 
+# Connection pooling for PostgreSQL, see
+# https://docs.djangoproject.com/en/5.1/ref/databases/#connection-pool
+# Each worker process keeps its own pool; connections are returned to it at the end
+# of every request instead of being closed, whichever thread or async context used them.
+DB_POOL_ENABLED = os.environ.get('DB_POOL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+if DB_POOL_ENABLED and DATABASES['default'].get('ENGINE') == 'django.db.backends.postgresql':
+    # The pool owns connection lifetime, persistent connections must stay off
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    # Django turns this into a liveness check on every checkout, broken connections are replaced
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        # Seconds a request waits for a free connection before failing
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        # Seconds before idle connections above min_size are closed
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+    }
+
+REST_FRAMEWORK = {
+    # Error responses in the APIResponse shape, with the status mapped from the exception type
+    'EXCEPTION_HANDLER': 'base.exception_handler.custom_exception_handler',
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -128,6 +154,34 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # and renames the files with unique names for each version to support long-term caching
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Rendered PDFs kept for download and bulk renders
+RENDER_ROOT = os.environ.get('RENDER_ROOT', os.path.join(BASE_DIR, 'renders'))
+# Threads per worker process rendering bulk jobs in the background
+RENDER_POOL_WORKERS = int(os.environ.get('RENDER_POOL_WORKERS', 2))
+# Resumes handed to a render thread at a time
+RENDER_JOB_CHUNK_SIZE = int(os.environ.get('RENDER_JOB_CHUNK_SIZE', 50))
+# Render the most downloaded variants of a resume in the background after it changes
+RENDER_PRERENDER_ENABLED = os.environ.get('RENDER_PRERENDER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# Seconds after the latest change of a resume before its pre-render starts
+RENDER_PRERENDER_DELAY = float(os.environ.get('RENDER_PRERENDER_DELAY', 2))
+# Variants (template, column layout, profile) pre-rendered per resume, the most downloaded first
+RENDER_PRERENDER_VARIANTS = int(os.environ.get('RENDER_PRERENDER_VARIANTS', 2))
+# Threads per worker process running pre-renders
+RENDER_PRERENDER_WORKERS = int(os.environ.get('RENDER_PRERENDER_WORKERS', 1))
+# Seconds a worker waits for another worker's render of the same PDF, and holds its own render lock
+RENDER_LOCK_TIMEOUT = float(os.environ.get('RENDER_LOCK_TIMEOUT', 30))
+# Seconds between checks of the render store while waiting for another worker's render
+RENDER_LOCK_POLL_INTERVAL = float(os.environ.get('RENDER_LOCK_POLL_INTERVAL', 0.05))
+# Measure peak and retained memory of every render with tracemalloc, see /metrics/render-memory/
+RENDER_MEMORY_TRACKING = os.environ.get('RENDER_MEMORY_TRACKING', 'false').lower() in ('1', 'true', 'yes')
+
+# Let the web server send stored files: '' to stream them from Django, 'nginx'
+# (X-Accel-Redirect to SENDFILE_URL, an internal location aliased to SENDFILE_ROOT)
+# or 'apache'/'lighttpd' (X-Sendfile)
+SENDFILE_BACKEND = os.environ.get('SENDFILE_BACKEND', '')
+SENDFILE_ROOT = RENDER_ROOT
+SENDFILE_URL = os.environ.get('SENDFILE_URL', '/protected/renders/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -17,7 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from base.views import ConnectionPoolMetricsView
+from pdf_engine.views import PreRenderMetricsView, RenderCoalescingMetricsView, RenderMemoryMetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/db-pool/", ConnectionPoolMetricsView.as_view(), name="db_pool_metrics"),
+    path("metrics/prerender/", PreRenderMetricsView.as_view(), name="prerender_metrics"),
+    path("metrics/render-coalescing/", RenderCoalescingMetricsView.as_view(), name="render_coalescing_metrics"),
+    path("metrics/render-memory/", RenderMemoryMetricsView.as_view(), name="render_memory_metrics"),
     path("pdf_engine/", include("pdf_engine.urls")),
 ]